@@ -0,0 +1,79 @@
+"""Multi-workbook Drive ingestion: N workbooks imported concurrently vs each workbook on its own.
+
+Workbooks are generated with benchmarks.workbook_generator (consecutive workbooks share --overlap of
+their tickets) and served from a FakeDriveService folder, optionally throttled to --bandwidth bytes/s
+to stand in for network transfer. No database is needed: change detection is switched off.
+
+    python -m benchmarks.bench_drive_ingest --workbooks 4 --rows 20000 --bandwidth 2000000
+"""
+import argparse
+import json
+import os
+import time
+
+# Must be settled before src is imported: the modules read their configuration at import time
+os.environ['CHANGE_DETECTION'] = 'false'
+os.environ['WORKBOOK_CACHE_DIR'] = ''
+
+from src import data_importer
+from benchmarks.fake_drive import FakeDriveService
+from benchmarks.workbook_generator import write_tracker_workbook
+
+WORKBOOK_DIR = os.path.join('artifacts', 'benchmarks', 'workbooks')
+FOLDER_ID = 'bench-folder'
+
+
+def prepare_workbooks(n_workbooks, n_rows, overlap, seed=0):
+    """Returns cached workbook paths; workbook i starts its tickets overlap rows before workbook i-1 ends."""
+    paths = []
+    for i in range(n_workbooks):
+        first_ticket = i * int(n_rows * (1 - overlap))
+        path = os.path.join(WORKBOOK_DIR, f"team_{i}_{n_rows}_{first_ticket}_{seed}.xlsx")
+        if not os.path.exists(path):
+            write_tracker_workbook(path, n_rows, seed=seed + i, first_ticket=first_ticket)
+        paths.append(path)
+    return paths
+
+
+def timed_import(drive, file_ids=None, folder_id=None):
+    start = time.perf_counter()
+    df = data_importer.get_sheet_data_from_drive(service=drive, file_ids=file_ids or [], folder_id=folder_id)
+    return time.perf_counter() - start, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workbooks', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=20_000, help="rows per workbook")
+    parser.add_argument('--overlap', type=float, default=0.1, help="share of tickets repeated in the next workbook")
+    parser.add_argument('--bandwidth', type=float, default=None, help="simulated download bytes/s per request")
+    parser.add_argument('--parse-workers', type=int, default=data_importer.WORKBOOK_PARSE_WORKERS)
+    args = parser.parse_args()
+
+    data_importer.WORKBOOK_PARSE_WORKERS = args.parse_workers
+    paths = prepare_workbooks(args.workbooks, args.rows, args.overlap)
+
+    drive = FakeDriveService(bandwidth=args.bandwidth)
+    for i, path in enumerate(paths):
+        drive.register(f"team-{i}", path, parents=[FOLDER_ID])
+
+    singles = [timed_import(drive, file_ids=[f"team-{i}"])[0] for i in range(len(paths))]
+    concurrent_seconds, df = timed_import(drive, folder_id=FOLDER_ID)
+
+    print(json.dumps({
+        'workbooks': args.workbooks,
+        'rows_per_workbook': args.rows,
+        'cpus': os.cpu_count(),
+        'parse_workers': args.parse_workers or os.cpu_count(),
+        'single_seconds': [round(seconds, 3) for seconds in singles],
+        'slowest_single_seconds': round(max(singles), 3),
+        'sequential_sum_seconds': round(sum(singles), 3),
+        'concurrent_seconds': round(concurrent_seconds, 3),
+        'concurrent_vs_slowest': round(concurrent_seconds / max(singles), 2),
+        'merged_rows': len(df),
+        'unique_tickets': int(df['ticket_id'].nunique()),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Compares the previous iterrows + execute_batch file_tracker loader with the bulk merge in folder_db_exporter.
+
+The delta is built by the real extraction code from an in-memory bucket of --objects blobs. Each loader
+runs on the scratch benchmark database (BENCH_DB_NAME, recreated from SQL_query/FINAL_QUERY_TABLE):
+a first full load, then a re-sync where --changed of the files moved to another status folder.
+
+    python -m benchmarks.bench_folder_upload --objects 100000 --changed 0.05
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_batch
+
+from benchmarks.run_pipeline import BUCKET_PREFIX, create_database
+from benchmarks.fake_gcs import STATUS_FOLDERS, make_fake_bucket
+from src import folder_db_exporter
+from src.folder_details_extraction import collect_delta
+from src.utils import metrics
+from src.utils.db_connection import close_pool, pooled_connection
+
+
+def legacy_upload(df):
+    """Previous implementation: a tuple per iterrows() row, sent with execute_batch's default page size."""
+    columns = df.columns.tolist()
+    update_stmt = ", ".join([f"{col} = EXCLUDED.{col}" for col in columns if col != 'file_id'])
+    sql = f"""
+        INSERT INTO file_tracker ({", ".join(columns)})
+        VALUES ({", ".join(["%s"] * len(columns))})
+        ON CONFLICT (file_id)
+        DO UPDATE SET {update_stmt}
+        WHERE (EXCLUDED.status IS DISTINCT FROM file_tracker.status);
+    """
+    data = [tuple(row[col] for col in columns) for _, row in df.iterrows()]
+    with pooled_connection() as conn:
+        with conn:
+            with conn.cursor() as cur:
+                execute_batch(cur, sql, data)
+
+
+def move_status(df, fraction, seed=1):
+    """Returns a copy of df with a random fraction of files moved to a different status folder."""
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    mask = rng.random(len(df)) < fraction
+    statuses = [folder.split('_')[0] for folder in STATUS_FOLDERS]
+    df.loc[mask, 'status'] = [statuses[(statuses.index(status) + 1) % len(statuses)] for status in df.loc[mask, 'status']]
+    return df
+
+
+def file_tracker_digest():
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT COUNT(*), SUM(hashtextextended(concat_ws('|', file_id, filename, qc_done_by, uploaded_by,
+                                                                 create_date, modified_date, status), 0))::text
+                FROM file_tracker
+            """)
+            digest = cur.fetchone()
+        conn.rollback()
+    return digest
+
+
+def run_loader(name, loader, df_initial, df_changed):
+    create_database()
+    results = {}
+    for label, df in (('initial_load', df_initial), ('resync', df_changed)):
+        metrics.start_run()
+        start = time.perf_counter()
+        with metrics.step_scope(name):
+            loader(df)
+        counters = metrics.snapshot()['steps'][name]
+        results[label] = {
+            'seconds': round(time.perf_counter() - start, 3),
+            'sql_round_trips': counters.get('sql_round_trips'),
+            **{key: counters[key] for key in ('rows_inserted', 'rows_updated', 'rows_skipped') if key in counters},
+        }
+    results['digest'] = file_tracker_digest()
+    close_pool()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--objects', type=int, default=100_000)
+    parser.add_argument('--changed', type=float, default=0.05, help="fraction of files whose status changes for the re-sync")
+    args = parser.parse_args()
+
+    bucket = make_fake_bucket(args.objects, prefix=BUCKET_PREFIX)
+    data, _ = collect_delta(bucket.list_blobs(prefix=BUCKET_PREFIX), None, {})
+    df_initial = pd.DataFrame(data)
+    df_changed = move_status(df_initial, args.changed)
+
+    results = {
+        'iterrows_execute_batch': run_loader('legacy', legacy_upload, df_initial, df_changed),
+        'copy_merge': run_loader('copy', lambda df: folder_db_exporter.upload(df, mode='copy'), df_initial, df_changed),
+        'execute_values_merge': run_loader('values', lambda df: folder_db_exporter.upload(df, mode='values'), df_initial, df_changed),
+    }
+    digests = {name: result.pop('digest') for name, result in results.items()}
+    print(json.dumps({
+        'objects': args.objects,
+        'delta_rows': len(df_initial),
+        'changed_fraction': args.changed,
+        'results': results,
+        'identical_tables': len(set(map(tuple, digests.values()))) == 1,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Times the serial full-resource bucket walk against the sharded scan engine with its seen-object manifest.
+
+Runs entirely against the in-memory bucket; page_latency emulates the listing round trip.
+
+    python -m benchmarks.bench_gcs_scan --objects 100000 --page-latency 0.05
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from src import folder_details_extraction as fde
+from benchmarks.fake_gcs import make_fake_bucket, FakeBlob
+
+
+def legacy_scan(gcs_bucket, prefix, last_loaded_at):
+    """Previous implementation: one serial listing, every object parsed when newer than the watermark."""
+    data = []
+    for blob in gcs_bucket.list_blobs(prefix=prefix):
+        if not blob.name.endswith('.xlsx'):
+            continue
+        if last_loaded_at and blob.updated <= last_loaded_at:
+            continue
+        base_name, person1, person2 = fde.extract_info_from_filename(blob.name.split('/')[-1])
+        data.append((base_name, person1, person2, blob.updated.strftime('%Y-%m-%d %H:%M:%S')))
+    return data
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return value, round(time.perf_counter() - start, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--objects', type=int, default=100_000)
+    parser.add_argument('--page-latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=fde.SCAN_WORKERS)
+    args = parser.parse_args()
+
+    gcs_bucket = make_fake_bucket(args.objects, page_latency=args.page_latency)
+    prefix = 'tracker/'
+
+    legacy_rows, legacy_seconds = timed(legacy_scan, gcs_bucket, prefix, None)
+
+    manifest = {}
+    blobs, scan_seconds = timed(fde.scan_bucket, gcs_bucket, prefix, args.workers)
+    (rows, _), parse_seconds = timed(fde.collect_delta, blobs, None, manifest)
+
+    # Second run: a handful of new objects, everything else is a manifest hit
+    newest = max(blob.updated for blob in gcs_bucket.blobs)
+    for i in range(10):
+        gcs_bucket.add(FakeBlob(f"{prefix}Success_files/new_{i}$#$Arun.xlsx", newest, newest, generation=i + 1))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest_path = os.path.join(tmp, 'manifest.json')
+        fde.save_manifest(manifest, manifest_path)
+        manifest = fde.load_manifest(manifest_path)
+
+    blobs, rescan_seconds = timed(fde.scan_bucket, gcs_bucket, prefix, args.workers)
+    (delta_rows, _), reparse_seconds = timed(fde.collect_delta, blobs, None, manifest)
+
+    print(json.dumps({
+        'objects': args.objects,
+        'page_latency': args.page_latency,
+        'legacy_serial': {'seconds': legacy_seconds, 'rows': len(legacy_rows)},
+        'sharded_first_run': {'scan_seconds': scan_seconds, 'parse_seconds': parse_seconds, 'rows': len(rows)},
+        'sharded_with_manifest': {'scan_seconds': rescan_seconds, 'parse_seconds': reparse_seconds, 'rows': len(delta_rows)}
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Dashboard traffic against the KPI query API with and without its cache.
+
+Runs on the scratch benchmark database (BENCH_DB_NAME, recreated from SQL_query/FINAL_QUERY_TABLE)
+seeded with the synthetic facts of tests/seed_data.py. --requests queries are drawn from --combinations
+filter combinations (a few popular ones, a long tail), spread over the three dashboards. The cache's
+hit, eviction and invalidation rules are covered by tests/test_kpi_query_api.py.
+
+    python -m benchmarks.bench_kpi_cache --tickets 100000 --requests 2000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+# Must be settled before src is imported: the modules read their configuration at import time
+os.environ['KPI_CACHE_DIR'] = tempfile.mkdtemp(prefix='bench_kpi_cache_')
+
+from benchmarks.run_pipeline import create_database
+from src import kpi_query_api, kpi_rollups
+from src.kpi_query_api import build_query, normalize_filters, query_kpis
+from src.refresh_materialized_view import materialized_view_refresh
+from src.utils.db_connection import close_pool, pooled_connection
+from tests.seed_data import SEED_SQL
+
+
+def make_combinations(count, rng):
+    """Filter combinations a dashboard user might pick: single names, small sets, date windows and mixes."""
+    combinations = []
+    for _ in range(count):
+        dashboard = rng.choice(list(kpi_query_api.DASHBOARDS))
+        filters = {}
+        if rng.random() < 0.8:
+            filters['clients'] = [f"Client {rng.randint(1, 200)}" for _ in range(rng.randint(1, 3))]
+        if rng.random() < 0.3:
+            filters['associates'] = [f"Associate {rng.randint(1, 300)}"]
+        if rng.random() < 0.3:
+            filters['teams'] = [f"Team {rng.randint(1, 12)}"]
+        if rng.random() < 0.5:
+            filters['start'] = f"2024-{rng.randint(1, 12):02d}-01"
+        combinations.append((dashboard, filters))
+    return combinations
+
+
+def fresh(dashboard, filters):
+    """The same query run straight against PostgreSQL."""
+    sql, params = build_query(dashboard, normalize_filters(**filters))
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+
+
+def replay(requests, run):
+    latencies = []
+    for dashboard, filters in requests:
+        start = time.perf_counter()
+        run(dashboard, filters)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        'seconds': round(sum(latencies), 3),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 3),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=100_000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--combinations', type=int, default=200)
+    args = parser.parse_args()
+
+    create_database()
+    with pooled_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute(SEED_SQL, {'tickets': args.tickets})
+            cur.execute("ANALYZE;")
+    materialized_view_refresh()
+    kpi_rollups.refresh_rollups()
+
+    rng = random.Random(0)
+    combinations = make_combinations(args.combinations, rng)
+    # Popular combinations are requested far more often than the tail
+    weights = [1 / (rank + 1) for rank in range(len(combinations))]
+    requests = rng.choices(combinations, weights=weights, k=args.requests)
+
+    results = {
+        'uncached': replay(requests, fresh),
+        'cached': replay(requests, lambda dashboard, filters: query_kpis(dashboard, **filters)),
+        'cache_stats': kpi_query_api.cache_stats(),
+    }
+
+    close_pool()
+    print(json.dumps({'tickets': args.tickets, 'requests': args.requests, 'combinations': args.combinations, 'results': results}, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
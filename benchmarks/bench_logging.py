@@ -0,0 +1,85 @@
+"""Measures what logging costs the pipeline thread: direct handlers vs the queue listener, at DEBUG and INFO.
+
+Two workloads run under each configuration, with the console handler writing to /dev/null and the
+file handler to a temporary directory:
+
+- hot_path: clean_column_name over --columns headers, one debug record each
+- import: the streaming import of a --rows workbook served by FakeDriveService
+
+    python -m benchmarks.bench_logging --rows 20000 --columns 100000
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+# Must be settled before src is imported: the modules read their configuration at import time
+os.environ['CHANGE_DETECTION'] = 'false'
+os.environ['WORKBOOK_CACHE_DIR'] = ''
+
+from src import data_importer
+from src.utils import logger_config
+from benchmarks.fake_drive import FakeDriveService
+from benchmarks.run_pipeline import prepare_workbook
+
+# (handlers attached directly, as before) vs (queue listener), at each level
+CONFIGURATIONS = {
+    'direct_debug': (False, logging.DEBUG),
+    'queue_debug': (True, logging.DEBUG),
+    'queue_info': (True, logging.INFO),
+}
+
+
+def configure(logger, use_queue, level, log_dir, stream):
+    logger_config.stop_logging()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.setLevel(level)
+    logger_config.attach_handlers(logger, logger_config.build_handlers(log_dir, stream), use_queue=use_queue)
+
+
+def timed(func):
+    """Wall and calling-thread CPU seconds of func, plus the time to drain the queued records."""
+    wall_start, cpu_start = time.perf_counter(), time.thread_time()
+    func()
+    wall, cpu = time.perf_counter() - wall_start, time.thread_time() - cpu_start
+    drain_start = time.perf_counter()
+    logger_config.stop_logging()
+    return {'seconds': round(wall, 3), 'thread_cpu_seconds': round(cpu, 3), 'drain_seconds': round(time.perf_counter() - drain_start, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--columns', type=int, default=100_000, help="headers cleaned in the hot-path workload")
+    args = parser.parse_args()
+
+    drive = FakeDriveService()
+    drive.register(data_importer.FILE_ID, prepare_workbook(args.rows, seed=0))
+    headers = [f"Closed Date (QC) {i}" for i in range(args.columns)]
+
+    def hot_path():
+        for header in headers:
+            data_importer.clean_column_name(header)
+
+    def streaming_import():
+        for _ in data_importer.stream_sheet_data_from_drive(service=drive):
+            pass
+
+    logger = logging.getLogger('app_logger')
+    results = {}
+    with open(os.devnull, 'w') as devnull, tempfile.TemporaryDirectory() as log_dir:
+        for name, (use_queue, level) in CONFIGURATIONS.items():
+            results[name] = {}
+            for workload, func in (('hot_path', hot_path), ('import', streaming_import)):
+                configure(logger, use_queue, level, log_dir, devnull)
+                results[name][workload] = timed(func)
+
+    print(json.dumps({'rows': args.rows, 'columns': args.columns, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Plans of the fact-side delta queries before and after the maintenance steps (supporting indexes, targeted ANALYZE).
+
+Runs on the scratch benchmark database (BENCH_DB_NAME, recreated from SQL_query/FINAL_QUERY_TABLE) with
+--tickets synthetic tickets (four facts each, tests/seed_data.py) and --files bucket objects. Autovacuum is
+off for the measured tables so statistics only change when the pipeline's ANALYZE runs. Measured queries:
+
+- bucket_sync: the UPDATE of sync_data_with_bucket_data (rolled back after each run)
+- fact_delta: facts changed since a watermark, as read by the incremental KPI and rollup refreshes
+
+    python -m benchmarks.bench_maintenance --tickets 250000 --files 2000
+"""
+import argparse
+import json
+import time
+
+from benchmarks.run_pipeline import create_database
+from src import db_maintenance
+from src.utils import metrics
+from src.utils.db_connection import close_pool, pooled_connection
+from tests.seed_data import SEED_SQL
+
+SETUP_SQL = """
+    ALTER TABLE fact_catalog_activity SET (autovacuum_enabled = false);
+    ALTER TABLE file_tracker SET (autovacuum_enabled = false);
+    UPDATE fact_catalog_activity SET
+        vendor_name = 'Vendor ' || (fact_id / 4),
+        ticstatus_id = 1,
+        last_updated_at = NOW() - INTERVAL '2 days';
+    -- The last 1%% of facts changed in this run
+    UPDATE fact_catalog_activity SET last_updated_at = NOW()
+    WHERE fact_id > (SELECT MAX(fact_id) FROM fact_catalog_activity) * 0.99;
+    INSERT INTO file_tracker (file_id, filename, status)
+    SELECT 'f' || i, 'Vendor ' || (i * 97), CASE WHEN i %% 4 = 0 THEN 'Pending' ELSE 'Success' END
+    FROM generate_series(1, %(files)s) i;
+"""
+
+QUERIES = {
+    'bucket_sync': """
+        UPDATE fact_catalog_activity f
+        SET ticstatus_id = 5, last_updated_at = NOW()
+        FROM file_tracker ft
+        WHERE f.vendor_name = ft.filename AND ft.status = 'Success' AND f.ticstatus_id != 5
+    """,
+    'fact_delta': """
+        SELECT COUNT(*), SUM(no_of_products) FROM fact_catalog_activity
+        WHERE last_updated_at > NOW() - INTERVAL '1 hour'
+    """,
+}
+
+
+def measure(label, repeat=3):
+    """Best-of-repeat time, plan shape and row estimate of each query (writes are rolled back)."""
+    results = {}
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            for name, sql in QUERIES.items():
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    cur.execute(sql)
+                    timings.append(time.perf_counter() - start)
+                    conn.rollback()
+                cur.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                plan = cur.fetchone()[0][0]['Plan']
+                conn.rollback()
+                results[name] = {'seconds': round(min(timings), 4), 'plan': plan_nodes(plan), 'estimated_rows': plan.get('Plan Rows')}
+    return {label: results}
+
+
+def plan_nodes(plan):
+    """Compact plan shape, e.g. 'Update > Nested Loop > [Seq Scan, Index Scan]'."""
+    children = plan.get('Plans', [])
+    name = plan['Node Type']
+    if not children:
+        return name
+    inner = [plan_nodes(child) for child in children]
+    return f"{name} > {inner[0] if len(inner) == 1 else '[' + ', '.join(inner) + ']'}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=250_000)
+    parser.add_argument('--files', type=int, default=2000)
+    args = parser.parse_args()
+
+    create_database()
+    with pooled_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute(SEED_SQL, {'tickets': args.tickets})
+            cur.execute(SETUP_SQL, {'files': args.files})
+
+    results = {}
+    results.update(measure('before'))
+
+    metrics.start_run()
+    start = time.perf_counter()
+    created = db_maintenance.ensure_indexes()
+    results['ensure_indexes'] = {'seconds': round(time.perf_counter() - start, 3), 'created': created}
+    results.update(measure('indexes_stale_statistics'))
+
+    start = time.perf_counter()
+    analyzed = db_maintenance.analyze_tables(db_maintenance.SOURCE_TABLES + db_maintenance.FACT_TABLES)
+    results['analyze'] = {'seconds': round(time.perf_counter() - start, 3), 'tables': analyzed}
+    results.update(measure('indexes_analyzed'))
+
+    # Nothing changed since: both steps should be no-ops
+    start = time.perf_counter()
+    created = db_maintenance.ensure_indexes()
+    analyzed = db_maintenance.analyze_tables(db_maintenance.SOURCE_TABLES + db_maintenance.FACT_TABLES)
+    results['second_run'] = {'seconds': round(time.perf_counter() - start, 3), 'created': created, 'analyzed': analyzed}
+
+    close_pool()
+    print(json.dumps({'tickets': args.tickets, 'facts': args.tickets * 4, 'files': args.files, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Scaling of the sharded, parallel-connection upload (PARALLEL_WORKERS) at 1, 2, 4 and 8 workers.
+
+Runs on the scratch benchmark database (BENCH_DB_NAME, recreated from SQL_query/FINAL_QUERY_TABLE) with
+a transformed synthetic sheet of --rows tickets. Per worker count it times uploader():
+
+- initial_load: an empty database, worker processes starting (cold)
+- resync: the same sheet with --changed of the tickets modified
+- initial_load_warm: the initial load again on a fresh database, reusing the started workers
+
+1 worker is the existing single-process, single-connection path. The resulting work tables and
+fingerprints must be identical for every worker count. Finally a COPY into the staging table is made
+to fail: the load must raise, leave the work tables untouched and drop its staging table.
+
+    python -m benchmarks.bench_parallel_load --rows 200000 --workers 1,2,4,8
+"""
+import argparse
+import json
+import os
+import time
+
+# Must be settled before src is imported: the modules read their configuration at import time
+os.environ['PARALLEL_MIN_ROWS'] = '0'
+
+from benchmarks.run_pipeline import create_database
+from benchmarks.bench_transition import table_digest
+from benchmarks.synthetic import make_tracker_frame, mutate_frame
+from src import db_exporter
+from src.data_importer import transform_tracker_frame
+from src.utils.db_connection import DB_POOL_MAX, close_pool, pooled_connection
+from src.utils.snapshots import flush_snapshots
+
+
+def timed_upload(df, workers):
+    db_exporter.PARALLEL_WORKERS = workers
+    start = time.perf_counter()
+    db_exporter.uploader(df.copy())
+    seconds = time.perf_counter() - start
+    flush_snapshots()
+    return round(seconds, 3)
+
+
+def database_digest():
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            digest = table_digest(cur)
+            cur.execute("SELECT COUNT(*), COALESCE(SUM(hashtextextended(ticket_id || row_hash, 0)), 0)::text FROM ticket_fingerprint")
+            digest['ticket_fingerprint'] = cur.fetchone()
+            cur.execute("SELECT COUNT(*) FROM pg_class WHERE relname LIKE %s", (f"{db_exporter.PARALLEL_STAGING_TABLE}%",))
+            digest['staging_tables_left'] = cur.fetchone()[0]
+        conn.rollback()
+    return digest
+
+
+def run_workers(workers, df_initial, df_changed):
+    create_database()
+    results = {
+        'initial_load_seconds': timed_upload(df_initial, workers),
+        'resync_seconds': timed_upload(df_changed, workers),
+    }
+    digest = database_digest()
+    close_pool()
+
+    create_database()
+    results['initial_load_warm_seconds'] = timed_upload(df_initial, workers)
+    results['load_connections'] = max(1, min(workers, DB_POOL_MAX - 1)) if workers > 1 else 1
+    close_pool()
+    return results, digest
+
+
+def check_all_or_nothing(workers, df_initial, df_changed):
+    """Fails the second shard COPY of a resync and checks that nothing of it is visible."""
+    create_database()
+    timed_upload(df_initial, workers)
+    before = database_digest()
+
+    copy_shard = db_exporter.copy_shard
+    calls = []
+
+    def failing_copy(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError("injected COPY failure")
+        return copy_shard(*args)
+
+    db_exporter.copy_shard = failing_copy
+    try:
+        timed_upload(df_changed, workers)
+        raised = False
+    except RuntimeError:
+        raised = True
+    finally:
+        db_exporter.copy_shard = copy_shard
+
+    after = database_digest()
+    close_pool()
+    return {'raised': raised, 'work_tables_unchanged': before == after, 'staging_tables_left': after['staging_tables_left']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--changed', type=float, default=0.1, help="fraction of tickets modified for the re-sync")
+    parser.add_argument('--workers', default='1,2,4,8')
+    args = parser.parse_args()
+
+    raw = make_tracker_frame(args.rows, date_format='%d-%b-%y')
+    df_initial = transform_tracker_frame(raw)
+    df_changed = transform_tracker_frame(mutate_frame(raw, args.changed))
+    worker_counts = [int(value) for value in args.workers.split(',')]
+
+    results, digests = {}, {}
+    for workers in worker_counts:
+        results[workers], digests[workers] = run_workers(workers, df_initial, df_changed)
+        print(f"{workers} workers: {results[workers]}", flush=True)
+
+    print(json.dumps({
+        'rows': args.rows,
+        'changed_fraction': args.changed,
+        'cpus': os.cpu_count(),
+        'results': results,
+        'identical_tables': all(digest == digests[worker_counts[0]] for digest in digests.values()),
+        'all_or_nothing': check_all_or_nothing(max(max(worker_counts), 2), df_initial, df_changed),
+    }, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
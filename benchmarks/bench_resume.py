@@ -0,0 +1,90 @@
+"""Recovery from a late-stage failure: a full rerun vs --resume from the run's checkpoints.
+
+The first run fails the view refresh (refresh_views, which refresh_rollups waits on) on purpose.
+The same step graph is then run twice more against the same checkpoint directory: once from
+scratch (what a plain rerun costs) and once resuming the failed run, which replays the completed
+steps from their checkpoints.
+
+    python -m benchmarks.bench_resume --rows 100k --objects 20000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+# A plain rerun must redo the work, not skip it as an unchanged workbook
+os.environ['CHANGE_DETECTION'] = 'false'
+
+from benchmarks.run_pipeline import BUCKET_PREFIX, create_database, prepare_workbook
+from benchmarks.fake_drive import FakeDriveService
+from benchmarks.fake_gcs import make_fake_bucket
+from benchmarks.workbook_generator import SIZES
+from src import main as pipeline
+from src import data_importer, folder_details_extraction
+from src.utils import metrics
+from src.utils.checkpoint import RunCheckpoint, checkpointed_steps
+from src.utils.db_connection import close_pool
+from src.utils.step_runner import PipelineStep, run_steps
+
+FAILING_STEP = 'refresh_views'
+
+
+def fail_once(steps):
+    """Makes FAILING_STEP raise, as a late-stage outage would."""
+    def broken(*args):
+        raise RuntimeError(f"Injected failure in '{FAILING_STEP}'")
+
+    return [
+        PipelineStep(step.name, broken, depends_on=step.depends_on, inputs=step.inputs) if step.name == FAILING_STEP else step
+        for step in steps
+    ]
+
+
+def timed_run(steps, checkpoint):
+    metrics.start_run()
+    start = time.perf_counter()
+    try:
+        results = run_steps(checkpointed_steps(steps, checkpoint), max_workers=pipeline.PIPELINE_MAX_WORKERS)
+    finally:
+        close_pool()
+    return round(time.perf_counter() - start, 3), {name: result.status for name, result in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='10k', help=f"ticket count or one of {sorted(SIZES)}")
+    parser.add_argument('--objects', type=int, default=10_000)
+    args = parser.parse_args()
+
+    n_rows = SIZES.get(args.rows.lower()) or int(args.rows)
+    drive = FakeDriveService()
+    drive.register(data_importer.FILE_ID, prepare_workbook(n_rows, seed=0))
+    folder_details_extraction.PREFIX = BUCKET_PREFIX
+
+    def steps():
+        # A fresh bucket per run: the scan consumes its manifest
+        return pipeline.build_steps(drive, make_fake_bucket(args.objects, prefix=BUCKET_PREFIX), 'batch')
+
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+        create_database()
+        failed_seconds, failed_status = timed_run(fail_once(steps()), RunCheckpoint('failed', checkpoint_dir))
+
+        rerun_seconds, _ = timed_run(steps(), RunCheckpoint('rerun', checkpoint_dir))
+
+        downloaded = drive.bytes_downloaded
+        resume_seconds, resume_status = timed_run(steps(), RunCheckpoint('failed', checkpoint_dir))
+
+    print(json.dumps({
+        'rows': n_rows,
+        'objects': args.objects,
+        'failed_run': {'seconds': failed_seconds, 'steps': failed_status},
+        'full_rerun_seconds': rerun_seconds,
+        'resume_seconds': resume_seconds,
+        'resume_bytes_downloaded': drive.bytes_downloaded - downloaded,
+        'resume_steps': resume_status,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""Dashboard queries over the row-level kpi_table vs the rollup tables, and the cost of keeping the rollups current.
+
+Runs on the scratch benchmark database (BENCH_DB_NAME, recreated from SQL_query/FINAL_QUERY_TABLE),
+with --tickets synthetic tickets (four stage facts each) generated in SQL. The rollups are built once,
+then the most recent --changed of the facts are edited (closed date, associate, status) and refreshed incrementally.
+The result is compared with a full rebuild and with the same aggregates computed from kpi_table.
+
+    python -m benchmarks.bench_rollups --tickets 250000 --changed 0.01
+"""
+import argparse
+import json
+import time
+
+from benchmarks.run_pipeline import create_database
+from src import kpi_rollups
+from src.refresh_materialized_view import materialized_view_refresh
+from src.utils import metrics
+from src.utils.db_connection import close_pool, pooled_connection
+from tests.seed_data import SEED_SQL
+
+# Edits the most recent tickets the way a re-sync does, moving some closed dates across periods
+CHANGE_SQL = """
+    UPDATE fact_catalog_activity SET
+        closed_date = CASE WHEN fact_id %% 3 = 0 THEN NULL ELSE COALESCE(closed_date, DATE '2024-06-01') + 45 END,
+        associate_id = 1 + (associate_id + 1) %% 300,
+        ticstatus_id = 5,
+        last_updated_at = NOW()
+    WHERE fact_id > (SELECT MAX(fact_id) FROM fact_catalog_activity) * (1 - %(changed)s);
+"""
+
+# One interaction per dashboard: row-level query over kpi_table vs the same figures from a rollup
+DASHBOARD_QUERIES = {
+    'client': (
+        """SELECT client_id, date_trunc('month', closed_date_id)::date, stage_order, COUNT(DISTINCT ticket_id), SUM(no_of_products),
+                  SUM(no_of_categories), ROUND((percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_hrs))::numeric, 2)
+           FROM kpi_table GROUP BY 1, 2, 3""",
+        """SELECT client_id, month_start, stage_order, ticket_count, no_of_products, no_of_categories, duration_hrs_p50
+           FROM kpi_rollup_client_month""",
+    ),
+    'associate': (
+        """SELECT associate_id, date_trunc('week', closed_date_id)::date, stage_order, COUNT(DISTINCT ticket_id), SUM(no_of_products),
+                  SUM(no_of_categories), ROUND((percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_hrs))::numeric, 2)
+           FROM kpi_table GROUP BY 1, 2, 3""",
+        """SELECT associate_id, week_start, stage_order, ticket_count, no_of_products, no_of_categories, duration_hrs_p50
+           FROM kpi_rollup_associate_week""",
+    ),
+    'team': (
+        """SELECT team_id, date_trunc('month', closed_date_id)::date, ticket_status_id, COUNT(DISTINCT ticket_id), SUM(no_of_products),
+                  SUM(no_of_categories), ROUND((percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_hrs))::numeric, 2)
+           FROM kpi_table GROUP BY 1, 2, 3""",
+        """SELECT team_id, month_start, ticket_status_id, ticket_count, no_of_products, no_of_categories, duration_hrs_p50
+           FROM kpi_rollup_team_month""",
+    ),
+}
+
+
+def timed_rows(cur, sql, repeat=3):
+    """Best-of-repeat seconds and the sorted result rows of a query."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cur.execute(sql)
+        rows = cur.fetchall()
+        timings.append(time.perf_counter() - start)
+    return round(min(timings), 4), sorted(rows, key=repr)
+
+
+def rollup_digest(cur):
+    """Order-independent content hash of the three rollup tables."""
+    digest = {}
+    for table in kpi_rollups.ROLLUPS:
+        cur.execute(f"SELECT COUNT(*), COALESCE(SUM(hashtextextended((t.*)::text, 0)), 0)::text FROM {table} t")
+        digest[table] = cur.fetchone()
+    return digest
+
+
+def refresh(mode):
+    metrics.start_run()
+    start = time.perf_counter()
+    with metrics.step_scope('refresh_rollups'):
+        kpi_rollups.refresh_rollups(mode)
+    counters = metrics.snapshot()['steps']['refresh_rollups']
+    return {'seconds': round(time.perf_counter() - start, 3), 'changed_facts': counters.get('rows_read'), 'rows_written': counters.get('rows_written')}
+
+
+def compare_dashboards():
+    results = {}
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            for name, (row_level_sql, rollup_sql) in DASHBOARD_QUERIES.items():
+                row_level_seconds, row_level_rows = timed_rows(cur, row_level_sql)
+                rollup_seconds, rollup_rows = timed_rows(cur, rollup_sql)
+                results[name] = {
+                    'kpi_table_seconds': row_level_seconds,
+                    'rollup_seconds': rollup_seconds,
+                    'rows_read': {'kpi_table': count(cur, 'kpi_table'), 'rollup': len(rollup_rows)},
+                    'results_match': row_level_rows == rollup_rows,
+                }
+        conn.rollback()
+    return results
+
+
+def count(cur, table):
+    cur.execute(f"SELECT COUNT(*) FROM {table}")
+    return cur.fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=250_000)
+    parser.add_argument('--changed', type=float, default=0.01, help="fraction of (most recent) facts edited before the incremental refresh")
+    args = parser.parse_args()
+
+    create_database()
+    with pooled_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute(SEED_SQL, {'tickets': args.tickets})
+            cur.execute("ANALYZE;")
+
+    results = {'initial_build': refresh('incremental')}
+    with pooled_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute(CHANGE_SQL, {'changed': args.changed})
+
+    results['incremental_refresh'] = refresh('incremental')
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            incremental = rollup_digest(cur)
+        conn.rollback()
+
+    results['full_rebuild'] = refresh('full')
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            results['incremental_matches_full'] = incremental == rollup_digest(cur)
+        conn.rollback()
+
+    materialized_view_refresh()
+    results['dashboards'] = compare_dashboards()
+    close_pool()
+    print(json.dumps({'tickets': args.tickets, 'facts': args.tickets * 4, 'changed': args.changed, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
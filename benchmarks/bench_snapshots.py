@@ -0,0 +1,79 @@
+"""Compares the previous CSV dumps with the Parquet run snapshots: critical-path time, total write time, size, dtypes.
+
+The CSV side writes output.csv plus the work_in_progress/work_completed split, as data_importer and
+db_exporter used to. The Parquet side queues the same three frames on the snapshot writer.
+
+    python -m benchmarks.bench_snapshots --rows 100000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from src.data_importer import transform_tracker_frame
+from src.db_exporter import prepare_upload_frame
+from src.utils import snapshots
+from benchmarks.synthetic import make_tracker_frame
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def write_csv_dumps(df, df_in_progress, df_completed, path):
+    """Previous behaviour: the full frame and the split, as text, on the calling thread."""
+    df.to_csv(os.path.join(path, 'output.csv'), index=False)
+    df_in_progress.to_csv(os.path.join(path, 'work_in_progress.csv'), index=False)
+    df_completed.to_csv(os.path.join(path, 'work_completed.csv'), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = prepare_upload_frame(transform_tracker_frame(make_tracker_frame(args.rows, date_format='%d-%b-%y')))
+    df_in_progress = df[df['ticket_status'] != 'Completed'].copy()
+    df_completed = df[df['ticket_status'] == 'Completed'].copy()
+
+    with tempfile.TemporaryDirectory() as csv_dir, tempfile.TemporaryDirectory() as snapshot_dir:
+        start = time.perf_counter()
+        write_csv_dumps(df, df_in_progress, df_completed, csv_dir)
+        csv_seconds = time.perf_counter() - start
+
+        snapshots.SNAPSHOT_DIR = snapshot_dir
+        start = time.perf_counter()
+        snapshots.write_snapshot(df, 'tracker', fingerprints=True)
+        snapshots.write_snapshot(df_in_progress, 'work_in_progress')
+        snapshots.write_snapshot(df_completed, 'work_completed')
+        queued_seconds = time.perf_counter() - start
+        snapshots.flush_snapshots()
+        parquet_seconds = time.perf_counter() - start
+
+        restored = snapshots.read_snapshot('tracker', snapshot_dir=snapshot_dir)
+        dtype_mismatches = {
+            col: (str(df[col].dtype), str(restored[col].dtype))
+            for col in df.columns
+            if df[col].dtype != restored[col].dtype and not (df[col].dtype == object and restored[col].dtype != object)
+        }
+
+        print(json.dumps({
+            'rows': args.rows,
+            'csv': {'critical_path_seconds': round(csv_seconds, 3), 'bytes': directory_size(csv_dir)},
+            'parquet': {
+                'critical_path_seconds': round(queued_seconds, 3),
+                'write_seconds': round(parquet_seconds, 3),
+                'bytes': directory_size(snapshot_dir),
+            },
+            'restored_dtypes': {str(dtype): int(count) for dtype, count in restored.dtypes.astype(str).value_counts().items()},
+            'dtype_regressions': dtype_mismatches,
+            'fingerprints_match': bool(
+                (snapshots.read_fingerprints(snapshot_dir=snapshot_dir).reindex(df['ticket_id']).to_numpy()
+                 == snapshots.compute_fingerprints(df).to_numpy()).all()
+            ),
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Compares the previous all-object tracker frame with the typed schema: memory per row and downstream filters.
+
+Both frames come from the same synthetic sheet. The object frame is built the way transform_tracker_frame
+used to finish (counts cast to int then object, every null boxed as None).
+
+    python -m benchmarks.bench_tracker_schema --rows 100000
+"""
+import argparse
+import io
+import json
+import time
+
+import pandas as pd
+
+from src.data_importer import normalize_stage_dates, transform_tracker_frame
+from src.utils.tracker_schema import COUNT_COLUMNS
+from benchmarks.synthetic import make_tracker_frame
+
+STATUS_COLUMNS = ['ticket_status', 'status_s', 'status_c', 'status_qc', 'status_u']
+
+
+def legacy_transform(df):
+    """Previous ending of transform_tracker_frame; text stays object as read_excel returns it before pandas 3."""
+    df = normalize_stage_dates(df)
+    for col in STATUS_COLUMNS:
+        df[col] = df[col].fillna("In-progress")
+    for col in COUNT_COLUMNS:
+        df[col] = df[col].fillna(0).astype(int).astype(object)
+    df = df.astype({col: object for col in df.columns if not pd.api.types.is_datetime64_any_dtype(df[col])})
+    return df.where(pd.notnull(df), None)
+
+
+def best_of(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return round(min(timings), 4)
+
+
+def measure(df):
+    completed = df['ticket_status'] == 'Completed'
+    buffer = io.StringIO()
+    return {
+        'bytes_per_row': round(df.memory_usage(deep=True).sum() / len(df), 1),
+        'dtypes': df.dtypes.astype(str).value_counts().to_dict(),
+        'split_seconds': best_of(lambda: (df[df['ticket_status'] != 'Completed'], df[df['ticket_status'] == 'Completed'])),
+        'status_value_counts_seconds': best_of(lambda: [df[col].value_counts() for col in STATUS_COLUMNS]),
+        'copy_csv_seconds': best_of(lambda: df.to_csv(buffer, index=False, header=False), repeat=2),
+        'completed_rows': int(completed.sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    raw = make_tracker_frame(args.rows, date_format='%d-%b-%y')
+    results = {
+        'object': measure(legacy_transform(raw.copy())),
+        'typed': measure(transform_tracker_frame(raw.copy())),
+    }
+    results['memory_reduction'] = round(results['object']['bytes_per_row'] / results['typed']['bytes_per_row'], 2)
+    print(json.dumps({'rows': args.rows, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
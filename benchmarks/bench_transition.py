@@ -0,0 +1,96 @@
+"""Compares the single-statement ticket transition with the per-table upserts plus ID-list delete.
+
+Runs on the scratch benchmark database (BENCH_DB_NAME, recreated from SQL_query/FINAL_QUERY_TABLE).
+Each mode loads the same initial frame, then re-syncs it with a fraction of tickets moved to
+'Completed'; SQL round trips, time and the resulting work tables are compared.
+
+    python -m benchmarks.bench_transition --rows 100000 --changed 0.2
+"""
+import argparse
+import json
+import time
+
+from benchmarks.run_pipeline import create_database
+from benchmarks.bench_upsert import prepare_frame
+from benchmarks.synthetic import make_tracker_frame, mutate_frame
+from src.db_exporter import prepare_upload_frame, sync_work_tables, transition_tickets, COMPLETED_STATUS
+from src.utils import metrics
+from src.utils.db_connection import close_pool, pooled_connection
+
+
+def table_digest(cur):
+    """Row count and an order-independent content hash of both work tables (insert_date excluded)."""
+    digest = {}
+    for table in ('work_in_progress', 'work_completed'):
+        columns = ", ".join(columns_of(cur, table))
+        cur.execute(f"""
+            SELECT COUNT(*), COALESCE(SUM(hashtextextended((t.*)::text, 0)), 0)::text
+            FROM (SELECT {columns} FROM {table}) t
+        """)
+        digest[table] = cur.fetchone()
+    return digest
+
+
+def columns_of(cur, table):
+    cur.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = %s AND column_name <> 'insert_date' ORDER BY ordinal_position
+    """, (table,))
+    return [row[0] for row in cur.fetchall()]
+
+
+def run_mode(mode, df_initial, df_changed, partitioned=False):
+    create_database(partitioned=partitioned)
+    results = {}
+    for label, df in (('initial_load', df_initial), ('resync', df_changed)):
+        metrics.start_run()
+        start = time.perf_counter()
+        with metrics.step_scope(mode):
+            with pooled_connection() as conn:
+                with conn:
+                    if mode == 'transition':
+                        transition_tickets(conn, df)
+                    else:
+                        sync_work_tables(
+                            conn,
+                            df[df['ticket_status'] != COMPLETED_STATUS],
+                            df[df['ticket_status'] == COMPLETED_STATUS]
+                        )
+        seconds = time.perf_counter() - start
+        counters = metrics.snapshot()['steps'][mode]
+        results[label] = {
+            'seconds': round(seconds, 3),
+            'sql_round_trips': counters.get('sql_round_trips'),
+            **{key: counters[key] for key in ('rows_inserted', 'rows_updated', 'rows_deleted') if key in counters},
+        }
+
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            results['tables'] = table_digest(cur)
+        conn.rollback()
+    close_pool()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--changed', type=float, default=0.2, help="fraction of tickets moved to 'Completed' for the re-sync")
+    parser.add_argument('--partitioned', action='store_true', help="apply SQL_query/PARTITIONED_SCHEMA after the base schema")
+    args = parser.parse_args()
+
+    df_initial = prepare_upload_frame(prepare_frame(make_tracker_frame(args.rows)))
+    df_changed = prepare_upload_frame(prepare_frame(mutate_frame(make_tracker_frame(args.rows), args.changed)))
+
+    results = {mode: run_mode(mode, df_initial, df_changed, args.partitioned) for mode in ('per_table', 'transition')}
+    print(json.dumps({
+        'rows': args.rows,
+        'changed_fraction': args.changed,
+        'partitioned': args.partitioned,
+        'results': results,
+        'identical_tables': results['per_table'].pop('tables') == results['transition'].pop('tables'),
+    }, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
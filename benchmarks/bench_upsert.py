@@ -0,0 +1,72 @@
+"""Compares the COPY staging upsert with the execute_values fallback in db_exporter.
+
+Needs a PostgreSQL database configured through .env with the schema from
+SQL_query/FINAL_QUERY_TABLE loaded. Scratch tables are created and dropped.
+
+    python -m benchmarks.bench_upsert --rows 100000 --changed 0.05
+"""
+import argparse
+import json
+import time
+
+import pandas as pd
+
+from src.db_exporter import upsert_with_filter
+from src.utils.db_connection import get_connection
+from benchmarks.synthetic import make_tracker_frame, mutate_frame
+
+BENCH_TABLE = 'bench_work_in_progress'
+
+
+def prepare_frame(df):
+    """Applies the same object/None conversion that data_importer hands to the uploader."""
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype.kind == 'f':
+            df[col] = df[col].fillna(0).astype(int).astype(object)
+    return df.where(pd.notnull(df), None)
+
+
+def run_mode(conn, mode, df_initial, df_changed):
+    """Times an initial load and a re-sync with a partial change set for one upsert mode."""
+    timings = {}
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}; CREATE TABLE {BENCH_TABLE} (LIKE work_in_progress INCLUDING ALL);")
+    conn.commit()
+
+    for label, df in (('initial_load', df_initial), ('resync', df_changed)):
+        start = time.perf_counter()
+        with conn:
+            counts = upsert_with_filter(conn, df, BENCH_TABLE, 'ticket_id', mode=mode)
+        elapsed = time.perf_counter() - start
+        timings[label] = {
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(len(df) / elapsed, 1) if elapsed else None,
+            **counts
+        }
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--changed', type=float, default=0.05, help='fraction of rows changed for the re-sync pass')
+    args = parser.parse_args()
+
+    df_initial = prepare_frame(make_tracker_frame(args.rows))
+    df_changed = prepare_frame(mutate_frame(make_tracker_frame(args.rows), args.changed))
+
+    conn = get_connection()
+    try:
+        results = {mode: run_mode(conn, mode, df_initial, df_changed) for mode in ('values', 'copy')}
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE};")
+        conn.commit()
+    finally:
+        conn.close()
+
+    print(json.dumps({'rows': args.rows, 'changed_fraction': args.changed, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
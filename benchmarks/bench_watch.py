@@ -0,0 +1,194 @@
+"""Freshness of watch mode: time from a Drive revision or a new bucket object to the end of the micro-batch loading it.
+
+The watcher runs in a background thread against FakeDriveService (whose changes() feed logs every
+register()) and a FakeBucket, on the scratch benchmark database (BENCH_DB_NAME). After the startup full
+run, the benchmark:
+
+- saves --edits new revisions of the tracker workbook, each adding --new-rows tickets
+- adds --new-objects xlsx objects to the bucket
+- fires a burst (two revisions and an object within a second)
+
+Poll intervals are shortened so the run takes a minute; API calls are also projected per hour at the
+configured (production) intervals. Debouncing, coalescing and retries are covered by tests/test_watcher.py.
+
+    python -m benchmarks.bench_watch --rows 10000 --objects 5000
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# Must be settled before src is imported: the modules read their configuration at import time
+os.environ['WATCH_STATE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='bench_watch_'), 'watch_state.json')
+
+from benchmarks.fake_drive import FakeDriveService
+from benchmarks.fake_gcs import FakeBlob, make_fake_bucket
+from benchmarks.run_pipeline import BUCKET_PREFIX, create_database
+from benchmarks.workbook_generator import write_tracker_workbook
+from src import data_importer, folder_details_extraction, watcher
+from src import main as pipeline
+from src.utils.db_connection import close_pool, pooled_connection
+
+# Shortened for the benchmark; production defaults are WATCH_*_SECONDS
+POLL_SECONDS = {'drive': 2.0, 'gcs': 5.0}
+DEBOUNCE_SECONDS = 1.0
+MAX_DELAY_SECONDS = 10.0
+
+
+class BatchLog:
+    '''Runs the watcher's batches through the pipeline and records when each one finished.'''
+    def __init__(self):
+        self.batches = []
+        self.changed = threading.Condition()
+
+    def run(self, steps):
+        start = time.perf_counter()
+        succeeded = pipeline.run_pipeline(steps, checkpoints=False)
+        with self.changed:
+            self.batches.append({
+                'steps': len(steps),
+                'seconds': round(time.perf_counter() - start, 3),
+                'finished_at': time.perf_counter(),
+                'succeeded': succeeded,
+            })
+            self.changed.notify_all()
+        return succeeded
+
+    def wait_for(self, count, timeout=120):
+        with self.changed:
+            if not self.changed.wait_for(lambda: len(self.batches) >= count, timeout):
+                raise TimeoutError(f"No batch {count} within {timeout}s")
+            return self.batches[count - 1]
+
+
+def workbook_revision(directory, n_rows, new_rows, revision, seed):
+    """Revision k holds the n_rows base tickets plus k * new_rows new ones; shared rows are identical."""
+    path = os.path.join(directory, f"tracker_rev{revision}.xlsx")
+    return write_tracker_workbook(path, n_rows + revision * new_rows, seed=seed, chunk_rows=new_rows)
+
+
+def count_tickets(ticket_ids):
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT (SELECT COUNT(*) FROM work_in_progress WHERE ticket_id = ANY(%(ids)s))
+                     + (SELECT COUNT(*) FROM work_completed WHERE ticket_id = ANY(%(ids)s))
+            """, {'ids': ticket_ids})
+            count = cur.fetchone()[0]
+        conn.rollback()
+    return count
+
+
+def count_files(filenames):
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM file_tracker WHERE filename = ANY(%s)", (filenames,))
+            count = cur.fetchone()[0]
+        conn.rollback()
+    return count
+
+
+def add_objects(bucket, count, label):
+    now = datetime.now(timezone.utc)
+    names = [f"bench_{label}_{i:04d}" for i in range(count)]
+    for i, name in enumerate(names):
+        bucket.add(FakeBlob(f"{BUCKET_PREFIX}Success_files/{name}$#$Arun$#$Dinesh.xlsx", now + timedelta(seconds=1), now, generation=i + 1))
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000, help="tickets in the base workbook (a multiple of --new-rows)")
+    parser.add_argument('--new-rows', type=int, default=200, help="tickets added by each workbook revision")
+    parser.add_argument('--edits', type=int, default=3)
+    parser.add_argument('--objects', type=int, default=5000)
+    parser.add_argument('--new-objects', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_watch_workbooks_')
+    drive = FakeDriveService()
+    drive.register(data_importer.FILE_ID, workbook_revision(workdir, args.rows, args.new_rows, 0, args.seed))
+    bucket = make_fake_bucket(args.objects, prefix=BUCKET_PREFIX, seed=args.seed)
+    folder_details_extraction.PREFIX = BUCKET_PREFIX
+    create_database()
+
+    batch_log = BatchLog()
+    sources = [
+        watcher.DriveChangesSource(drive, file_ids=[data_importer.FILE_ID], folder_id='', poll_seconds=POLL_SECONDS['drive']),
+        watcher.GcsListingSource(bucket, poll_seconds=POLL_SECONDS['gcs']),
+    ]
+    pipeline_watcher = watcher.Watcher(
+        sources, build_steps=lambda: pipeline.build_steps(drive, bucket), run_batch=batch_log.run,
+        debounce_seconds=DEBOUNCE_SECONDS, max_delay_seconds=MAX_DELAY_SECONDS, full_run_seconds=0, initial_run=True
+    )
+    stop = threading.Event()
+    thread = threading.Thread(target=pipeline_watcher.run, args=(stop,), daemon=True)
+    watch_start = time.perf_counter()
+    thread.start()
+
+    results = {'full_run': batch_log.wait_for(1)}
+    list_calls_before = bucket.list_calls
+
+    edits = []
+    for revision in range(1, args.edits + 1):
+        path = workbook_revision(workdir, args.rows, args.new_rows, revision, args.seed)
+        start = time.perf_counter()
+        drive.register(data_importer.FILE_ID, path)
+        batch = batch_log.wait_for(len(batch_log.batches) + 1)
+        new_ids = [f"TCK-{i:08d}" for i in range(args.rows + (revision - 1) * args.new_rows, args.rows + revision * args.new_rows)]
+        edits.append({
+            'latency_seconds': round(batch['finished_at'] - start, 3),
+            'batch_seconds': batch['seconds'],
+            'steps': batch['steps'],
+            'new_tickets_loaded': count_tickets(new_ids),
+        })
+    results['workbook_edits'] = edits
+
+    start = time.perf_counter()
+    names = add_objects(bucket, args.new_objects, 'objects')
+    batch = batch_log.wait_for(len(batch_log.batches) + 1)
+    results['new_objects'] = {
+        'latency_seconds': round(batch['finished_at'] - start, 3),
+        'batch_seconds': batch['seconds'],
+        'steps': batch['steps'],
+        'files_loaded': count_files(names),
+    }
+
+    burst = [workbook_revision(workdir, args.rows, args.new_rows, args.edits + k, args.seed) for k in (1, 2)]
+    batches_before = len(batch_log.batches)
+    start = time.perf_counter()
+    drive.register(data_importer.FILE_ID, burst[0])
+    add_objects(bucket, 1, 'burst')
+    time.sleep(0.3)
+    drive.register(data_importer.FILE_ID, burst[1])
+    batch = batch_log.wait_for(batches_before + 1)
+    results['burst'] = {
+        'latency_seconds': round(batch['finished_at'] - start, 3),
+        'steps': batch['steps'],
+    }
+
+    stop.set()
+    thread.join()
+    close_pool()
+
+    elapsed = time.perf_counter() - watch_start
+    results['api_calls'] = {
+        'drive_changes_list': drive.api_calls['changes.list'],
+        'drive_get_start_page_token': drive.api_calls['changes.getStartPageToken'],
+        # Listing calls of the watcher's polls and of the extraction steps it ran
+        'gcs_list_calls': bucket.list_calls - list_calls_before,
+        'watch_seconds': round(elapsed, 1),
+        # Polls per hour at the configured intervals, one listing per Drive poll and one bucket scan per GCS poll
+        'drive_polls_per_hour_configured': round(3600 / watcher.WATCH_DRIVE_POLL_SECONDS),
+        'gcs_scans_per_hour_configured': round(3600 / watcher.WATCH_GCS_POLL_SECONDS),
+    }
+    results['watch_stats'] = pipeline_watcher.stats
+    print(json.dumps({'rows': args.rows, 'objects': args.objects, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
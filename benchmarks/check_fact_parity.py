@@ -0,0 +1,134 @@
+"""Checks that the single-scan fact delta produces the same rows as the previous four-branch UNION ALL.
+
+Builds a scratch schema cloned from the public tables (SQL_query/FINAL_QUERY_TABLE must be loaded),
+fills it with a synthetic tracker, runs both statements and diffs the results. The scratch schema is dropped.
+
+    python -m benchmarks.check_fact_parity --rows 20000
+"""
+import argparse
+import json
+import time
+
+from src.db_exporter import upsert_with_filter
+from src.wc_fact_table_insertion import build_delta_sql
+from src.utils.db_connection import get_connection
+from benchmarks.synthetic import make_tracker_frame, ASSOCIATES, CLIENTS
+from benchmarks.bench_upsert import prepare_frame
+
+SCHEMA = 'fact_parity'
+TABLES = [
+    'work_completed', 'work_in_progress', 'dim_clients', 'dim_catalog_associates',
+    'dim_stages', 'dim_ticket_status', 'dim_dates', 'fact_catalog_activity'
+]
+
+LEGACY_BRANCH = """
+    SELECT
+        wc.ticket_id, wc.vendor_name, c.client_id, ca.associate_id, s.stage_order,
+        INITCAP(wc.{status}), ts.ticket_status_id, wc.{start}, dd.date_id,
+        wc.{products}, wc.{categories},
+        EXTRACT(EPOCH FROM (wc.{closed}::timestamp - wc.{start}::timestamp)) / 3600.0,
+        NOW()
+    FROM {source_table} wc
+    LEFT JOIN dim_clients c ON wc.client = c.client_name
+    LEFT JOIN dim_catalog_associates ca
+        ON COALESCE(NULLIF(TRIM(wc.{associate}), ''), 'Unassigned') = ca.associate_name
+    LEFT JOIN dim_stages s ON s.stage = '{stage}'
+    LEFT JOIN dim_ticket_status ts ON ts.ticket_status = wc.ticket_status
+    LEFT JOIN dim_dates dd ON dd.date_id = wc.{closed}
+    WHERE wc.insert_date > %s
+"""
+
+LEGACY_STAGES = [
+    dict(stage='S', status='status_s', associate='catalogue_associate', start='start_dt_s', closed='closed_dt_s', products='no_of_products_s', categories='no_of_categories_s'),
+    dict(stage='C', status='status_c', associate='assignee_c', start='start_dt_c', closed='closed_dt_c', products='no_of_products_c', categories='no_of_categories_c'),
+    dict(stage='QC', status='status_qc', associate='assignee_qc', start='start_dt_qc', closed='closed_date_qc', products='no_of_products_u', categories='no_of_categories_u'),
+    dict(stage='U', status='status_u', associate='assignee_u', start='start_dt_u', closed='uploaded_date_u', products='no_of_products_u', categories='no_of_categories_u'),
+]
+
+
+def legacy_delta_sql(source_table):
+    """The previous statement: one UNION ALL branch (scan + five joins) per stage."""
+    branches = " UNION ALL ".join(LEGACY_BRANCH.format(source_table=source_table, **stage) for stage in LEGACY_STAGES)
+    return f"""
+        INSERT INTO fact_catalog_activity (
+            ticket_id, vendor_name, client_id, associate_id, stage_order, stage_status,
+            ticstatus_id, start_date, closed_date,
+            no_of_products, no_of_categories, duration_hrs, last_updated_at
+        )
+        SELECT * FROM ({branches}) AS subquery
+        ON CONFLICT (ticket_id, stage_order) DO NOTHING;
+    """
+
+
+def load_fixture(conn, rows):
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA};")
+        for table in TABLES:
+            cur.execute(f"CREATE TABLE {SCHEMA}.{table} (LIKE public.{table} INCLUDING ALL);")
+        cur.execute(f"SET search_path TO {SCHEMA};")
+
+        cur.execute("""
+            INSERT INTO dim_stages (stage, stage_name, stage_order) VALUES
+                ('S', 'Scrapped', 1), ('C', 'Cleaned', 2), ('QC', 'Quality-Check', 3), ('U', 'Upload', 4);
+            INSERT INTO dim_ticket_status (ticket_status, is_final) VALUES
+                ('In-progress', false), ('On Hold', false), ('Rejected', true), ('Completed', true), ('To Do', false);
+            INSERT INTO dim_dates (date_id) SELECT d::date FROM generate_series('2022-05-01'::date, '2030-12-31'::date, interval '1 day') d;
+        """)
+        cur.executemany("INSERT INTO dim_clients (client_name) VALUES (%s);", [(c,) for c in CLIENTS])
+        cur.executemany("INSERT INTO dim_catalog_associates (associate_name) VALUES (%s);",
+                        [(a,) for a in ASSOCIATES if a] + [('Unassigned',)])
+
+    df = prepare_frame(make_tracker_frame(rows))
+    half = len(df) // 2
+    upsert_with_filter(conn, df.iloc[:half], 'work_completed')
+    upsert_with_filter(conn, df.iloc[half:], 'work_in_progress')
+    conn.commit()
+
+
+def run_statement(conn, sql_builder):
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE fact_catalog_activity;")
+        start = time.perf_counter()
+        for table in ('work_completed', 'work_in_progress'):
+            sql = sql_builder(table)
+            cur.execute(sql, ('1900-01-01',) * sql.count('%s'))
+        seconds = time.perf_counter() - start
+        cur.execute("""
+            SELECT ticket_id, vendor_name, client_id, associate_id, stage_order, stage_status, ticstatus_id,
+                   start_date, closed_date, no_of_products, no_of_categories, duration_hrs
+            FROM fact_catalog_activity;
+        """)
+        rows = cur.fetchall()
+    conn.commit()
+    return rows, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20_000)
+    args = parser.parse_args()
+
+    conn = get_connection()
+    try:
+        load_fixture(conn, args.rows)
+        legacy_rows, legacy_seconds = run_statement(conn, legacy_delta_sql)
+        new_rows, new_seconds = run_statement(conn, build_delta_sql)
+
+        legacy_set, new_set = set(legacy_rows), set(new_rows)
+        print(json.dumps({
+            'tickets': args.rows,
+            'fact_rows': {'legacy': len(legacy_rows), 'single_scan': len(new_rows)},
+            'seconds': {'legacy': round(legacy_seconds, 3), 'single_scan': round(new_seconds, 3)},
+            'only_in_legacy': len(legacy_set - new_set),
+            'only_in_single_scan': len(new_set - legacy_set),
+            'parity': legacy_set == new_set and len(legacy_rows) == len(new_rows)
+        }, indent=2))
+    finally:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+        conn.commit()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
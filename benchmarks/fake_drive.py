@@ -0,0 +1,167 @@
+"""Local stand-in for the Drive v3 service, serving registered files from disk.
+
+Media requests are compatible with googleapiclient.http.MediaIoBaseDownload, so the
+pipeline's real chunked download code runs unchanged against local files.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class FakeResponse(dict):
+    '''httplib2-style response: a header dict with a status attribute.'''
+    def __init__(self, status, headers):
+        super().__init__(headers)
+        self.status = status
+
+
+class FakeHttp:
+    '''Serves byte ranges of a local file the way Drive answers alt=media requests.'''
+    def __init__(self, service, path):
+        self._service = service
+        self._path = path
+
+    def request(self, uri, method='GET', headers=None, **kwargs):
+        total = os.path.getsize(self._path)
+        match = re.match(r'bytes=(\d+)-(\d+)', (headers or {}).get('range', ''))
+        start, end = (int(match.group(1)), int(match.group(2))) if match else (0, total - 1)
+        end = min(end, total - 1)
+
+        with open(self._path, 'rb') as fh:
+            fh.seek(start)
+            content = fh.read(end - start + 1)
+
+        self._service.record_download(len(content))
+        if self._service.bandwidth:
+            time.sleep(len(content) / self._service.bandwidth)
+        return FakeResponse(206, {'content-range': f"bytes {start}-{end}/{total}"}), content
+
+
+class FakeMediaRequest:
+    '''Carries the attributes MediaIoBaseDownload reads from an HttpRequest.'''
+    def __init__(self, service, file_id, path):
+        self.uri = f"fake-drive://files/{file_id}?alt=media"
+        self.headers = {}
+        self.http = FakeHttp(service, path)
+
+
+class FakeExecutable:
+    def __init__(self, value):
+        self._value = value
+
+    def execute(self, **kwargs):
+        return self._value
+
+
+class FakeFiles:
+    def __init__(self, service):
+        self._service = service
+
+    def get(self, fileId, fields=None, **kwargs):
+        return FakeExecutable(self._service.metadata(fileId))
+
+    def get_media(self, fileId, **kwargs):
+        return FakeMediaRequest(self._service, fileId, self._service.path(fileId))
+
+    def list(self, q=None, fields=None, pageToken=None, pageSize=100, **kwargs):
+        # Supports the "'<folder>' in parents" filter the importer issues
+        match = re.search(r"'([^']+)' in parents", q or '')
+        file_ids = [
+            file_id for file_id, info in self._service.files_by_id.items()
+            if match is None or match.group(1) in info['parents']
+        ]
+        start = int(pageToken or 0)
+        page = file_ids[start:start + pageSize]
+        response = {'files': [self._service.metadata(file_id) for file_id in page]}
+        if start + pageSize < len(file_ids):
+            response['nextPageToken'] = str(start + pageSize)
+        return FakeExecutable(response)
+
+
+class FakeChanges:
+    '''changes().getStartPageToken / list over the service's change log; page tokens are log positions.'''
+    def __init__(self, service):
+        self._service = service
+
+    def getStartPageToken(self, **kwargs):
+        with self._service._lock:
+            self._service.api_calls['changes.getStartPageToken'] += 1
+            return FakeExecutable({'startPageToken': str(len(self._service.change_log))})
+
+    def list(self, pageToken, pageSize=100, fields=None, **kwargs):
+        with self._service._lock:
+            self._service.api_calls['changes.list'] += 1
+            start = int(pageToken)
+            page = self._service.change_log[start:start + pageSize]
+            response = {'changes': [dict(change) for change in page]}
+            if start + pageSize < len(self._service.change_log):
+                response['nextPageToken'] = str(start + pageSize)
+            else:
+                response['newStartPageToken'] = str(len(self._service.change_log))
+        return FakeExecutable(response)
+
+
+class FakeDriveService:
+    '''Minimal Drive v3 service: files().get / get_media / list over registered local files,
+    and changes() over a log of every register() call.'''
+    def __init__(self, bandwidth=None):
+        self.files_by_id = {}
+        self.bytes_downloaded = 0
+        # Optional bytes/s cap per request, to stand in for network transfer time
+        self.bandwidth = bandwidth
+        self.change_log = []
+        self.api_calls = {'changes.getStartPageToken': 0, 'changes.list': 0}
+        self._lock = threading.Lock()
+
+    def register(self, file_id, path, name=None, parents=()):
+        """Registers (or re-registers after a change) a local file under a Drive file ID."""
+        with open(path, 'rb') as fh:
+            md5 = hashlib.md5(fh.read()).hexdigest()
+        modified = datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc)
+        self.files_by_id[file_id] = {
+            'path': path,
+            'name': name or os.path.basename(path),
+            'parents': list(parents),
+            'md5Checksum': md5,
+            'headRevisionId': md5[:16],
+            'modifiedTime': modified.strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+        }
+        self.log_change(file_id)
+
+    def log_change(self, file_id):
+        """Appends a change of the file to the changes feed; called alone, it stands for a metadata-only
+        change (rename, sharing) that keeps the revision."""
+        info = self.files_by_id[file_id]
+        with self._lock:
+            self.change_log.append({
+                'fileId': file_id,
+                'removed': False,
+                'file': {'headRevisionId': info['headRevisionId'], 'modifiedTime': info['modifiedTime'], 'parents': info['parents'], 'trashed': False},
+            })
+
+    def record_download(self, size):
+        with self._lock:
+            self.bytes_downloaded += size
+
+    def path(self, file_id):
+        return self.files_by_id[file_id]['path']
+
+    def metadata(self, file_id):
+        info = self.files_by_id[file_id]
+        return {
+            'id': file_id,
+            'name': info['name'],
+            'mimeType': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            'md5Checksum': info['md5Checksum'],
+            'headRevisionId': info['headRevisionId'],
+            'modifiedTime': info['modifiedTime'],
+        }
+
+    def files(self):
+        return FakeFiles(self)
+
+    def changes(self):
+        return FakeChanges(self)
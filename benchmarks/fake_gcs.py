@@ -0,0 +1,81 @@
+"""In-memory stand-in for a google.cloud.storage bucket, covering the listing calls the pipeline makes."""
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+STATUS_FOLDERS = ['Success_files', 'Failed_files', 'Pending_files', 'Rework_files']
+UPLOADERS = ['Reshma', 'Vyshnavi (QC)', 'Dinesh', 'Akshay', 'Arun', 'Naresh']
+
+
+class FakeBlob:
+    '''Carries the properties the scan reads from a listed blob.'''
+    def __init__(self, name, updated, time_created, generation):
+        self.name = name
+        self.updated = updated
+        self.time_created = time_created
+        self.generation = generation
+
+
+class FakeBlobIterator:
+    '''Mimics HTTPIterator: pages are fetched lazily and prefixes fill in as pages are consumed.'''
+    def __init__(self, blobs, prefixes, page_size, page_latency):
+        self._blobs = blobs
+        self._prefixes = prefixes
+        self._page_size = page_size
+        self._page_latency = page_latency
+        self.prefixes = set()
+
+    def __iter__(self):
+        for start in range(0, max(len(self._blobs), 1), self._page_size):
+            if self._page_latency:
+                time.sleep(self._page_latency)
+            if start == 0:
+                self.prefixes.update(self._prefixes)
+            yield from self._blobs[start:start + self._page_size]
+
+
+class FakeBucket:
+    '''In-memory bucket; page_latency simulates the round trip per 1,000-object listing page.'''
+    def __init__(self, blobs=(), page_size=1000, page_latency=0.0):
+        self.blobs = sorted(blobs, key=lambda blob: blob.name)
+        self.page_size = page_size
+        self.page_latency = page_latency
+        self.list_calls = 0
+
+    def add(self, blob):
+        self.blobs.append(blob)
+        self.blobs.sort(key=lambda item: item.name)
+
+    def list_blobs(self, prefix=None, delimiter=None, fields=None, **kwargs):
+        self.list_calls += 1
+        prefix = prefix or ''
+        matched, prefixes = [], set()
+
+        for blob in self.blobs:
+            if not blob.name.startswith(prefix):
+                continue
+            rest = blob.name[len(prefix):]
+            if delimiter and delimiter in rest:
+                prefixes.add(prefix + rest.split(delimiter)[0] + delimiter)
+            else:
+                matched.append(blob)
+
+        return FakeBlobIterator(matched, prefixes, self.page_size, self.page_latency)
+
+
+def make_fake_bucket(n_objects, prefix='tracker/', seed=0, page_latency=0.0, start=None):
+    """Builds a bucket of n_objects '$#$'-named xlsx objects spread over the status folders."""
+    rng = np.random.default_rng(seed)
+    start = start or datetime(2024, 1, 1, tzinfo=timezone.utc)
+    blobs = []
+
+    for i in range(n_objects):
+        folder = STATUS_FOLDERS[rng.integers(len(STATUS_FOLDERS))]
+        qc_by, uploaded_by = rng.choice(UPLOADERS, 2)
+        created = start + timedelta(minutes=int(i))
+        updated = created + timedelta(minutes=int(rng.integers(0, 600)))
+        name = f"{prefix}{folder}/vendor_{i:07d}$#${qc_by}$#${uploaded_by}.xlsx"
+        blobs.append(FakeBlob(name, updated, created, generation=int(rng.integers(1, 2**40))))
+
+    return FakeBucket(blobs, page_latency=page_latency)
@@ -0,0 +1,262 @@
+"""End-to-end pipeline benchmark: runs every main.py step against local stand-ins and records per-step costs.
+
+- the tracker workbook is generated (and cached) with benchmarks.workbook_generator and served by FakeDriveService
+- the bucket is an in-memory FakeBucket of '$#$'-named xlsx objects whose names match the synthetic vendors
+- a fresh PostgreSQL database is created and loaded from SQL_query/FINAL_QUERY_TABLE
+
+Connection settings come from the usual DB_* variables; BENCH_DB_NAME names the scratch database
+(dropped and recreated on every run). Results go to artifacts/benchmarks/pipeline_<rows>_<timestamp>.json.
+
+    python -m benchmarks.run_pipeline --rows 100k --objects 20000
+"""
+import argparse
+import json
+import os
+import resource
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Must be settled before src is imported: the modules read their configuration at import time
+_ADMIN_DB = os.getenv('DB_NAME') or 'postgres'
+BENCH_DB_NAME = os.environ.setdefault('BENCH_DB_NAME', 'etl_bench')
+os.environ['DB_NAME'] = BENCH_DB_NAME
+os.environ.setdefault('SNAPSHOT_DIR', tempfile.mkdtemp(prefix='bench_snapshots_'))
+os.environ.setdefault('GCS_MANIFEST_PATH', os.path.join(tempfile.mkdtemp(prefix='bench_gcs_'), 'manifest.json'))
+# Every run downloads the workbook again, so import timings stay comparable
+os.environ.setdefault('WORKBOOK_CACHE_DIR', '')
+
+import psycopg2
+import pandas as pd
+
+from src import main as pipeline
+from src import data_importer, folder_details_extraction
+from src.utils import metrics
+from src.utils.snapshots import flush_snapshots
+from src.utils.db_connection import DB_CONFIG, close_pool, pooled_connection
+from src.utils.step_runner import PipelineStep, run_steps
+from benchmarks.fake_drive import FakeDriveService
+from benchmarks.fake_gcs import make_fake_bucket
+from benchmarks.workbook_generator import SIZES, write_tracker_workbook
+
+SCHEMA_PATH = os.path.join('SQL_query', 'FINAL_QUERY_TABLE')
+PARTITIONED_SCHEMA_PATH = os.path.join('SQL_query', 'PARTITIONED_SCHEMA')
+RESULTS_DIR = os.path.join('artifacts', 'benchmarks')
+BUCKET_PREFIX = 'tracker/'
+
+# Rows a step has produced, read back from the database once it finishes
+STEP_ROW_QUERIES = {
+    'upload_sheet': "SELECT (SELECT COUNT(*) FROM work_in_progress) + (SELECT COUNT(*) FROM work_completed)",
+    'upload_folders': "SELECT COUNT(*) FROM file_tracker",
+    'update_dimensions': "SELECT (SELECT COUNT(*) FROM dim_clients) + (SELECT COUNT(*) FROM dim_catalog_associates)",
+    'update_fact_table': "SELECT COUNT(*) FROM fact_catalog_activity",
+    'refresh_views': "SELECT COUNT(*) FROM kpi_table",
+    'refresh_rollups': "SELECT (SELECT COUNT(*) FROM kpi_rollup_client_month) + (SELECT COUNT(*) FROM kpi_rollup_associate_week) + (SELECT COUNT(*) FROM kpi_rollup_team_month)",
+}
+
+# kpi_table2 is refreshed by the pipeline but its definition is not part of the schema file
+KPI_TABLE2_STANDIN = """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS kpi_table2 AS SELECT * FROM kpi_table;
+    CREATE UNIQUE INDEX IF NOT EXISTS uidx_kpi_table2_fact_id ON kpi_table2 (fact_id);
+"""
+
+
+def create_database(admin_db=_ADMIN_DB, schema_path=SCHEMA_PATH, partitioned=False):
+    """Drops and recreates the benchmark database, then loads the pipeline schema (optionally partitioned) into it."""
+    admin = psycopg2.connect(**{**DB_CONFIG, 'dbname': admin_db})
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cur:
+            cur.execute(f'DROP DATABASE IF EXISTS "{BENCH_DB_NAME}"')
+            cur.execute(f'CREATE DATABASE "{BENCH_DB_NAME}"')
+    finally:
+        admin.close()
+
+    with open(schema_path) as fh:
+        schema_sql = fh.read()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(schema_sql)
+            cur.execute(KPI_TABLE2_STANDIN)
+
+        if partitioned:
+            # The migration script manages its own transaction
+            conn.autocommit = True
+            with open(PARTITIONED_SCHEMA_PATH) as fh, conn.cursor() as cur:
+                cur.execute(fh.read())
+    finally:
+        conn.close()
+
+
+def current_rss():
+    """Resident set size of this process in bytes."""
+    with open('/proc/self/statm') as fh:
+        return int(fh.read().split()[1]) * resource.getpagesize()
+
+
+class RssSampler(threading.Thread):
+    '''Samples RSS in the background and tracks the peak seen inside each open measurement window.'''
+    def __init__(self, interval=0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.windows = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def open(self, name):
+        with self._lock:
+            self.windows[name] = {'active': True, 'peak': current_rss()}
+
+    def close(self, name):
+        with self._lock:
+            window = self.windows[name]
+            window['peak'] = max(window['peak'], current_rss())
+            window['active'] = False
+            return window['peak']
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            rss = current_rss()
+            with self._lock:
+                for window in self.windows.values():
+                    if window['active']:
+                        window['peak'] = max(window['peak'], rss)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def count_rows(value, args, step_name):
+    """Rows handled by a step: the DataFrame it returned or consumed, else the table it fills."""
+    for candidate in (value, *args):
+        if isinstance(candidate, pd.DataFrame):
+            return len(candidate)
+
+    query = STEP_ROW_QUERIES.get(step_name)
+    if query is None:
+        return None
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query)
+            rows = cur.fetchone()[0]
+        conn.rollback()
+    return rows
+
+
+def instrument(step, sampler, step_metrics):
+    """Wraps a step so its wall time, peak RSS and row count are recorded."""
+    def measured(*args):
+        sampler.open(step.name)
+        start = time.perf_counter()
+        try:
+            return_value = step.func(*args)
+        finally:
+            seconds = time.perf_counter() - start
+            peak_rss = sampler.close(step.name)
+
+        # The count query is kept out of the step's own SQL counters
+        with metrics.step_scope(metrics.UNSCOPED):
+            rows = count_rows(return_value, args, step.name)
+        step_metrics[step.name] = {
+            'seconds': round(seconds, 3),
+            'peak_rss_mb': round(peak_rss / 2**20, 1),
+            'rows': rows,
+            'rows_per_sec': round(rows / seconds, 1) if rows and seconds else None,
+        }
+        return return_value
+
+    return PipelineStep(
+        step.name, measured, depends_on=step.depends_on, inputs=step.inputs,
+        retries=0, retry_delay=step.retry_delay
+    )
+
+
+def prepare_workbook(n_rows, seed):
+    """Returns a cached synthetic workbook for n_rows, generating it on first use."""
+    path = os.path.join(RESULTS_DIR, 'workbooks', f"tracker_{n_rows}_{seed}.xlsx")
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        write_tracker_workbook(path, n_rows, seed)
+        print(f"Generated {path} in {time.perf_counter() - start:.1f}s")
+    return path
+
+
+def run_benchmark(n_rows, n_objects, ingest_mode, workers, seed=0, partitioned=False):
+    """Runs the full step graph once on a fresh database and returns the results record."""
+    workbook = prepare_workbook(n_rows, seed)
+    drive = FakeDriveService()
+    drive.register(data_importer.FILE_ID, workbook)
+    bucket = make_fake_bucket(n_objects, prefix=BUCKET_PREFIX, seed=seed)
+    folder_details_extraction.PREFIX = BUCKET_PREFIX
+
+    create_database(partitioned=partitioned)
+
+    step_metrics = {}
+    sampler = RssSampler()
+    sampler.start()
+    steps = [instrument(step, sampler, step_metrics) for step in pipeline.build_steps(drive, bucket, ingest_mode)]
+    metrics.start_run()
+
+    start = time.perf_counter()
+    try:
+        results = run_steps(steps, max_workers=workers)
+    finally:
+        flush_snapshots()
+        total = time.perf_counter() - start
+        sampler.stop()
+        close_pool()
+
+    # Counters reported by the pipeline itself (CPU time, SQL round trips, row kinds)
+    counters = metrics.snapshot()['steps']
+    for name, result in results.items():
+        step_metrics.setdefault(name, {}).update(status=result.status, attempts=result.attempts)
+        step_metrics[name]['counters'] = {key: value for key, value in counters.get(name, {}).items() if key != 'wall_seconds'}
+        if result.error is not None:
+            step_metrics[name]['error'] = repr(result.error)
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'rows': n_rows,
+        'objects': n_objects,
+        'ingest_mode': ingest_mode,
+        'partitioned': partitioned,
+        'workers': workers,
+        'workbook_bytes': os.path.getsize(workbook),
+        'drive_bytes_downloaded': drive.bytes_downloaded,
+        'total_seconds': round(total, 3),
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'steps': step_metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='10k', help=f"ticket count or one of {sorted(SIZES)}")
+    parser.add_argument('--objects', type=int, default=10_000, help="xlsx objects in the fake bucket")
+    parser.add_argument('--ingest-mode', choices=['batch', 'stream'], default=pipeline.INGEST_MODE)
+    parser.add_argument('--workers', type=int, default=pipeline.PIPELINE_MAX_WORKERS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--partitioned', action='store_true', help="apply SQL_query/PARTITIONED_SCHEMA after the base schema")
+    parser.add_argument('--output', help="results file (default: artifacts/benchmarks/pipeline_<rows>_<timestamp>.json)")
+    args = parser.parse_args()
+
+    n_rows = SIZES.get(args.rows.lower()) or int(args.rows)
+    record = run_benchmark(n_rows, args.objects, args.ingest_mode, args.workers, args.seed, args.partitioned)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"pipeline_{n_rows}_{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as fh:
+        json.dump(record, fh, indent=2)
+
+    print(json.dumps(record, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+# Column layout of work_in_progress / work_completed (minus insert_date), as produced by data_importer
+TRACKER_COLUMNS = [
+    'lead_generation_dt', 'source', 'client', 'vendor_type', 'ticket_id', 'vendor_name', 'category',
+    'nature_of_business', 'address_details', 'city', 'region', 'zip_code', 'name_of_poc', 'website',
+    'e_mail_address', 'contact_number', 'gst_details', 'documents', 'status_bd', 'status_crm',
+    'comments_bd', 'remarks_bd', 'raw_qc_status', 'raw_qc_remarks', 'ticket_status', 'ticket_comments',
+    'ticket_assigned_dt', 'catalogue_associate',
+    'prod_type_s', 'status_s', 'assignee_s', 'assigned_dt_s', 'start_dt_s', 'closed_dt_s',
+    'no_of_products_s', 'no_of_categories_s', 'remarks_s',
+    'prod_type_c', 'status_c', 'assignee_c', 'assigned_dt_c', 'start_dt_c', 'closed_dt_c',
+    'no_of_products_c', 'no_of_categories_c', 'remarks_c',
+    'prod_type_qc', 'status_qc', 'assignee_qc', 'assigned_dt_qc', 'start_dt_qc', 'closed_date_qc',
+    'prod_type_u', 'status_u', 'assignee_u', 'assigned_dt_u', 'start_dt_u', 'uploaded_date_u',
+    'no_of_products_u', 'no_of_categories_u', 'reupload_master_products_count', 'reupload_mapping_count',
+    'remarks_qc_u'
+]
+
+DATE_COLUMNS = [
+    'lead_generation_dt', 'ticket_assigned_dt',
+    'assigned_dt_s', 'start_dt_s', 'closed_dt_s',
+    'assigned_dt_c', 'start_dt_c', 'closed_dt_c',
+    'assigned_dt_qc', 'start_dt_qc', 'closed_date_qc',
+    'assigned_dt_u', 'start_dt_u', 'uploaded_date_u'
+]
+
+COUNT_COLUMNS = [
+    'no_of_categories_s', 'no_of_categories_c', 'no_of_categories_u',
+    'no_of_products_c', 'no_of_products_u', 'no_of_products_s'
+]
+
+STATUS_COLUMNS = ['ticket_status', 'status_s', 'status_c', 'status_qc', 'status_u']
+
+ASSIGNEE_COLUMNS = ['catalogue_associate', 'assignee_s', 'assignee_c', 'assignee_qc', 'assignee_u']
+
+CLIENTS = ['Acme Retail', 'Blue Mart', 'Cedar Foods', 'Delta Home', 'Evergreen Pharma', 'Fresh Basket']
+ASSOCIATES = ['Reshma', 'Vyshnavi', 'Dinesh', 'Akshay', 'Arun', 'Naresh', None]
+TICKET_STATUSES = ['Completed', 'In-progress', 'On Hold', 'To Do', 'Rejected', None]
+STAGE_STATUSES = ['Completed', 'In-progress', 'Done', None]
+
+
+def make_tracker_frame(n_rows, seed=0, date_format=None, offset=0):
+    """Builds a synthetic tracker frame with the real column set.
+
+    Dates are returned as datetime64 columns, or as strings when date_format is given
+    (e.g. '%d-%b-%y' for the raw sheet, '%Y-%m-%d' for the cleaned output).
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+
+    for col in TRACKER_COLUMNS:
+        if col == 'ticket_id':
+            data[col] = [f"TCK-{i:08d}" for i in range(offset, offset + n_rows)]
+        elif col == 'vendor_name':
+            data[col] = np.array([f"vendor_{v:07d}" for v in rng.integers(0, max(n_rows, 1), n_rows)], dtype=object)
+        elif col == 'client':
+            data[col] = rng.choice(CLIENTS, n_rows)
+        elif col in ASSIGNEE_COLUMNS:
+            data[col] = rng.choice(np.array(ASSOCIATES, dtype=object), n_rows)
+        elif col == 'ticket_status':
+            data[col] = rng.choice(np.array(TICKET_STATUSES, dtype=object), n_rows, p=[0.55, 0.25, 0.05, 0.05, 0.05, 0.05])
+        elif col in STATUS_COLUMNS:
+            data[col] = rng.choice(np.array(STAGE_STATUSES, dtype=object), n_rows)
+        elif col in COUNT_COLUMNS:
+            counts = rng.integers(0, 500, n_rows).astype(float)
+            counts[rng.random(n_rows) < 0.1] = np.nan
+            data[col] = counts
+        elif col in DATE_COLUMNS:
+            continue
+        else:
+            values = np.array([f"{col}_{v}" for v in rng.integers(0, 1000, n_rows)], dtype=object)
+            values[rng.random(n_rows) < 0.2] = None
+            data[col] = values
+
+    # Stage dates move forward in pipeline order; later stages are more often still empty
+    base = np.datetime64('2023-01-01') + rng.integers(0, 900, n_rows).astype('timedelta64[D]')
+    offset = np.zeros(n_rows, dtype='int64')
+    for position, col in enumerate(DATE_COLUMNS):
+        offset = offset + rng.integers(0, 4, n_rows)
+        values = (base + offset.astype('timedelta64[D]')).astype('datetime64[ns]')
+        values[rng.random(n_rows) < 0.05 + 0.03 * position] = np.datetime64('NaT')
+        data[col] = values
+
+    df = pd.DataFrame(data)[TRACKER_COLUMNS]
+
+    if date_format:
+        for col in DATE_COLUMNS:
+            df[col] = df[col].dt.strftime(date_format).astype(object).where(df[col].notna(), None)
+
+    return df
+
+
+def mutate_frame(df, fraction, seed=1):
+    """Returns a copy of df with the ticket/stage status of a random fraction of rows changed."""
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    mask = rng.random(len(df)) < fraction
+    df.loc[mask, 'ticket_status'] = 'Completed'
+    df.loc[mask, 'status_u'] = 'Completed'
+    df.loc[mask, 'ticket_comments'] = 'changed'
+    return df
@@ -0,0 +1,62 @@
+"""Generates tracker workbooks shaped like the real Drive file.
+
+The first sheet is a cover sheet; the second holds the tracker with an index column,
+human-readable headers (e.g. 'Closed Date (QC)') and dates formatted as '%d-%b-%y'.
+
+    python -m benchmarks.workbook_generator --rows 100000 --output artifacts/benchmarks/tracker_100k.xlsx
+"""
+import argparse
+import os
+
+from openpyxl import Workbook
+
+from benchmarks.synthetic import TRACKER_COLUMNS, make_tracker_frame
+
+STAGE_SUFFIXES = {'s', 'c', 'qc', 'u'}
+
+# Standard benchmark sizes
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+
+def raw_header(col):
+    """Turns a cleaned column name back into a sheet header that clean_column_name maps onto it."""
+    parts = col.split('_')
+    if parts[-1] in STAGE_SUFFIXES:
+        return f"{' '.join(part.title() for part in parts[:-1])} ({parts[-1].upper()})"
+    return ' '.join(part.title() for part in parts)
+
+
+def write_tracker_workbook(path, n_rows, seed=0, chunk_rows=50_000, first_ticket=0):
+    """Writes an n_rows tracker workbook in constant memory and returns its path; ticket IDs start at first_ticket."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    wb = Workbook(write_only=True)
+    cover = wb.create_sheet('Summary')
+    cover.append(['Catalogue performance tracker (synthetic)'])
+
+    sheet = wb.create_sheet('Tracker')
+    sheet.append(['Sr. No'] + [raw_header(col) for col in TRACKER_COLUMNS])
+
+    for offset in range(0, n_rows, chunk_rows):
+        size = min(chunk_rows, n_rows - offset)
+        df = make_tracker_frame(size, seed=seed + offset, date_format='%d-%b-%y', offset=first_ticket + offset)
+        df = df.astype(object).where(df.notna(), None)
+        for index, row in enumerate(df.itertuples(index=False, name=None), start=offset + 1):
+            sheet.append((index,) + tuple(int(v) if isinstance(v, float) else v for v in row))
+
+    wb.save(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='10k', help=f"row count or one of {sorted(SIZES)}")
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    n_rows = SIZES.get(args.rows.lower()) or int(args.rows)
+    print(write_tracker_workbook(args.output, n_rows, args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,94 +1,165 @@
+import json
+import os
+import threading
 import psycopg2
-from src.utils.db_connection import get_connection
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+from src.utils.db_connection import pooled_connection
 from src.utils.logger_config import AppLogger  # Adjust path as per your project structure
+from src.utils.etl_updater import get_etl_metadata, update_etl_metadata
+from src.utils import metrics
 
 logger = AppLogger().get_logger()
 
+load_dotenv()
+
+# Teams, their leads and associate membership, bulk-loaded into dim_teams / associate_team_map
+TEAM_MAP_PATH = os.getenv("TEAM_MAP_PATH", os.path.join("config", "team_map.json"))
+
+# etl_metadata key holding the insert_date up to which dimensions are in sync
+DIMENSION_WATERMARK = 'dimensions'
+
+# Names found in the rows changed since the watermark. Associates follow the original rules:
+# blank assignees become 'Unassigned', names without a letter are ignored.
+DELTA_NAMES_SQL = """
+    SELECT DISTINCT 'associate' AS kind, COALESCE(st.associate_name, 'Unassigned') AS name
+    FROM {source_table} wt
+    CROSS JOIN LATERAL (
+        VALUES (wt.catalogue_associate), (wt.assignee_s), (wt.assignee_c), (wt.assignee_u), (wt.assignee_qc)
+    ) AS st (associate_name)
+    WHERE wt.insert_date > %s
+      AND (st.associate_name IS NULL OR st.associate_name ~ '[A-Za-z]')
+    UNION
+    SELECT DISTINCT 'client', wt.client
+    FROM {source_table} wt
+    WHERE wt.insert_date > %s
+      AND wt.client IS NOT NULL
+"""
+
+# Dimension table and name column per kind
+DIMENSIONS = {
+    'associate': ('dim_catalog_associates', 'associate_name'),
+    'client': ('dim_clients', 'client_name'),
+}
+
+# Names known to exist in each dimension, loaded once per process and extended only after a commit
+_known_names = {}
+_known_lock = threading.Lock()
+
+
+def load_known_names(cur):
+    """Returns the in-process name sets, reading the dimension tables on first use."""
+    with _known_lock:
+        if not _known_names:
+            for kind, (table, column) in DIMENSIONS.items():
+                cur.execute(f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL")
+                _known_names[kind] = {row[0] for row in cur.fetchall()}
+            logger.debug(f"Loaded known dimension names: { {kind: len(names) for kind, names in _known_names.items()} }")
+        return {kind: set(names) for kind, names in _known_names.items()}
+
+
+def remember_names(new_names):
+    """Adds committed names to the in-process sets."""
+    with _known_lock:
+        for kind, names in new_names.items():
+            _known_names.setdefault(kind, set()).update(names)
+
+
+def reset_known_names():
+    """Forgets the in-process sets, e.g. after dimension rows were removed outside the pipeline."""
+    with _known_lock:
+        _known_names.clear()
+
+
+def fetch_delta_names(cur, last_loaded_at):
+    """Returns {kind: names} for the rows of both work tables changed since last_loaded_at."""
+    found = {kind: set() for kind in DIMENSIONS}
+    for source_table in ('work_completed', 'work_in_progress'):
+        cur.execute(DELTA_NAMES_SQL.format(source_table=source_table), (last_loaded_at, last_loaded_at))
+        rows = cur.fetchall()
+        metrics.record_rows(read=len(rows))
+        for kind, name in rows:
+            found[kind].add(name)
+    return found
+
+
+def insert_new_names(cur, new_names):
+    """Inserts names missing from the dimensions; ON CONFLICT covers rows added by someone else meanwhile."""
+    for kind, names in new_names.items():
+        if not names:
+            continue
+        table, column = DIMENSIONS[kind]
+        execute_values(
+            cur,
+            f"INSERT INTO {table} ({column}) VALUES %s ON CONFLICT ({column}) DO NOTHING",
+            [(name,) for name in sorted(names)]
+        )
+        metrics.record_rows(table=table, inserted=len(names))
+        logger.info(f"Inserted {len(names)} new names into '{table}'")
+
+
+def load_team_map(path=TEAM_MAP_PATH):
+    """Reads the team config as (team rows, associate/team rows)."""
+    with open(path) as fh:
+        config = json.load(fh)
+
+    teams, members = [], []
+    for team in config.get('teams', []):
+        teams.append((team['team_name'], team.get('team_lead')))
+        members.extend((associate, team['team_name']) for associate in team.get('associates', []))
+    return teams, members
+
+
+def sync_team_map(cur, path=TEAM_MAP_PATH):
+    """Bulk-loads teams and associate membership; associates not yet in the dimension are skipped."""
+    if not os.path.exists(path):
+        logger.warning(f"Team map not found at {path}; skipping team sync")
+        return
+
+    teams, members = load_team_map(path)
+    if teams:
+        execute_values(cur, """
+            INSERT INTO dim_teams (team_name, team_lead) VALUES %s
+            ON CONFLICT (team_name) DO NOTHING
+        """, teams)
+
+    if members:
+        # associate_team_map references dim_catalog_associates, so unknown associates would abort the batch
+        inserted = execute_values(cur, """
+            INSERT INTO associate_team_map (associate_name, team_name)
+            SELECT m.associate_name, m.team_name
+            FROM (VALUES %s) AS m (associate_name, team_name)
+            JOIN dim_catalog_associates ca ON ca.associate_name = m.associate_name
+            ON CONFLICT (associate_name) DO NOTHING
+            RETURNING associate_name
+        """, members, fetch=True)
+        metrics.record_rows(table='associate_team_map', inserted=len(inserted))
+        logger.info(f"Team map synced: {len(teams)} teams, {len(inserted)} new associate assignments")
+
+
 def update_client_associate_data():
-    """Update client and associate data in the database."""
-    conn = get_connection()
-
-    sql_queries = [
-        {
-            "description": "Insert catalog associates",
-            "query": """
-                INSERT INTO dim_catalog_associates (associate_name)
-                SELECT DISTINCT COALESCE(associate_name, 'Unassigned') AS associate_name
-                FROM (
-                    SELECT catalogue_associate AS associate_name FROM work_completed
-                    UNION ALL
-                    SELECT assignee_s FROM work_completed
-                    UNION ALL
-                    SELECT assignee_c FROM work_completed
-                    UNION ALL
-                    SELECT assignee_u FROM work_completed
-                    UNION ALL
-                    SELECT assignee_qc FROM work_completed
-                    UNION ALL
-                    SELECT catalogue_associate FROM work_in_progress
-                    UNION ALL
-                    SELECT assignee_s FROM work_in_progress
-                    UNION ALL
-                    SELECT assignee_c FROM work_in_progress
-                    UNION ALL
-                    SELECT assignee_u FROM work_in_progress
-                    UNION ALL
-                    SELECT assignee_qc FROM work_in_progress
-                ) AS combined_associates
-                WHERE associate_name IS NULL OR associate_name ~ '[A-Za-z]'
-                ON CONFLICT (associate_name) DO NOTHING;
-            """
-        },
-        {
-            "description": "Insert distinct clients",
-            "query": """
-                INSERT INTO dim_clients (client_name)
-                SELECT DISTINCT client
-                FROM (
-                    SELECT client FROM work_in_progress
-                    UNION
-                    SELECT client FROM work_completed
-                ) AS combined_clients
-                ON CONFLICT (client_name) DO NOTHING;
-            """
-        },
-        {
-            "description": "Insert team",
-            "query": """
-                INSERT INTO dim_teams (team_name, team_lead)
-                VALUES ('vipani team A', 'Arun')
-                ON CONFLICT (team_name) DO NOTHING;
-            """
-        },
-        {
-            "description": "Map associates to team",
-            "query": """
-                INSERT INTO associate_team_map (associate_name, team_name)
-                VALUES 
-                    ('Reshma', 'vipani team A'),
-                    ('Vyshnavi', 'vipani team A'),
-                    ('Dinesh', 'vipani team A'),
-                    ('Akshay', 'vipani team A'),
-                    ('Arun', 'vipani team A'),
-                    ('Naresh', 'vipani team A')
-                ON CONFLICT (associate_name) DO NOTHING;
-            """
-        }
-    ]
-
-    try:
-        with conn:
-            with conn.cursor() as cur:
-                for item in sql_queries:
-                    logger.info(f"Executing: {item['description']}...")
-                    cur.execute(item["query"])
-                    logger.info(f"{item['description']} completed.")
-        logger.info("All metadata insertions completed successfully.")
-
-    except Exception as e:
-        logger.exception("Error during metadata update.")
-        conn.rollback()
-
-    finally:
-        conn.close()
-        logger.info("Database connection closed.")
+    """Adds the clients and associates introduced since the last sync, then syncs the team map."""
+    with pooled_connection() as conn:
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    last_loaded_at = get_etl_metadata(cur, source_table=DIMENSION_WATERMARK)
+                    logger.info(f"Syncing dimensions from rows changed since {last_loaded_at}...")
+
+                    known = load_known_names(cur)
+                    found = fetch_delta_names(cur, last_loaded_at)
+                    new_names = {kind: found[kind] - known.get(kind, set()) for kind in DIMENSIONS}
+                    metrics.record_rows(skipped=sum(len(found[kind]) - len(new_names[kind]) for kind in DIMENSIONS))
+
+                    insert_new_names(cur, new_names)
+                    sync_team_map(cur)
+                    update_etl_metadata(cur, source_table=DIMENSION_WATERMARK)
+
+            # Only committed names may short-circuit later syncs
+            remember_names(new_names)
+            logger.info("All metadata insertions completed successfully.")
+
+        except Exception as e:
+            logger.exception("Error during metadata update.")
+            conn.rollback()
+            raise
@@ -1,112 +1,551 @@
 from psycopg2.extras import execute_values
 from src.utils.logger_config import AppLogger
 import pandas as pd
+import io
+import contextvars
 import time
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from dotenv import load_dotenv
-from src.utils.db_connection import get_connection
+from src.utils.db_connection import DB_POOL_MAX, pooled_connection, is_partitioned
+from src.utils import metrics
+from src.utils.snapshots import write_snapshot
+from src.utils.sharding import PARALLEL_MIN_ROWS, PARALLEL_WORKERS, discard_pool, process_pool, split_by_ticket, ticket_shards
+from src.utils.tracker_schema import apply_tracker_schema
+from src.utils.change_detection import (
+    CHANGE_DETECTION_ENABLED,
+    load_fingerprints,
+    select_changed_rows,
+    store_fingerprints,
+    store_staged_fingerprints,
+    record_source_state
+)
 
 logger = AppLogger().get_logger()
 
 load_dotenv()
+
+# 'transition' stages each batch once and moves tickets between the work tables in one statement;
+# 'copy' streams rows through COPY into a staging table per table; 'values' is the execute_values fallback
+UPSERT_MODE = os.getenv("UPSERT_MODE", "transition").lower()
+
+# Tickets with this status belong in work_completed, every other one in work_in_progress
+COMPLETED_STATUS = 'Completed'
+
+# Unlogged table the parallel load connections COPY into (suffixed with the process ID); it is dropped after the merge
+PARALLEL_STAGING_TABLE = 'stg_parallel_tickets'
+
+
 def chunked(iterable, size):
     """Yield successive n-sized chunks from iterable."""
     for i in range(0, len(iterable), size):
         yield iterable[i:i + size]
 
 
-def upsert_with_filter(conn, df, table_name, conflict_key='ticket_id', batch_size=1500):
-    """UPSERTs data into the specified table with conflict resolution."""
-    if df.empty:
-        logger.info(f"No rows to UPSERT into '{table_name}'")
-        return 0
+def to_db_rows(df):
+    """Converts the DataFrame into parameter tuples, mapping datetime64 columns to dates and nulls to None."""
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            series = series.dt.date
+        columns.append(series.astype(object).where(series.notna(), None).tolist())
+    return list(zip(*columns))
 
-    columns = df.columns.tolist()
+
+def change_condition(target, incoming):
+    """Rows are rewritten only when the ticket status, or a stage's status together with its closing date, changed."""
+    return f"""
+                {target}.ticket_status IS DISTINCT FROM {incoming}.ticket_status OR
+                ({target}.status_s IS DISTINCT FROM {incoming}.status_s AND {target}.closed_dt_s IS DISTINCT FROM {incoming}.closed_dt_s) OR
+                ({target}.status_c IS DISTINCT FROM {incoming}.status_c AND {target}.closed_dt_c IS DISTINCT FROM {incoming}.closed_dt_c) OR
+                ({target}.status_qc IS DISTINCT FROM {incoming}.status_qc AND {target}.closed_date_qc IS DISTINCT FROM {incoming}.closed_date_qc) OR
+                ({target}.status_u IS DISTINCT FROM {incoming}.status_u AND {target}.uploaded_date_u IS DISTINCT FROM {incoming}.uploaded_date_u)
+    """
+
+
+def build_upsert_statement(table_name, columns, conflict_key, source_sql):
+    """Builds the conditional INSERT ... ON CONFLICT for a row source, returning whether each written row was inserted."""
     update_stmt = ", ".join([f"{col} = EXCLUDED.{col}" for col in columns if col != conflict_key])
     update_stmt += ", insert_date = NOW()"
 
-    sql = f"""
-        INSERT INTO {table_name} ({", ".join(columns)})
-        VALUES %s
-        ON CONFLICT ({conflict_key})
-        DO UPDATE SET {update_stmt}
-        WHERE
-            {table_name}.ticket_status IS DISTINCT FROM EXCLUDED.ticket_status OR
-            ({table_name}.status_s IS DISTINCT FROM EXCLUDED.status_s AND {table_name}.closed_dt_s IS DISTINCT FROM EXCLUDED.closed_dt_s) OR
-            ({table_name}.status_c IS DISTINCT FROM EXCLUDED.status_c AND {table_name}.closed_dt_c IS DISTINCT FROM EXCLUDED.closed_dt_c) OR
-            ({table_name}.status_qc IS DISTINCT FROM EXCLUDED.status_qc AND {table_name}.closed_date_qc IS DISTINCT FROM EXCLUDED.closed_date_qc) OR
-            ({table_name}.status_u IS DISTINCT FROM EXCLUDED.status_u AND {table_name}.uploaded_date_u IS DISTINCT FROM EXCLUDED.uploaded_date_u)
-        ;
+    return f"""
+            INSERT INTO {table_name} ({", ".join(columns)})
+            {source_sql}
+            ON CONFLICT ({conflict_key})
+            DO UPDATE SET {update_stmt}
+            WHERE {change_condition(table_name, 'EXCLUDED')}
+            RETURNING (xmax = 0) AS inserted
     """
 
-    total_rows = 0
+
+def build_upsert_sql(table_name, columns, conflict_key, source_sql):
+    """Builds the conditional UPSERT statement for the given row source, returning inserted/updated counts."""
+    return f"""
+        WITH merged AS (
+            {build_upsert_statement(table_name, columns, conflict_key, source_sql)}
+        )
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+        FROM merged;
+    """
+
+
+def build_partitioned_merge_ctes(table_name, columns, conflict_key, staging_table, prefix='', source_filter='TRUE'):
+    """Builds the <prefix>updated / <prefix>inserted CTEs merging the staged rows matching source_filter into a
+    table partitioned on insert_date: changed rows are updated (moving to the current partition), missing ones inserted."""
+    update_stmt = ", ".join([f"{col} = s.{col}" for col in columns if col != conflict_key])
+    update_stmt += ", insert_date = NOW()"
+
+    return f"""
+        {prefix}updated AS (
+            UPDATE {table_name} t
+            SET {update_stmt}
+            FROM {staging_table} s
+            WHERE t.{conflict_key} = s.{conflict_key}
+              AND ({source_filter})
+              AND ({change_condition('t', 's')})
+            RETURNING 1
+        ),
+        {prefix}inserted AS (
+            INSERT INTO {table_name} ({", ".join(columns)})
+            SELECT {", ".join(f"s.{col}" for col in columns)}
+            FROM {staging_table} s
+            WHERE ({source_filter})
+              AND NOT EXISTS (SELECT 1 FROM {table_name} t WHERE t.{conflict_key} = s.{conflict_key})
+            RETURNING 1
+        )
+    """
+
+
+def build_partitioned_upsert_sql(table_name, columns, conflict_key, staging_table):
+    """Builds the same conditional UPSERT for a table partitioned on insert_date, where ON CONFLICT cannot
+    target conflict_key."""
+    return f"""
+        WITH {build_partitioned_merge_ctes(table_name, columns, conflict_key, staging_table)}
+        SELECT (SELECT COUNT(*) FROM inserted), (SELECT COUNT(*) FROM updated);
+    """
+
+
+def build_transition_sql(columns, staging_table, partitioned=False):
+    """Builds one statement that merges a staged batch into both work tables and deletes its completed tickets
+    from work_in_progress. Returns (wip inserted, wip updated, completed inserted, completed updated, deleted).
+
+    All parts read the snapshot taken before the statement, and the two upserts touch disjoint tickets.
+    """
+    is_completed = f"s.ticket_status = '{COMPLETED_STATUS}'"
+    is_in_progress = f"s.ticket_status IS DISTINCT FROM '{COMPLETED_STATUS}'"
+
+    if partitioned:
+        merges = ",".join([
+            build_partitioned_merge_ctes('work_in_progress', columns, 'ticket_id', staging_table, 'wip_', is_in_progress),
+            build_partitioned_merge_ctes('work_completed', columns, 'ticket_id', staging_table, 'done_', is_completed),
+        ])
+        counts = """
+            (SELECT COUNT(*) FROM wip_inserted), (SELECT COUNT(*) FROM wip_updated),
+            (SELECT COUNT(*) FROM done_inserted), (SELECT COUNT(*) FROM done_updated),"""
+    else:
+        select = f"SELECT {', '.join(f's.{col}' for col in columns)} FROM {staging_table} s WHERE"
+        merges = f"""
+        wip AS (
+            {build_upsert_statement('work_in_progress', columns, 'ticket_id', f"{select} {is_in_progress}")}
+        ),
+        done AS (
+            {build_upsert_statement('work_completed', columns, 'ticket_id', f"{select} {is_completed}")}
+        )"""
+        counts = """
+            (SELECT COUNT(*) FILTER (WHERE inserted) FROM wip), (SELECT COUNT(*) FILTER (WHERE NOT inserted) FROM wip),
+            (SELECT COUNT(*) FILTER (WHERE inserted) FROM done), (SELECT COUNT(*) FILTER (WHERE NOT inserted) FROM done),"""
+
+    return f"""
+        WITH {merges},
+        moved AS (
+            DELETE FROM work_in_progress w
+            USING {staging_table} s
+            WHERE w.ticket_id = s.ticket_id AND {is_completed}
+            RETURNING 1
+        )
+        SELECT {counts}
+            (SELECT COUNT(*) FROM moved);
+    """
+
+
+def copy_to_staging(cur, df, table_name, staging_table=None):
+    """Streams the DataFrame into a transaction-scoped staging table shaped like table_name via COPY."""
+    staging_table = staging_table or f"stg_{table_name}"
+    columns = df.columns.tolist()
+
+    cur.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS {staging_table} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP;
+        TRUNCATE {staging_table};
+    """)
+
+    # Unquoted empty fields are read back as NULL by COPY ... CSV
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {staging_table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    logger.debug(f"Copied {len(df)} rows into staging table '{staging_table}'")
+
+    return staging_table
+
+
+def upsert_with_filter(conn, df, table_name, conflict_key='ticket_id', batch_size=1500, mode=None):
+    """UPSERTs data into the specified table with conflict resolution and returns inserted/updated/unchanged counts."""
+    counts = {'staged': len(df), 'inserted': 0, 'updated': 0, 'unchanged': 0}
+    if df.empty:
+        logger.info(f"No rows to UPSERT into '{table_name}'")
+        return counts
+
+    mode = (mode or UPSERT_MODE).lower()
+    columns = df.columns.tolist()
+
     try:
         with conn.cursor() as cur:
-            for batch in chunked(list(df.to_records(index=False)), batch_size):
-                execute_values(cur, sql, batch)
-                total_rows += len(batch)
-                logger.debug(f"Upserted batch of {len(batch)} rows into '{table_name}'")
-        return total_rows
+            if is_partitioned(cur, table_name):
+                # Without a unique index on conflict_key, concurrent merges must not interleave
+                cur.execute(f"LOCK TABLE {table_name} IN SHARE ROW EXCLUSIVE MODE")
+                staging_table = copy_to_staging(cur, df, table_name)
+                cur.execute(build_partitioned_upsert_sql(table_name, columns, conflict_key, staging_table))
+                inserted, updated = cur.fetchone()
+                counts['inserted'] += inserted
+                counts['updated'] += updated
+            elif mode in ('copy', 'transition'):
+                staging_table = copy_to_staging(cur, df, table_name)
+                sql = build_upsert_sql(
+                    table_name, columns, conflict_key,
+                    f"SELECT {', '.join(columns)} FROM {staging_table}"
+                )
+                cur.execute(sql)
+                inserted, updated = cur.fetchone()
+                counts['inserted'] += inserted
+                counts['updated'] += updated
+            else:
+                sql = build_upsert_sql(table_name, columns, conflict_key, "VALUES %s")
+                for batch in chunked(to_db_rows(df), batch_size):
+                    for inserted, updated in execute_values(cur, sql, batch, fetch=True):
+                        counts['inserted'] += inserted
+                        counts['updated'] += updated
+                    logger.debug(f"Upserted batch of {len(batch)} rows into '{table_name}'")
+
+        counts['unchanged'] = counts['staged'] - counts['inserted'] - counts['updated']
+        metrics.record_rows(table=table_name, inserted=counts['inserted'], updated=counts['updated'], skipped=counts['unchanged'])
+        return counts
     except Exception as e:
         logger.exception(f"Failed during UPSERT into '{table_name}'")
         raise
 
 
-def uploader(df: pd.DataFrame):
-    """Processes the DataFrame and uploads it to the database."""
+def transition_tickets(conn, df):
+    """Stages the batch once and, in a single statement, upserts in-progress and completed tickets into their
+    work tables and deletes the completed ones from work_in_progress. Returns per-table counts."""
+    counts = {
+        'work_in_progress': {'staged': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0},
+        'work_completed': {'staged': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0},
+    }
     if df.empty:
-        logger.warning("DataFrame is empty. No rows to process.")
-        return
+        logger.info("No rows to transition")
+        return counts
 
-    start_time = time.time()
-    logger.info("Starting data sync process...")
+    completed = int((df['ticket_status'] == COMPLETED_STATUS).sum())
 
-    # Clean ticket_id
+    try:
+        with conn.cursor() as cur:
+            partitioned = is_partitioned(cur, 'work_in_progress') or is_partitioned(cur, 'work_completed')
+            if partitioned:
+                # Without a unique index on ticket_id, concurrent merges must not interleave
+                cur.execute("LOCK TABLE work_in_progress, work_completed IN SHARE ROW EXCLUSIVE MODE")
+
+            staging_table = copy_to_staging(cur, df, 'work_in_progress', staging_table='stg_tickets')
+            return merge_staged_tickets(cur, staging_table, df.columns.tolist(), len(df), completed, partitioned)
+    except Exception as e:
+        logger.exception("Failed during ticket transition into the work tables")
+        raise
+
+
+def merge_staged_tickets(cur, staging_table, columns, staged, completed, partitioned):
+    """Runs the transition statement over a filled staging table and records the per-table counts."""
+    counts = {
+        'work_in_progress': {'staged': staged - completed, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0},
+        'work_completed': {'staged': completed, 'inserted': 0, 'updated': 0, 'unchanged': 0},
+    }
+    cur.execute(build_transition_sql(columns, staging_table, partitioned))
+    (counts['work_in_progress']['inserted'], counts['work_in_progress']['updated'],
+     counts['work_completed']['inserted'], counts['work_completed']['updated'],
+     counts['work_in_progress']['deleted']) = cur.fetchone()
+
+    for table, table_counts in counts.items():
+        table_counts['unchanged'] = table_counts['staged'] - table_counts['inserted'] - table_counts['updated']
+        metrics.record_rows(
+            table=table, inserted=table_counts['inserted'], updated=table_counts['updated'],
+            skipped=table_counts['unchanged'], deleted=table_counts.get('deleted', 0)
+        )
+    return counts
+
+
+def prepare_upload_frame(df):
+    """Cleans ticket_id and drops blank or duplicate tickets before upload."""
     df['ticket_id'] = df['ticket_id'].astype(str).str.strip()
     df = df[df['ticket_id'].notnull() & (df['ticket_id'] != '')].copy()
     df = df.drop_duplicates(subset=['ticket_id'], keep='last')
     df = df.replace('', None)
     logger.debug(f"Cleaned DataFrame, remaining rows: {len(df)}")
+    return df
+
+
+def write_split_snapshots(df_in_progress, df_completed, part=0):
+    """Queues the forwarded in-progress/completed rows as Parquet snapshots of this run (one part per streamed chunk)."""
+    write_snapshot(df_in_progress, 'work_in_progress', part=part)
+    write_snapshot(df_completed, 'work_completed', part=part)
+
+
+def sync_work_tables(conn, df_in_progress, df_completed):
+    """Upserts each work table on its own, then deletes the completed tickets from work_in_progress by ID."""
+    # UPSERT in-progress
+    if not df_in_progress.empty:
+        counts = upsert_with_filter(conn, df_in_progress, 'work_in_progress', 'ticket_id')
+        logger.info(f"Upserted into 'work_in_progress': {counts}")
+
+    # UPSERT completed
+    if not df_completed.empty:
+        counts = upsert_with_filter(conn, df_completed, 'work_completed', 'ticket_id')
+        logger.info(f"Upserted into 'work_completed': {counts}")
+
+        # DELETE completed from work_in_progress
+        ticket_ids = tuple(df_completed['ticket_id'].tolist())
+        if ticket_ids:
+            delete_query = "DELETE FROM work_in_progress WHERE ticket_id IN %s;"
+            with conn.cursor() as cur:
+                for chunk in chunked(ticket_ids, 1500):
+                    cur.execute(delete_query, (tuple(chunk),))
+                    metrics.record_rows(table='work_in_progress', deleted=cur.rowcount)
+                    logger.debug(f"Deleted batch of {len(chunk)} tickets from 'work_in_progress'")
+            logger.info(f"Deleted {len(ticket_ids)} completed tickets from 'work_in_progress'")
+
+
+def sync_frame(conn, df, known_fingerprints=None):
+    """Upserts one cleaned frame into work_in_progress/work_completed inside the caller's transaction."""
+    metrics.record_rows(read=len(df))
+
+    # Forward only new or changed tickets
+    if known_fingerprints is not None:
+        received = len(df)
+        df, hashes = select_changed_rows(df, known_fingerprints)
+        metrics.record_rows(skipped=received - len(df))
+
+    # Split into in-progress and completed
+    df_in_progress = df[df['ticket_status'] != COMPLETED_STATUS].copy()
+    df_completed = df[df['ticket_status'] == COMPLETED_STATUS].copy()
+    logger.info(f"Rows: In-progress = {len(df_in_progress)}, Completed = {len(df_completed)}")
+
+    if UPSERT_MODE == 'transition':
+        counts = transition_tickets(conn, df)
+        logger.info(f"Transitioned tickets: {counts}")
+    else:
+        sync_work_tables(conn, df_in_progress, df_completed)
+
+    # Fingerprints commit together with the rows they describe
+    if known_fingerprints is not None:
+        with conn.cursor() as cur:
+            store_fingerprints(cur, df['ticket_id'], hashes)
+
+    return df_in_progress, df_completed
+
+
+def load_known_fingerprints(conn):
+    """Returns the stored fingerprints, or None when change detection is disabled."""
+    if not CHANGE_DETECTION_ENABLED:
+        return None
+    with conn.cursor() as cur:
+        return load_fingerprints(cur)
+
+
+def record_source_files(conn, source_files):
+    """Marks the Drive files behind this load as loaded, once their rows are in the same transaction."""
+    if not CHANGE_DETECTION_ENABLED:
+        return
+    with conn.cursor() as cur:
+        for file_id, file_state in source_files.items():
+            record_source_state(cur, file_id, file_state)
+
+
+def uploader(df: pd.DataFrame):
+    """Processes the DataFrame and uploads it to the database."""
+    if df.empty:
+        logger.warning("DataFrame is empty. No rows to process.")
+        return
+
+    if PARALLEL_WORKERS > 1 and len(df) >= PARALLEL_MIN_ROWS:
+        if UPSERT_MODE == 'transition':
+            return parallel_uploader(df, PARALLEL_WORKERS)
+        logger.warning(f"Parallel load needs UPSERT_MODE=transition (got '{UPSERT_MODE}'); loading over one connection")
+
+    start_time = time.time()
+    logger.info(f"Starting data sync process (upsert mode: {UPSERT_MODE})...")
+    source_files = df.attrs.get('source_files', {})
+
+    df = prepare_upload_frame(df)
+    write_snapshot(df, 'tracker', fingerprints=True)
 
-    csv_path = os.getenv("CSV_PATH")
-    os.makedirs(csv_path, exist_ok=True)
-        
-    conn = get_connection()
     try:
-        with conn:
-            # Split into in-progress and completed
-            df_in_progress = df[df['ticket_status'] != 'Completed'].copy()
-            df_completed = df[df['ticket_status'] == 'Completed'].copy()
-            logger.info(f"Rows: In-progress = {len(df_in_progress)}, Completed = {len(df_completed)}")
-
-            df_in_progress.to_csv(os.path.join(csv_path, 'work_in_progress.csv'), index=False)
-            df_completed.to_csv(os.path.join(csv_path, 'work_completed.csv'), index=False)
-
-            # UPSERT in-progress
-            if not df_in_progress.empty:
-                rows_upserted = upsert_with_filter(conn, df_in_progress, 'work_in_progress', 'ticket_id')
-                logger.info(f"Upserted {rows_upserted} rows into 'work_in_progress'")
-
-            # UPSERT completed
-            if not df_completed.empty:
-                rows_upserted = upsert_with_filter(conn, df_completed, 'work_completed', 'ticket_id')
-                logger.info(f"Upserted {rows_upserted} rows into 'work_completed'")
-
-                # DELETE completed from work_in_progress
-                ticket_ids = tuple(df_completed['ticket_id'].tolist())
-                if ticket_ids:
-                    delete_query = "DELETE FROM work_in_progress WHERE ticket_id IN %s;"
-                    with conn.cursor() as cur:
-                        for chunk in chunked(ticket_ids, 1500):
-                            cur.execute(delete_query, (tuple(chunk),))
-                            logger.debug(f"Deleted batch of {len(chunk)} tickets from 'work_in_progress'")
-                    logger.info(f"Deleted {len(ticket_ids)} completed tickets from 'work_in_progress'")
+        with pooled_connection() as conn:
+            with conn:
+                df_in_progress, df_completed = sync_frame(conn, df, load_known_fingerprints(conn))
+                write_split_snapshots(df_in_progress, df_completed)
+                record_source_files(conn, source_files)
 
         elapsed = round(time.time() - start_time, 2)
         logger.info(f"Full sync completed in {elapsed} seconds.")
 
     except Exception as e:
         logger.exception("Sync process failed")
+        raise
+
+
+def prepare_shard(df, known_fingerprints=None):
+    """Cleans one ticket_id shard and renders its new or changed tickets, with their fingerprints, as COPY CSV
+    (runs in a worker process). Returns the cleaned shard, the index of the forwarded rows and the CSV text."""
+    df = prepare_upload_frame(df)
+    forwarded = df
+    if known_fingerprints is not None:
+        forwarded, hashes = select_changed_rows(df, known_fingerprints)
+        forwarded = forwarded.assign(row_hash=hashes)
+
+    buffer = io.StringIO()
+    forwarded.to_csv(buffer, index=False, header=False)
+    return df, forwarded.index, buffer.getvalue()
+
+
+def copy_shard(staging_table, columns, csv_text):
+    """COPYs one rendered shard into the shared staging table over its own pooled connection."""
+    with pooled_connection() as conn:
+        with conn:
+            with conn.cursor() as cur:
+                cur.copy_expert(f"COPY {staging_table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", io.StringIO(csv_text))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Copied a shard of {csv_text.count(chr(10))} rows into '{staging_table}'")
+
+
+def parallel_uploader(df, workers):
+    """uploader() over ticket_id shards. Worker processes clean, fingerprint and render the shards, which are
+    COPYed over several pooled connections into an unlogged staging table as they come in. One transaction
+    then merges the staging table into the work tables, so the work tables change all at once or not at all."""
+    start_time = time.time()
+    source_files = df.attrs.get('source_files', {})
+    # Loads wait for a free pooled connection when concurrent steps hold some; one is always left for them
+    connections = max(1, min(workers, DB_POOL_MAX - 1))
+    staging_table = f"{PARALLEL_STAGING_TABLE}_{os.getpid()}"
+    logger.info(f"Starting parallel data sync process ({workers} workers, {connections} load connections)...")
+
+    try:
+        with pooled_connection() as conn:
+            with conn:
+                known_fingerprints = load_known_fingerprints(conn)
+                with conn.cursor() as cur:
+                    cur.execute(f"""
+                        DROP TABLE IF EXISTS {staging_table};
+                        CREATE UNLOGGED TABLE {staging_table} (LIKE work_in_progress INCLUDING DEFAULTS, row_hash BIGINT);
+                    """)
+
+        # Stored fingerprints are sharded like the tickets, so each worker only receives its own
+        shards = split_by_ticket(df, workers)
+        if known_fingerprints is not None:
+            codes = ticket_shards(known_fingerprints.index, workers)
+            known_shards = [known_fingerprints[codes == shard] for shard in range(workers)]
+        else:
+            known_shards = [None] * workers
+        columns = df.columns.tolist()
+        copy_columns = columns + (['row_hash'] if known_fingerprints is not None else [])
+
+        cleaned, forwarded_index = [], []
+        pool = process_pool(workers)
+        with ThreadPoolExecutor(max_workers=connections, thread_name_prefix='stage-load') as loads:
+            prepared = [pool.submit(prepare_shard, shard, known) for shard, known in zip(shards, known_shards)]
+            copies = []
+            for future in as_completed(prepared):
+                shard, index, csv_text = future.result()
+                cleaned.append(shard)
+                forwarded_index.append(index)
+                copies.append(loads.submit(contextvars.copy_context().run, copy_shard, staging_table, copy_columns, csv_text))
+            for copy in copies:
+                copy.result()
+
+        # Shards come back in completion order with their own categories
+        df = apply_tracker_schema(pd.concat(cleaned).sort_index())
+        df_forwarded = df.loc[df.index.isin(forwarded_index[0].append(forwarded_index[1:]))]
+        write_snapshot(df, 'tracker', fingerprints=True)
+        metrics.record_rows(read=len(df), skipped=len(df) - len(df_forwarded))
+
+        df_in_progress = df_forwarded[df_forwarded['ticket_status'] != COMPLETED_STATUS]
+        df_completed = df_forwarded[df_forwarded['ticket_status'] == COMPLETED_STATUS]
+        logger.info(f"Rows: In-progress = {len(df_in_progress)}, Completed = {len(df_completed)}")
+
+        with pooled_connection() as conn:
+            with conn:
+                with conn.cursor() as cur:
+                    partitioned = is_partitioned(cur, 'work_in_progress') or is_partitioned(cur, 'work_completed')
+                    if partitioned:
+                        # Without a unique index on ticket_id, concurrent merges must not interleave
+                        cur.execute("LOCK TABLE work_in_progress, work_completed IN SHARE ROW EXCLUSIVE MODE")
+                    counts = merge_staged_tickets(cur, staging_table, columns, len(df_forwarded), len(df_completed), partitioned)
+                    logger.info(f"Transitioned tickets: {counts}")
+                    if known_fingerprints is not None:
+                        store_staged_fingerprints(cur, staging_table)
+                record_source_files(conn, source_files)
+
+        write_split_snapshots(df_in_progress, df_completed)
+        elapsed = round(time.time() - start_time, 2)
+        logger.info(f"Parallel sync of {len(df)} rows over {len(shards)} shards completed in {elapsed} seconds.")
+
+    except BrokenProcessPool:
+        logger.exception("A shard worker process died; the parallel sync failed")
+        discard_pool(workers)
+        raise
+
+    except Exception as e:
+        logger.exception("Parallel sync process failed")
+        raise
+
     finally:
-        conn.close()
-        logger.info("Database connection closed.")
+        # A failing cleanup must not replace the error being raised
+        try:
+            with pooled_connection() as conn:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(f"DROP TABLE IF EXISTS {staging_table}")
+        except Exception as e:
+            logger.exception(f"Could not drop the staging table '{staging_table}'")
+
+
+def stream_uploader(chunks):
+    """Uploads an iterable of cleaned DataFrame chunks in a single transaction, one chunk in memory at a time."""
+    start_time = time.time()
+    logger.info(f"Starting streaming data sync process (upsert mode: {UPSERT_MODE})...")
+
+    total_rows = 0
+    try:
+        with pooled_connection() as conn:
+            with conn:
+                known_fingerprints = load_known_fingerprints(conn)
+                source_files = {}
+
+                for number, chunk in enumerate(chunks):
+                    source_files.update(chunk.attrs.get('source_files', {}))
+                    chunk = prepare_upload_frame(chunk)
+                    write_snapshot(chunk, 'tracker', part=number, fingerprints=True)
+                    df_in_progress, df_completed = sync_frame(conn, chunk, known_fingerprints)
+                    write_split_snapshots(df_in_progress, df_completed, part=number)
+                    total_rows += len(chunk)
+                    logger.debug(f"Synced chunk {number} ({len(chunk)} rows)")
+
+                if total_rows == 0:
+                    logger.warning("No chunks received. No rows to process.")
+                record_source_files(conn, source_files)
+
+        elapsed = round(time.time() - start_time, 2)
+        logger.info(f"Streaming sync of {total_rows} rows completed in {elapsed} seconds.")
+
+    except Exception as e:
+        logger.exception("Streaming sync process failed")
+        raise
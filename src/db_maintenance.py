@@ -0,0 +1,194 @@
+import os
+from dotenv import load_dotenv
+from src.utils.db_connection import pooled_connection, is_partitioned
+from src.utils.logger_config import AppLogger
+from src.utils import metrics
+
+logger = AppLogger().get_logger()
+
+load_dotenv()
+
+# A table is analyzed once this many rows changed since its last ANALYZE ...
+ANALYZE_MIN_CHANGED_ROWS = int(os.getenv("ANALYZE_MIN_CHANGED_ROWS", "1000"))
+
+# ... and the changed rows are at least this fraction of the table
+ANALYZE_CHANGED_FRACTION = float(os.getenv("ANALYZE_CHANGED_FRACTION", "0.05"))
+
+# Indexes on the join and filter columns of the delta scans, the dimension sync and the bucket sync
+SUPPORTING_INDEXES = [
+    ('idx_work_completed_insert_date', 'work_completed', ['insert_date']),
+    ('idx_work_in_progress_insert_date', 'work_in_progress', ['insert_date']),
+    ('idx_work_completed_client', 'work_completed', ['client']),
+    ('idx_work_in_progress_client', 'work_in_progress', ['client']),
+    ('idx_file_tracker_filename_status', 'file_tracker', ['filename', 'status']),
+    ('idx_fact_catalog_activity_vendor_name', 'fact_catalog_activity', ['vendor_name']),
+    ('idx_fact_catalog_activity_last_updated_at', 'fact_catalog_activity', ['last_updated_at']),
+    ('idx_fact_catalog_activity_closed_date', 'fact_catalog_activity', ['closed_date']),
+]
+
+# Tables loaded before the fact delta, analyzed so the delta and bucket sync plan on fresh statistics
+SOURCE_TABLES = [
+    'work_in_progress',
+    'work_completed',
+    'ticket_fingerprint',
+    'file_tracker',
+    'dim_clients',
+    'dim_catalog_associates',
+    'associate_team_map',
+]
+
+# Tables written by the fact delta and the KPI refresh, analyzed for the dashboards and the next run
+FACT_TABLES = [
+    'fact_catalog_activity',
+    'kpi_table_incremental',
+    'kpi_rollup_client_month',
+    'kpi_rollup_associate_week',
+    'kpi_rollup_team_month',
+    'kpi_rollup_fact_periods',
+]
+
+
+def index_state(cur, index_name):
+    """Returns None when the index does not exist, else whether it is valid (a failed CONCURRENTLY build is not)."""
+    cur.execute("""
+        SELECT i.indisvalid
+        FROM pg_index i
+        WHERE i.indexrelid = to_regclass(%s)
+    """, (index_name,))
+    row = cur.fetchone()
+    return None if row is None else row[0]
+
+
+def partitions_of(cur, table):
+    cur.execute("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        ORDER BY c.relname
+    """, (table,))
+    return [row[0] for row in cur.fetchall()]
+
+
+def build_index_concurrently(cur, index_name, table, columns):
+    """Builds one index without blocking writes, replacing an invalid leftover of an interrupted build."""
+    state = index_state(cur, index_name)
+    if state:
+        return False
+    if state is False:
+        logger.warning(f"Index {index_name} is invalid (interrupted build); rebuilding it")
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+
+    logger.info(f"Creating index {index_name} on {table} ({', '.join(columns)}) concurrently")
+    cur.execute(f"CREATE INDEX CONCURRENTLY {index_name} ON {table} ({', '.join(columns)})")
+    return True
+
+
+def ensure_partitioned_index(cur, index_name, table, columns):
+    """Partitioned parents cannot build CONCURRENTLY: the parent index is declared ON ONLY the parent,
+    each partition's index is built concurrently and attached, which makes the parent index valid."""
+    if index_state(cur, index_name):
+        return False
+
+    cur.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON ONLY {table} ({', '.join(columns)})")
+    for partition in partitions_of(cur, table):
+        partition_index = f"{index_name}{partition[len(table):]}"
+        build_index_concurrently(cur, partition_index, partition, columns)
+        cur.execute("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_inherits
+                WHERE inhrelid = to_regclass(%s) AND inhparent = to_regclass(%s)
+            )
+        """, (partition_index, index_name))
+        if not cur.fetchone()[0]:
+            cur.execute(f"ALTER INDEX {index_name} ATTACH PARTITION {partition_index}")
+    return True
+
+
+def ensure_indexes(indexes=None):
+    """Creates the supporting indexes that are missing, without blocking the tables they are built on.
+    Returns the names of the indexes created."""
+    created = []
+    try:
+        with pooled_connection() as conn:
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cur:
+                    for index_name, table, columns in indexes or SUPPORTING_INDEXES:
+                        if is_partitioned(cur, table):
+                            built = ensure_partitioned_index(cur, index_name, table, columns)
+                        else:
+                            built = build_index_concurrently(cur, index_name, table, columns)
+                        if built:
+                            created.append(index_name)
+            finally:
+                conn.autocommit = False
+
+        metrics.increment('indexes_created', len(created))
+        logger.info(f"Supporting indexes checked, created: {', '.join(created) or 'none'}")
+        return created
+
+    except Exception as e:
+        logger.exception("Failed to ensure supporting indexes")
+        raise
+
+
+def table_activity(cur, table):
+    """Rows changed since the last ANALYZE and the estimated row count, summed over partitions when partitioned."""
+    cur.execute("""
+        SELECT COALESCE(SUM(s.n_mod_since_analyze), 0), COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)
+        FROM pg_class c
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE c.oid = %s::regclass
+           OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)
+    """, (table, table))
+    changed, estimated_rows = cur.fetchone()
+    return int(changed), int(estimated_rows)
+
+
+def needs_analyze(changed, estimated_rows, min_changed=None, changed_fraction=None):
+    min_changed = ANALYZE_MIN_CHANGED_ROWS if min_changed is None else min_changed
+    changed_fraction = ANALYZE_CHANGED_FRACTION if changed_fraction is None else changed_fraction
+    return changed > 0 and changed >= min_changed and changed >= changed_fraction * estimated_rows
+
+
+def analyze_tables(tables):
+    """Runs ANALYZE on the tables whose changed rows cross the thresholds.
+    Changes are what the run's writers recorded for the table, or the server's count since the last ANALYZE
+    when higher (e.g. steps replayed from a checkpoint, or writes by another process); the server's count
+    alone can lag recent writes by several seconds. Returns the tables analyzed."""
+    analyzed = []
+    try:
+        with pooled_connection() as conn:
+            with conn:
+                with conn.cursor() as cur:
+                    for table in tables:
+                        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+                        if not cur.fetchone()[0]:
+                            continue
+
+                        server_changed, estimated_rows = table_activity(cur, table)
+                        changed = max(server_changed, metrics.changed_rows(table))
+                        if not needs_analyze(changed, estimated_rows):
+                            logger.debug(f"Skipping ANALYZE of {table}: {changed} changed rows of ~{estimated_rows}")
+                            continue
+
+                        logger.info(f"Analyzing {table}: {changed} changed rows of ~{estimated_rows}")
+                        cur.execute(f"ANALYZE {table}")
+                        analyzed.append(table)
+
+        metrics.increment('tables_analyzed', len(analyzed))
+        return analyzed
+
+    except Exception as e:
+        logger.exception("Failed to analyze tables")
+        raise
+
+
+def analyze_source_tables():
+    return analyze_tables(SOURCE_TABLES)
+
+
+def analyze_fact_tables():
+    return analyze_tables(FACT_TABLES)
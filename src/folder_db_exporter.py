@@ -1,51 +1,75 @@
 import psycopg2
-from psycopg2.extras import execute_batch
+from psycopg2.extras import execute_values
 import pandas as pd
-from src.utils.db_connection import get_connection
+from src.db_exporter import UPSERT_MODE, copy_to_staging, to_db_rows
+from src.folder_details_extraction import commit_delta, save_delta_manifest
+from src.utils.db_connection import pooled_connection
 from src.utils.logger_config import AppLogger  # adjust if path differs
+from src.utils import metrics
 
 logger = AppLogger().get_logger()
 
-def upload(df: pd.DataFrame):
+# Rows per execute_values statement in the 'values' fallback
+VALUES_PAGE_SIZE = 5000
+
+
+def build_merge_sql(columns, source_sql):
+    """Builds the file_tracker merge: rows are rewritten only when their status changed. Returns inserted/updated counts."""
+    update_stmt = ", ".join([f"{col} = EXCLUDED.{col}" for col in columns if col != 'file_id'])
+
+    return f"""
+        WITH merged AS (
+            INSERT INTO file_tracker ({", ".join(columns)})
+            {source_sql}
+            ON CONFLICT (file_id)
+            DO UPDATE SET {update_stmt}
+            WHERE EXCLUDED.status IS DISTINCT FROM file_tracker.status
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+        FROM merged;
+    """
+
+
+def upload(df: pd.DataFrame, mode=None):
     """
     Uploads a DataFrame to the file_tracker table in the database.
+    Returns the staged/inserted/updated/unchanged row counts.
+    The bucket watermark moves in the same transaction, and the seen-object manifest is saved after it.
     """
+    counts = {'staged': len(df), 'inserted': 0, 'updated': 0, 'unchanged': 0}
     if df.empty:
         logger.warning("Provided DataFrame is empty. No records to UPSERT.")
-        return
+        save_delta_manifest(df)
+        return counts
 
+    # One statement cannot touch a row twice; the last listed object wins, as with per-row upserts
+    df = df.drop_duplicates(subset=['file_id'], keep='last')
+    counts['staged'] = len(df)
     columns = df.columns.tolist()
-    placeholders = ", ".join(["%s"] * len(columns))
-
-    update_stmt = ", ".join([
-        f"{col} = EXCLUDED.{col}" for col in columns if col != 'file_id'
-    ])
-
-    sql = f"""
-        INSERT INTO file_tracker ({", ".join(columns)})
-        VALUES ({placeholders})
-        ON CONFLICT (file_id)
-        DO UPDATE SET {update_stmt}
-        WHERE 
-            (
-                EXCLUDED.status IS DISTINCT FROM file_tracker.status
-            );
-    """
+    mode = (mode or UPSERT_MODE).lower()
 
-    # Convert DataFrame to list of tuples
-    data = [tuple(row[col] for col in columns) for _, row in df.iterrows()]
+    try:
+        with pooled_connection() as conn:
+            with conn:
+                with conn.cursor() as cur:
+                    if mode == 'values':
+                        sql = build_merge_sql(columns, "VALUES %s")
+                        for inserted, updated in execute_values(cur, sql, to_db_rows(df), page_size=VALUES_PAGE_SIZE, fetch=True):
+                            counts['inserted'] += inserted
+                            counts['updated'] += updated
+                    else:
+                        staging_table = copy_to_staging(cur, df, 'file_tracker')
+                        cur.execute(build_merge_sql(columns, f"SELECT {', '.join(columns)} FROM {staging_table}"))
+                        counts['inserted'], counts['updated'] = cur.fetchone()
+                    commit_delta(cur, df)
+        save_delta_manifest(df)
 
-    conn = get_connection()
+        counts['unchanged'] = counts['staged'] - counts['inserted'] - counts['updated']
+        metrics.record_rows(table='file_tracker', read=counts['staged'], inserted=counts['inserted'], updated=counts['updated'], skipped=counts['unchanged'])
+        logger.info(f"UPSERT completed successfully for folder data: {counts}")
+        return counts
 
-    try:
-        with conn:
-            with conn.cursor() as cur:
-                execute_batch(cur, sql, data)
-        logger.info(f"UPSERT completed successfully for folder data. Rows: {len(data)}")
-    
     except Exception as e:
         logger.exception("UPSERT failed for file_tracker table.")
-
-    finally:
-        conn.close()
-        logger.debug("Database connection closed after UPSERT.")
+        raise
@@ -1,6 +1,8 @@
 import os
 import re
+import json
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from google.cloud import storage
 from google.oauth2 import service_account
@@ -8,7 +10,8 @@ import psycopg2
 from dotenv import load_dotenv
 from src.utils.logger_config import AppLogger  # Adjust path
 from src.utils.etl_updater import get_etl_metadata, update_etl_metadata
-from src.utils.db_connection import get_connection
+from src.utils.db_connection import pooled_connection
+from src.utils import metrics
 
 logger = AppLogger().get_logger()
 load_dotenv()
@@ -17,6 +20,11 @@ load_dotenv()
 BUCKET_NAME = os.getenv('BUCKET_NAME')
 PREFIX = os.getenv('BUCKET_PATH')
 CREDENTIALS_PATH = os.getenv('BUCKET_CREDENTIALS_PATH')
+SCAN_WORKERS = int(os.getenv('GCS_SCAN_WORKERS', '8'))
+MANIFEST_PATH = os.getenv('GCS_MANIFEST_PATH', os.path.join('artifacts', 'gcs_manifest.json'))
+
+# Only the blob fields the scan uses are requested from the listing API
+BLOB_FIELDS = 'items(name,updated,timeCreated,generation),nextPageToken'
 
 # === GCS Setup ===
 try:
@@ -25,6 +33,7 @@ try:
     bucket = client.bucket(BUCKET_NAME)
     logger.info("GCS client initialized")
 except Exception as e:
+    bucket = None
     logger.exception("Failed to initialize GCS client")
 
 
@@ -56,68 +65,155 @@ def extract_info_from_filename(filename):
         return "unknown", "Backend", "Backend"
 
 
-# === Main Extraction Function ===
-def extract_delta_xlsx_metadata():
-    """Extracts metadata from XLSX files in GCS bucket."""
-    conn = get_connection()
+# === Seen-Object Manifest ===
+def load_manifest(path=MANIFEST_PATH):
+    """Loads the {blob name: generation} map of objects already extracted."""
+    if not path or not os.path.exists(path):
+        return {}
     try:
-        with conn.cursor() as cur:
-            last_loaded_at = get_etl_metadata(cur, source_table='file_tracker')
-
-            if last_loaded_at:
-                last_loaded_at = last_loaded_at.replace(tzinfo=timezone.utc)
-                
-            logger.info(f"Last loaded timestamp: {last_loaded_at}")
-
-        blobs = bucket.list_blobs(prefix=PREFIX)
-        data = []
-        latest_update = last_loaded_at
-
-        for blob in blobs:
-            if not blob.name.endswith('.xlsx'):
-                continue
-
-            if last_loaded_at and blob.updated <= last_loaded_at:
-                continue  # Skip already processed
-
-            file_name = blob.name.split('/')[-1]
-            base_name, person1, person2 = extract_info_from_filename(file_name)
-
-            mod_date = blob.updated.strftime('%Y-%m-%d %H:%M:%S')
-            create_date = blob.time_created.strftime('%Y-%m-%d %H:%M:%S')
-            status = blob.name.split('/')[-2].split('_')[0] if '/' in blob.name else 'Unknown'
-            file_id = f"{base_name}_{mod_date}"
-
-            data.append({
-                'file_id': file_id,
-                'filename': base_name,
-                'qc_done_by': person1,
-                'uploaded_by': person2,
-                'create_date': create_date,
-                'modified_date': mod_date,
-                'status': status
-            })
-
-            if latest_update is None or blob.updated > latest_update:
-                latest_update = blob.updated
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable GCS manifest at {path}: {e}")
+        return {}
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    """Atomically writes the seen-object manifest."""
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as fh:
+        json.dump(manifest, fh)
+    os.replace(tmp_path, path)
+
+
+# === Bucket Scan ===
+def list_shards(gcs_bucket, prefix):
+    """Lists the status sub-prefixes under prefix, plus the objects sitting directly in it."""
+    iterator = gcs_bucket.list_blobs(
+        prefix=prefix, delimiter='/',
+        fields=f"prefixes,{BLOB_FIELDS}"
+    )
+    root_blobs = list(iterator)
+    return sorted(iterator.prefixes), root_blobs
+
+
+def scan_shard(gcs_bucket, prefix):
+    """Lists every object under one sub-prefix, fetching only the projected fields."""
+    return list(gcs_bucket.list_blobs(prefix=prefix, fields=BLOB_FIELDS))
+
+
+def scan_bucket(gcs_bucket, prefix, workers=SCAN_WORKERS):
+    """Lists the bucket sharded by sub-prefix across a thread pool."""
+    if prefix and not prefix.endswith('/'):
+        prefix = f"{prefix}/"
+    shards, blobs = list_shards(gcs_bucket, prefix)
+    logger.debug(f"Scanning {len(shards)} prefixes with {workers} workers")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gcs-scan') as executor:
+        for shard_blobs in executor.map(lambda shard: scan_shard(gcs_bucket, shard), shards):
+            blobs.extend(shard_blobs)
+    return blobs
+
+
+def collect_delta(blobs, last_loaded_at, manifest):
+    """Builds file_tracker rows for xlsx objects that are newer than the watermark and not yet in the manifest."""
+    data = []
+    latest_update = last_loaded_at
+    skipped = 0
+
+    for blob in blobs:
+        if not blob.name.endswith('.xlsx'):
+            continue
+
+        generation = str(blob.generation)
+        if manifest.get(blob.name) == generation:
+            skipped += 1
+            continue  # Already extracted this exact object
+
+        if last_loaded_at and blob.updated <= last_loaded_at:
+            manifest[blob.name] = generation
+            continue  # Skip already processed
+
+        file_name = blob.name.split('/')[-1]
+        base_name, person1, person2 = extract_info_from_filename(file_name)
+
+        mod_date = blob.updated.strftime('%Y-%m-%d %H:%M:%S')
+        create_date = blob.time_created.strftime('%Y-%m-%d %H:%M:%S')
+        status = blob.name.split('/')[-2].split('_')[0] if '/' in blob.name else 'Unknown'
+        file_id = f"{base_name}_{mod_date}"
+
+        data.append({
+            'file_id': file_id,
+            'filename': base_name,
+            'qc_done_by': person1,
+            'uploaded_by': person2,
+            'create_date': create_date,
+            'modified_date': mod_date,
+            'status': status
+        })
+        manifest[blob.name] = generation
+
+        if latest_update is None or blob.updated > latest_update:
+            latest_update = blob.updated
+
+    logger.debug(f"Manifest hits: {skipped} objects skipped without parsing")
+    return data, latest_update
 
-        df = pd.DataFrame(data)
-        logger.info(f"Delta extracted: {df.shape[0]} rows")
 
-        # Update metadata only if new files found
-        if latest_update and not df.empty:
+# === Main Extraction Function ===
+def extract_delta_xlsx_metadata(gcs_bucket=None, manifest_path=MANIFEST_PATH):
+    """Extracts metadata from XLSX files in GCS bucket."""
+    gcs_bucket = gcs_bucket or bucket
+    try:
+        # The watermark read is short; the connection goes back to the pool before the bucket walk
+        with pooled_connection() as conn:
             with conn.cursor() as cur:
-                update_etl_metadata(cur, source_table='file_tracker')
+                last_loaded_at = get_etl_metadata(cur, source_table='file_tracker')
             conn.commit()
 
+        if last_loaded_at:
+            last_loaded_at = last_loaded_at.replace(tzinfo=timezone.utc)
+            
+        logger.info(f"Last loaded timestamp: {last_loaded_at}")
+
+        manifest = load_manifest(manifest_path)
+        blobs = scan_bucket(gcs_bucket, PREFIX)
+        data, latest_update = collect_delta(blobs, last_loaded_at, manifest)
+        metrics.increment('gcs_objects_listed', len(blobs))
+        metrics.record_rows(read=len(data), skipped=len(blobs) - len(data))
+
+        df = pd.DataFrame(data)
+        logger.info(f"Delta extracted: {df.shape[0]} rows from {len(blobs)} listed objects")
+
+        # The watermark and the manifest only move once upload_folders committed the delta (commit_delta)
+        df.attrs['bucket_delta'] = {
+            'loaded_at': latest_update if not df.empty else None,
+            'manifest': manifest,
+            'manifest_path': manifest_path,
+        }
         return df
 
     except Exception as e:
         logger.exception("Delta extraction failed")
-        return pd.DataFrame()
-    finally:
-        conn.close()
+        raise
+
+def commit_delta(cur, df):
+    """Advances the file_tracker watermark to the newest object of an uploaded delta, in the upload transaction."""
+    loaded_at = df.attrs.get('bucket_delta', {}).get('loaded_at')
+    # Update metadata only if new files found
+    if loaded_at:
+        update_etl_metadata(cur, source_table='file_tracker', loaded_at=loaded_at.astimezone(timezone.utc).replace(tzinfo=None))
+
+
+def save_delta_manifest(df):
+    """Saves the seen-object manifest of a delta once its upload committed."""
+    delta = df.attrs.get('bucket_delta')
+    if delta:
+        save_manifest(delta['manifest'], delta['manifest_path'])
 
-def details_extractions():
-    return extract_delta_xlsx_metadata()
 
+def details_extractions(gcs_bucket=None):
+    return extract_delta_xlsx_metadata(gcs_bucket)
@@ -0,0 +1,308 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+import pandas as pd
+from dotenv import load_dotenv
+from src.refresh_materialized_view import KPI_REFRESH_MODE
+from src.utils.db_connection import pooled_connection
+from src.utils.etl_updater import KPI_DATA_VERSION
+from src.utils.logger_config import AppLogger
+
+logger = AppLogger().get_logger()
+
+load_dotenv()
+
+# Result sets kept in memory, least recently used evicted first
+KPI_CACHE_MAX_ENTRIES = int(os.getenv("KPI_CACHE_MAX_ENTRIES", "256"))
+
+# Upper bound on an entry's age; entries are dropped sooner when the data version moves
+KPI_CACHE_TTL_SECONDS = float(os.getenv("KPI_CACHE_TTL_SECONDS", "3600"))
+
+# Pickled result sets shared between processes and restarts, per data version; an empty value disables
+KPI_CACHE_DIR = os.getenv("KPI_CACHE_DIR", "")
+
+# How long a data version read from etl_metadata is trusted before it is read again
+KPI_VERSION_CHECK_SECONDS = float(os.getenv("KPI_VERSION_CHECK_SECONDS", "30"))
+
+# Row-level KPI relation the cross-dimension filters fall back to
+KPI_SOURCE_TABLE = 'kpi_table_incremental' if KPI_REFRESH_MODE == 'incremental' else 'kpi_table'
+
+# Filter name -> KPI column it restricts
+FILTER_COLUMNS = {
+    'clients': 'client_name',
+    'associates': 'associate_name',
+    'teams': 'team_name',
+}
+
+# dashboard -> (rollup table, period column, date_trunc unit, grouping columns, filter answered by the rollup)
+DASHBOARDS = {
+    'client': ('kpi_rollup_client_month', 'month_start', 'month', ['client_name', 'stage_order', 'stage_name'], 'clients'),
+    'associate': ('kpi_rollup_associate_week', 'week_start', 'week', ['associate_name', 'stage_order', 'stage_name'], 'associates'),
+    'team': ('kpi_rollup_team_month', 'month_start', 'month', ['team_name', 'ticket_status'], 'teams'),
+}
+
+ROLLUP_MEASURES_SQL = """
+    ticket_count, stage_rows, no_of_products, no_of_categories,
+    ROUND(duration_hrs_sum / NULLIF(duration_count, 0), 2) AS avg_duration_hrs,
+    duration_hrs_p50, duration_hrs_p90
+"""
+
+KPI_MEASURES_SQL = """
+    COUNT(DISTINCT ticket_id) AS ticket_count,
+    COUNT(*) AS stage_rows,
+    SUM(no_of_products) AS no_of_products,
+    SUM(no_of_categories) AS no_of_categories,
+    ROUND(AVG(duration_hrs), 2) AS avg_duration_hrs,
+    ROUND((percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_hrs))::numeric, 2) AS duration_hrs_p50,
+    ROUND((percentile_cont(0.9) WITHIN GROUP (ORDER BY duration_hrs))::numeric, 2) AS duration_hrs_p90
+"""
+
+
+class KpiCache:
+    '''LRU cache of KPI result sets with a TTL, optionally backed by a directory of pickles.'''
+    def __init__(self, max_entries=KPI_CACHE_MAX_ENTRIES, ttl_seconds=KPI_CACHE_TTL_SECONDS, cache_dir=KPI_CACHE_DIR):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+
+    def _disk_path(self, key):
+        version, digest = key[0], hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.cache_dir, hashlib.sha256(str(version).encode()).hexdigest()[:16], f"{digest}.pkl")
+
+    def get(self, key):
+        """Returns the cached value for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return value
+                del self._entries[key]
+                self.stats['expired'] += 1
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['disk_hits'] += 1
+        self._store(key, value)
+        return value
+
+    def put(self, key, value):
+        self._store(key, value)
+        self._write_disk(key, value)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                return None
+            with open(path, 'rb') as fh:
+                return pickle.load(fh)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning(f"Ignoring unreadable KPI cache file {path}", exc_info=True)
+            return None
+
+    def _write_disk(self, key, value):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning(f"Could not write KPI cache file {path}", exc_info=True)
+
+    def drop_versions_except(self, version):
+        """Forgets every entry cached for another data version, in memory and on disk."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] != version]:
+                del self._entries[key]
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            keep = os.path.dirname(self._disk_path((version,)))
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                if path != keep and os.path.isdir(path):
+                    for file_name in os.listdir(path):
+                        os.remove(os.path.join(path, file_name))
+                    os.rmdir(path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats, entries=len(self._entries))
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['disk_hits']) / lookups, 4) if lookups else None
+        return stats
+
+
+_cache = KpiCache()
+_version = {'value': None, 'checked_at': None}
+_version_lock = threading.Lock()
+
+
+def read_data_version(cur):
+    """Returns the version stamped by the last KPI refresh (None before the first one)."""
+    cur.execute("SELECT last_loaded_at FROM etl_metadata WHERE table_name = %s", (KPI_DATA_VERSION,))
+    row = cur.fetchone()
+    return row[0].isoformat() if row else None
+
+
+def data_version():
+    """Current data version, re-read from etl_metadata at most every KPI_VERSION_CHECK_SECONDS.
+    A new version drops the entries cached for the previous ones."""
+    with _version_lock:
+        checked_at = _version['checked_at']
+        if checked_at is not None and time.monotonic() - checked_at < KPI_VERSION_CHECK_SECONDS:
+            return _version['value']
+
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            version = read_data_version(cur)
+
+    with _version_lock:
+        changed = version != _version['value']
+        _version['value'], _version['checked_at'] = version, time.monotonic()
+    if changed:
+        logger.info(f"KPI data version is now {version}; dropping results cached for older versions")
+        _cache.drop_versions_except(version)
+    return version
+
+
+def normalize_filters(clients=None, associates=None, teams=None, start=None, end=None):
+    """Canonical, hashable form of a filter combination: names stripped, deduplicated and sorted,
+    empty selections dropped, dates as ISO strings."""
+    normalized = []
+    for name, values in (('clients', clients), ('associates', associates), ('teams', teams)):
+        if isinstance(values, str):
+            values = [values]
+        names = sorted({str(value).strip() for value in values or () if value is not None and str(value).strip()})
+        if names:
+            normalized.append((name, tuple(names)))
+    for name, value in (('start', start), ('end', end)):
+        if value is not None:
+            normalized.append((name, (value if isinstance(value, date) else date.fromisoformat(str(value))).isoformat()))
+    return tuple(normalized)
+
+
+def build_query(dashboard, filters):
+    """Builds the SQL and parameters of one dashboard query. The dashboard's rollup answers it when only
+    its own dimension (and the period) is filtered; other combinations aggregate the row-level KPI table."""
+    rollup_table, period_column, period_unit, group_columns, own_filter = DASHBOARDS[dashboard]
+    filters = dict(filters)
+    use_rollup = not set(filters) & (set(FILTER_COLUMNS) - {own_filter})
+
+    if use_rollup:
+        period_sql = period_column
+    else:
+        period_sql = f"date_trunc('{period_unit}', closed_date_id)::date"
+
+    conditions, params = [], []
+    for name, column in FILTER_COLUMNS.items():
+        if name in filters:
+            conditions.append(f"{column} = ANY(%s)")
+            params.append(list(filters[name]))
+    if 'start' in filters:
+        conditions.append(f"{period_sql} >= date_trunc('{period_unit}', %s::date)::date")
+        params.append(filters['start'])
+    if 'end' in filters:
+        conditions.append(f"{period_sql} <= %s::date")
+        params.append(filters['end'])
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    columns = ", ".join(group_columns)
+    if use_rollup:
+        sql = f"""
+            SELECT {columns}, {period_column}, {ROLLUP_MEASURES_SQL}
+            FROM {rollup_table}
+            {where_sql}
+            ORDER BY {period_column}, {columns};
+        """
+    else:
+        sql = f"""
+            SELECT {columns}, {period_sql} AS {period_column}, {KPI_MEASURES_SQL}
+            FROM {KPI_SOURCE_TABLE}
+            {where_sql}
+            GROUP BY {columns}, {period_sql}
+            ORDER BY {period_column}, {columns};
+        """
+    return sql, params
+
+
+def query_kpis(dashboard, clients=None, associates=None, teams=None, start=None, end=None):
+    """Returns a dashboard's KPI rows for a filter combination, from the cache when the same
+    normalized combination was already answered for the current data version."""
+    if dashboard not in DASHBOARDS:
+        raise ValueError(f"Unknown dashboard '{dashboard}'; expected one of {sorted(DASHBOARDS)}")
+
+    filters = normalize_filters(clients, associates, teams, start, end)
+    key = (data_version(), dashboard, filters)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached.copy()
+
+    sql, params = build_query(dashboard, filters)
+    start_time = time.perf_counter()
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            df = pd.DataFrame(cur.fetchall(), columns=[column[0] for column in cur.description])
+
+    logger.debug(f"KPI query '{dashboard}' {filters}: {len(df)} rows in {time.perf_counter() - start_time:.3f}s")
+    _cache.put(key, df)
+    return df.copy()
+
+
+def client_kpis(**filters):
+    """Client dashboard: client x month x stage."""
+    return query_kpis('client', **filters)
+
+
+def associate_kpis(**filters):
+    """Associate dashboard: associate x week x stage."""
+    return query_kpis('associate', **filters)
+
+
+def team_kpis(**filters):
+    """Team dashboard: team x month x ticket status."""
+    return query_kpis('team', **filters)
+
+
+def cache_stats():
+    """Hit/miss counters of the KPI cache and the data version it currently serves."""
+    return dict(_cache.snapshot(), data_version=_version['value'])
+
+
+def invalidate_cache():
+    """Empties the in-memory cache and forces the next query to re-read the data version."""
+    _cache.clear()
+    with _version_lock:
+        _version['checked_at'] = None
@@ -0,0 +1,180 @@
+import os
+from datetime import date
+from dotenv import load_dotenv
+from src.refresh_materialized_view import KPI_SOURCE_SQL
+from src.utils.db_connection import pooled_connection
+from src.utils.logger_config import AppLogger
+from src.utils.etl_updater import KPI_DATA_VERSION, get_etl_metadata, update_etl_metadata
+from src.utils import metrics
+
+logger = AppLogger().get_logger()
+
+load_dotenv()
+
+# 'incremental' re-aggregates only the periods the fact delta touched, 'full' rebuilds every rollup
+# (e.g. after editing the team map), 'off' skips the step
+KPI_ROLLUP_MODE = os.getenv("KPI_ROLLUP_MODE", "incremental").lower()
+
+# Measures shared by every rollup, aggregated over the rollup_facts rows of one group
+ROLLUP_MEASURES = """
+    COUNT(DISTINCT ticket_id),
+    COUNT(*),
+    SUM(no_of_products),
+    SUM(no_of_categories),
+    SUM(duration_hrs),
+    COUNT(duration_hrs),
+    ROUND((percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_hrs))::numeric, 2),
+    ROUND((percentile_cont(0.9) WITHIN GROUP (ORDER BY duration_hrs))::numeric, 2)
+"""
+
+MEASURE_COLUMNS = [
+    'ticket_count', 'stage_rows', 'no_of_products', 'no_of_categories',
+    'duration_hrs_sum', 'duration_count', 'duration_hrs_p50', 'duration_hrs_p90'
+]
+
+# table -> (period column, dimension columns of rollup_facts it is grouped by)
+ROLLUPS = {
+    'kpi_rollup_client_month': ('month_start', ['client_id', 'client_name', 'stage_order', 'stage', 'stage_name']),
+    'kpi_rollup_associate_week': ('week_start', ['associate_id', 'associate_name', 'stage_order', 'stage', 'stage_name']),
+    'kpi_rollup_team_month': ('month_start', ['team_id', 'team_name', 'ticket_status_id', 'ticket_status', 'is_final']),
+}
+
+# Facts changed since the watermark and the periods they now fall in
+DELTA_SQL = """
+    CREATE TEMP TABLE rollup_delta ON COMMIT DROP AS
+    SELECT
+        fact_id,
+        date_trunc('month', closed_date)::date AS month_start,
+        date_trunc('week', closed_date)::date AS week_start
+    FROM fact_catalog_activity
+    WHERE {delta_filter};
+"""
+
+# Periods to re-aggregate: where the changed facts are now, and where they were counted before
+AFFECTED_PERIODS_SQL = """
+    SELECT DISTINCT month_start, week_start FROM (
+        SELECT month_start, week_start FROM rollup_delta
+        UNION ALL
+        SELECT p.month_start, p.week_start
+        FROM kpi_rollup_fact_periods p
+        JOIN rollup_delta d USING (fact_id)
+    ) periods;
+"""
+
+REMEMBER_PERIODS_SQL = """
+    INSERT INTO kpi_rollup_fact_periods (fact_id, month_start, week_start)
+    SELECT fact_id, month_start, week_start FROM rollup_delta
+    ON CONFLICT (fact_id) DO UPDATE SET
+        month_start = EXCLUDED.month_start,
+        week_start = EXCLUDED.week_start;
+"""
+
+
+def period_ranges(months, weeks):
+    """Closed-date ranges [start, end) covering the affected months and weeks, overlaps merged."""
+    bounds = sorted(
+        [(m, date(m.year + m.month // 12, m.month % 12 + 1, 1)) for m in months]
+        + [(w, date.fromordinal(w.toordinal() + 7)) for w in weeks]
+    )
+    merged = []
+    for start, end in bounds:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def build_rollup_facts_sql(ranges, include_open):
+    """Builds the temp table of facts (joined to their dimensions) in the affected periods.
+    Literal closed-date ranges let a fact table partitioned on closed_date prune to them."""
+    conditions = ["(f.closed_date >= %s AND f.closed_date < %s)"] * len(ranges)
+    if include_open:
+        conditions.append("f.closed_date IS NULL")
+
+    sql = f"""
+        CREATE TEMP TABLE rollup_facts ON COMMIT DROP AS
+        SELECT
+            f.ticket_id,
+            dc.client_id, dc.client_name,
+            da.associate_id, da.associate_name,
+            dt.team_id, dt.team_name,
+            ds.stage, ds.stage_name, ds.stage_order,
+            ts.ticket_status_id, ts.ticket_status, ts.is_final,
+            date_trunc('month', f.closed_date)::date AS month_start,
+            date_trunc('week', f.closed_date)::date AS week_start,
+            f.no_of_products, f.no_of_categories, f.duration_hrs
+        {KPI_SOURCE_SQL}
+        WHERE {" OR ".join(conditions) or "FALSE"};
+    """
+    return sql, [bound for start_end in ranges for bound in start_end]
+
+
+def refresh_rollup(cur, table, periods, include_open):
+    """Replaces the rollup rows of the affected periods with a fresh aggregate of rollup_facts."""
+    period_column, dimensions = ROLLUPS[table]
+    period_filter = f"{period_column} = ANY(%s) OR (%s AND {period_column} IS NULL)"
+    params = (sorted(periods), include_open)
+
+    cur.execute(f"DELETE FROM {table} WHERE {period_filter};", params)
+    deleted = cur.rowcount
+
+    group_columns = ", ".join(dimensions + [period_column])
+    cur.execute(f"""
+        INSERT INTO {table} ({group_columns}, {", ".join(MEASURE_COLUMNS)})
+        SELECT {group_columns}, {ROLLUP_MEASURES}
+        FROM rollup_facts
+        WHERE {period_filter}
+        GROUP BY {group_columns};
+    """, params)
+    logger.info(f"'{table}': {len(periods) + include_open} periods re-aggregated ({deleted} rows replaced by {cur.rowcount})")
+    metrics.record_table_changes(table, deleted + cur.rowcount)
+    return cur.rowcount
+
+
+def refresh_rollups(mode=None):
+    """Maintains the client/month, associate/week and team/month rollups the dashboards read.
+    Only the periods holding facts changed since the 'kpi_rollups' watermark are re-aggregated."""
+    mode = (mode or KPI_ROLLUP_MODE).lower()
+    if mode == 'off':
+        logger.info("KPI rollups disabled (KPI_ROLLUP_MODE=off)")
+        return
+
+    try:
+        with pooled_connection() as conn:
+            with conn:
+                with conn.cursor() as cur:
+                    # One refresh at a time; readers are not blocked
+                    cur.execute("LOCK TABLE kpi_rollup_fact_periods IN EXCLUSIVE MODE;")
+                    if mode == 'full':
+                        cur.execute(f"TRUNCATE kpi_rollup_fact_periods, {', '.join(ROLLUPS)};")
+                        cur.execute(DELTA_SQL.format(delta_filter="TRUE"))
+                    else:
+                        last_loaded_at = get_etl_metadata(cur, source_table='kpi_rollups')
+                        cur.execute(DELTA_SQL.format(delta_filter="last_updated_at > %s"), (last_loaded_at,))
+                    changed_facts = cur.rowcount
+
+                    cur.execute(AFFECTED_PERIODS_SQL)
+                    periods = cur.fetchall()
+                    months = {month for month, _ in periods if month is not None}
+                    weeks = {week for _, week in periods if week is not None}
+                    include_open = any(month is None for month, _ in periods)
+
+                    written = 0
+                    if periods:
+                        cur.execute(*build_rollup_facts_sql(period_ranges(months, weeks), include_open))
+                        for table, (period_column, _) in ROLLUPS.items():
+                            written += refresh_rollup(cur, table, weeks if period_column == 'week_start' else months, include_open)
+                        cur.execute(REMEMBER_PERIODS_SQL)
+                        metrics.record_table_changes('kpi_rollup_fact_periods', cur.rowcount)
+
+                    update_etl_metadata(cur, source_table='kpi_rollups')
+                    if written:
+                        update_etl_metadata(cur, source_table=KPI_DATA_VERSION)
+
+        metrics.record_rows(read=changed_facts, written=written)
+        logger.info(f"KPI rollups refreshed ({mode}): {changed_facts} changed facts, {len(months)} months, {len(weeks)} weeks, {written} rollup rows written")
+
+    except Exception as e:
+        logger.exception("Failed to refresh KPI rollups")
+        raise
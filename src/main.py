@@ -1,55 +1,171 @@
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
 from src import (
     client_associate_id_update,
     data_importer,
     db_exporter,
+    db_maintenance,
     folder_db_exporter,
     folder_details_extraction,
+    kpi_rollups,
+    partition_manager,
+    watcher,
     wc_fact_table_insertion
 )
 from src.utils.logger_config import AppLogger
 from src.refresh_materialized_view import materialized_view_refresh
+from src.utils.db_connection import close_pool
+from src.utils import metrics
+from src.utils.checkpoint import checkpointed_steps, open_checkpoint
+from src.utils.snapshots import flush_snapshots
+from src.utils.step_runner import PipelineStep, run_steps
 
 logger = AppLogger().get_logger()
 
-def main():
-    """Main function to execute the data pipeline steps."""
-    logger.info("Pipeline execution started")
+load_dotenv()
 
-    try:
-        logger.info("Step 1: Importing sheet data from drive")
-        df = data_importer.get_sheet_data_from_drive()
-        logger.debug(f"Data imported: {df.shape[0]} rows")
+# 'batch' loads the whole sheet into memory; 'stream' pipes row chunks straight into the database
+INGEST_MODE = os.getenv("INGEST_MODE", "batch").lower()
+
+# Steps without a dependency between them run concurrently on this many threads
+PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", "4"))
 
-        logger.info("Step 2: Extracting folder details")
-        file_ = folder_details_extraction.details_extractions()
-        logger.debug(f"Extracted folder file: {file_}")
+# Retry policy for the network-bound extraction steps
+EXTRACT_RETRIES = int(os.getenv("EXTRACT_RETRIES", "2"))
+EXTRACT_RETRY_DELAY = float(os.getenv("EXTRACT_RETRY_DELAY", "10"))
 
-        logger.info("Step 3: Uploading data to the database")
-        db_exporter.uploader(df)
-        logger.info("Data uploaded successfully")
 
-        logger.info("Step 4: Uploading folder data to DB")
-        folder_db_exporter.upload(file_)
-        logger.info("Folder data uploaded successfully")
+def import_sheet(drive_service=None):
+    """Step 1: Imports sheet data from Drive, failing the branch when nothing could be read."""
+    df = data_importer.get_sheet_data_from_drive(service=drive_service)
+    if df is None:
+        raise RuntimeError("Sheet import returned no data")
+    logger.debug(f"Data imported: {df.shape[0]} rows")
+    return df
 
-        logger.info("Step 5: Updating client-associate ID mapping")
-        client_associate_id_update.update_client_associate_data()
-        logger.info("Client-associate mapping updated")
 
-        logger.info("Step 6: Updating fact table")
-        wc_fact_table_insertion.update_fact_table()
-        logger.info("fact table update complete")
+def stream_sheet(drive_service=None):
+    """Steps 1 + 3 in streaming mode: pipes sheet chunks straight into the database."""
+    db_exporter.stream_uploader(data_importer.stream_sheet_data_from_drive(service=drive_service))
 
-        logger.info("Step 7: Refreshing Matrialized View")
-        materialized_view_refresh()
-        logger.info("Refreshed Matrialized View")
 
+def extract_folders(gcs_bucket=None):
+    """Step 2: Extracts the delta of folder details from the bucket."""
+    file_ = folder_details_extraction.details_extractions(gcs_bucket)
+    logger.debug(f"Extracted folder file: {file_.shape[0]} rows")
+    return file_
 
-    except Exception as e:
-        logger.exception("Pipeline execution failed due to an unexpected error")
 
+def build_steps(drive_service=None, gcs_bucket=None, ingest_mode=None):
+    """Declares the pipeline steps and their dependencies; the Drive/GCS clients can be injected."""
+    if (ingest_mode or INGEST_MODE) == 'stream':
+        sheet_steps = [
+            PipelineStep('upload_sheet', lambda: stream_sheet(drive_service), depends_on=['manage_partitions'], retries=EXTRACT_RETRIES, retry_delay=EXTRACT_RETRY_DELAY)
+        ]
     else:
+        sheet_steps = [
+            PipelineStep('import_sheet', lambda: import_sheet(drive_service), retries=EXTRACT_RETRIES, retry_delay=EXTRACT_RETRY_DELAY),
+            PipelineStep('upload_sheet', db_exporter.uploader, depends_on=['manage_partitions'], inputs=['import_sheet'])
+        ]
+
+    return [
+        PipelineStep('ensure_indexes', db_maintenance.ensure_indexes),
+        PipelineStep('manage_partitions', partition_manager.manage_partitions, depends_on=['ensure_indexes'])
+    ] + sheet_steps + [
+        PipelineStep('extract_folders', lambda: extract_folders(gcs_bucket), retries=EXTRACT_RETRIES, retry_delay=EXTRACT_RETRY_DELAY),
+        PipelineStep('upload_folders', folder_db_exporter.upload, inputs=['extract_folders']),
+        PipelineStep('update_dimensions', client_associate_id_update.update_client_associate_data, depends_on=['upload_sheet']),
+        PipelineStep('analyze_sources', db_maintenance.analyze_source_tables, depends_on=['update_dimensions', 'upload_folders']),
+        PipelineStep('update_fact_table', wc_fact_table_insertion.update_fact_table, depends_on=['analyze_sources']),
+        PipelineStep('refresh_views', materialized_view_refresh, depends_on=['update_fact_table']),
+        PipelineStep('refresh_rollups', kpi_rollups.refresh_rollups, depends_on=['refresh_views']),
+        PipelineStep('analyze_facts', db_maintenance.analyze_fact_tables, depends_on=['refresh_rollups'])
+    ]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Runs the tracker ETL pipeline.")
+    parser.add_argument(
+        '--resume', nargs='?', const=True, default=None, metavar='RUN_ID',
+        help="skip the steps an earlier run already completed (default: the latest unfinished run)"
+    )
+    parser.add_argument(
+        '--watch', action='store_true',
+        help="keep running and load Drive/GCS changes as they arrive, in micro-batches of the affected steps"
+    )
+    return parser.parse_args(argv)
+
+
+def run_pipeline(steps, resume=None, checkpoints=True):
+    """Runs steps as one recorded pipeline run; returns whether every step succeeded."""
+    metrics.start_run()
+    checkpoint = open_checkpoint(resume) if checkpoints else None
+    try:
+        results = run_steps(checkpointed_steps(steps, checkpoint), max_workers=PIPELINE_MAX_WORKERS)
+    finally:
+        # Snapshot writes run off the critical path; wait for them before the run is recorded
+        flush_snapshots()
+
+    record = metrics.finish_run(results)
+    for result in results.values():
+        step = record['steps'].get(result.name, {})
+        logger.info(
+            f"Step summary: {result.name} -> {result.status} in {result.seconds:.2f}s "
+            f"(attempts: {result.attempts}, cpu: {step.get('cpu_seconds', 0):.2f}s, sql: {step.get('sql_round_trips', 0)} round trips)"
+        )
+
+    failed = [name for name, result in results.items() if result.status != 'succeeded']
+    if failed:
+        logger.error(f"Pipeline execution finished with failed or skipped steps: {failed}")
+        if checkpoint:
+            logger.info(f"Rerun with --resume {checkpoint.run_id} to continue from the completed steps")
+        return False
+
+    if checkpoint:
+        checkpoint.mark_complete()
+    return True
+
+
+def main(resume=None):
+    """Main function to execute the data pipeline steps."""
+    logger.info(f"Pipeline execution started (ingest mode: {INGEST_MODE}, workers: {PIPELINE_MAX_WORKERS})")
+    try:
+        succeeded = run_pipeline(build_steps(), resume)
+    finally:
+        close_pool()
+
+    if succeeded:
         logger.info("Pipeline execution completed successfully")
+    return succeeded
+
+
+def watch(drive_service=None, gcs_bucket=None, stop_event=None):
+    """Long-running mode: a full run at startup, then micro-batches of the steps downstream of each change."""
+    logger.info(f"Watch mode started (ingest mode: {INGEST_MODE}, workers: {PIPELINE_MAX_WORKERS})")
+    drive_service = drive_service or data_importer.build_drive_service()
+    gcs_bucket = gcs_bucket or folder_details_extraction.bucket
+
+    sources = [watcher.DriveChangesSource(drive_service)]
+    if gcs_bucket is not None:
+        sources.append(watcher.GcsListingSource(gcs_bucket))
+    else:
+        logger.warning("No GCS bucket configured; bucket objects are only picked up by the periodic full runs")
+
+    pipeline_watcher = watcher.Watcher(
+        sources,
+        build_steps=lambda: build_steps(drive_service, gcs_bucket),
+        run_batch=lambda steps: run_pipeline(steps, checkpoints=False)
+    )
+    try:
+        pipeline_watcher.run(stop_event)
+    finally:
+        close_pool()
+    return True
 
 if __name__ == '__main__':
-    main()
+    args = parse_args()
+    if args.watch:
+        sys.exit(0 if watch() else 1)
+    sys.exit(0 if main(args.resume) else 1)
@@ -0,0 +1,104 @@
+import os
+from dotenv import load_dotenv
+from src.utils.db_connection import pooled_connection, is_partitioned
+from src.utils.logger_config import AppLogger
+
+logger = AppLogger().get_logger()
+
+load_dotenv()
+
+# Monthly partitions are kept this many months ahead of the current one
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+# Range partition key per table of the partitioned schema (SQL_query/PARTITIONED_SCHEMA)
+PARTITION_KEYS = {
+    'work_completed': 'insert_date',
+    'work_in_progress': 'insert_date',
+    'fact_catalog_activity': 'closed_date',
+}
+
+
+def partition_name(table, month):
+    """Monthly partitions are named <table>_pYYYYMM, next to the catch-all <table>_default."""
+    return f"{table}_p{month:%Y%m}"
+
+
+def existing_partitions(cur, table):
+    """Returns the names of the partitions currently attached to table."""
+    cur.execute("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+    """, (table,))
+    return {row[0] for row in cur.fetchall()}
+
+
+def wanted_months(cur, table, key, months_ahead):
+    """The current month and the next months_ahead, plus every month that has rows stranded in the default partition."""
+    cur.execute("""
+        SELECT (date_trunc('month', CURRENT_DATE) + make_interval(months => n))::date
+        FROM generate_series(0, %s) AS n
+    """, (months_ahead,))
+    months = {row[0] for row in cur.fetchall()}
+
+    default = f"{table}_default"
+    if default in existing_partitions(cur, table):
+        cur.execute(f"SELECT DISTINCT date_trunc('month', {key})::date FROM {default} WHERE {key} IS NOT NULL")
+        months.update(row[0] for row in cur.fetchall())
+    return sorted(months)
+
+
+def create_partition(cur, table, key, month, has_default=True):
+    """Creates the monthly partition of table, moving any of its rows out of the default partition first."""
+    name = partition_name(table, month)
+    default = f"{table}_default"
+    cur.execute("SELECT %s::date, (%s::date + INTERVAL '1 month')::date", (month, month))
+    lower, upper = cur.fetchone()
+
+    stranded = False
+    if has_default:
+        cur.execute(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {key} >= %s AND {key} < %s)", (lower, upper))
+        stranded = cur.fetchone()[0]
+
+    if not stranded:
+        cur.execute(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)", (lower, upper))
+        logger.info(f"Created partition {name}")
+        return 0
+
+    # A new partition cannot overlap rows the default partition still holds
+    cur.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cur.execute(f"""
+        WITH moved AS (
+            DELETE FROM {default} WHERE {key} >= %s AND {key} < %s RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """, (lower, upper))
+    moved = cur.rowcount
+    cur.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", (lower, upper))
+    logger.info(f"Created partition {name} with {moved} rows moved from {default}")
+    return moved
+
+
+def manage_partitions(months_ahead=PARTITION_MONTHS_AHEAD):
+    """Creates the upcoming monthly partitions of every partitioned table; a no-op on the unpartitioned schema."""
+    with pooled_connection() as conn:
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    for table, key in PARTITION_KEYS.items():
+                        if not is_partitioned(cur, table):
+                            continue
+
+                        existing = existing_partitions(cur, table)
+                        missing = [
+                            month for month in wanted_months(cur, table, key, months_ahead)
+                            if partition_name(table, month) not in existing
+                        ]
+                        for month in missing:
+                            create_partition(cur, table, key, month, has_default=f"{table}_default" in existing)
+                        logger.info(f"Partitions of '{table}' checked: {len(missing)} created")
+
+        except Exception as e:
+            logger.exception("Partition maintenance failed")
+            raise
@@ -1,22 +1,125 @@
-from src.utils.db_connection import get_connection
+import os
+from dotenv import load_dotenv
+from src.utils.db_connection import pooled_connection
 from src.utils.logger_config import AppLogger
+from src.utils.etl_updater import KPI_DATA_VERSION, get_etl_metadata, update_etl_metadata
+from src.utils import metrics
 
 logger = AppLogger().get_logger()
 
+load_dotenv()
+
+# 'full' = blocking REFRESH, 'concurrent' = REFRESH ... CONCURRENTLY where a unique index allows it,
+# 'incremental' = upsert only the latest fact delta into kpi_table_incremental
+KPI_REFRESH_MODE = os.getenv("KPI_REFRESH_MODE", "concurrent").lower()
+
+# In incremental mode the materialized views are refreshed at most this often; 0 = every run.
+# Raise it once the dashboards read kpi_table_incremental
+KPI_TABLE_REFRESH_SECONDS = float(os.getenv("KPI_TABLE_REFRESH_SECONDS", "0"))
+
+# kpi_table2 is built on kpi_table, so it is refreshed after it and on the same schedule
+MATERIALIZED_VIEWS = ['kpi_table', 'kpi_table2']
+
+# Same projection as the kpi_table materialized view, keyed on fact_id
+KPI_COLUMNS = [
+    'fact_id', 'ticket_id', 'client_id', 'client_name', 'associate_id', 'associate_name',
+    'team_id', 'team_name', 'team_lead', 'stage', 'stage_name', 'stage_order', 'stage_status',
+    'ticket_status_id', 'ticket_status', 'is_final', 'closed_date_id', 'day', 'month', 'year',
+    'month_year', 'quarter', 'week', 'day_of_week', 'no_of_products', 'no_of_categories',
+    'duration_hrs', 'start_date', 'closed_date_actual', 'last_updated_at'
+]
+
+# Facts joined to their dimensions, as in the kpi_table definition
+KPI_SOURCE_SQL = """
+    FROM fact_catalog_activity f
+    LEFT JOIN dim_clients dc ON f.client_id = dc.client_id
+    LEFT JOIN dim_catalog_associates da ON f.associate_id = da.associate_id
+    LEFT JOIN associate_team_map atm ON da.associate_name = atm.associate_name
+    LEFT JOIN dim_teams dt ON atm.team_name = dt.team_name
+    LEFT JOIN dim_stages ds ON f.stage_order = ds.stage_order
+    LEFT JOIN dim_ticket_status ts ON f.ticstatus_id = ts.ticket_status_id
+    LEFT JOIN dim_dates d ON f.closed_date = d.date_id
+"""
+
+KPI_DELTA_SQL = f"""
+    INSERT INTO kpi_table_incremental ({", ".join(KPI_COLUMNS)})
+    SELECT
+        f.fact_id, f.ticket_id,
+        dc.client_id, dc.client_name,
+        da.associate_id, da.associate_name,
+        dt.team_id, dt.team_name, dt.team_lead,
+        ds.stage, ds.stage_name, ds.stage_order, f.stage_status,
+        ts.ticket_status_id, ts.ticket_status, ts.is_final,
+        d.date_id, d.day, d.month, d.year, d.month_year, d.quarter, d.week, d.day_of_week,
+        f.no_of_products, f.no_of_categories, f.duration_hrs, f.start_date, f.closed_date, f.last_updated_at
+    {KPI_SOURCE_SQL}
+    WHERE f.last_updated_at > %s
+    ON CONFLICT (fact_id) DO UPDATE SET
+        {", ".join(f"{col} = EXCLUDED.{col}" for col in KPI_COLUMNS if col != 'fact_id')};
+"""
+
+
+def has_unique_index(cur, relation):
+    """Checks whether a relation has the unique index REFRESH ... CONCURRENTLY requires."""
+    cur.execute("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_index
+            WHERE indrelid = to_regclass(%s) AND indisunique AND indpred IS NULL
+        );
+    """, (relation,))
+    return cur.fetchone()[0]
+
+
+def refresh_view(cur, view, concurrently):
+    """Refreshes one materialized view, concurrently when a unique index allows it."""
+    if concurrently and not has_unique_index(cur, view):
+        logger.warning(f"'{view}' has no unique index; falling back to a blocking refresh")
+        concurrently = False
+
+    logger.info(f"Refreshing materialized view: {view}{' (concurrently)' if concurrently else ''}")
+    cur.execute(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{view};")
+
+
+def kpi_table_refresh_due(cur):
+    """Returns True when kpi_table was last refreshed more than KPI_TABLE_REFRESH_SECONDS ago (or never)."""
+    cur.execute("""
+        SELECT COALESCE(MAX(last_loaded_at) <= LOCALTIMESTAMP - make_interval(secs => %s), TRUE)
+        FROM etl_metadata WHERE table_name = 'kpi_table'
+    """, (KPI_TABLE_REFRESH_SECONDS,))
+    return cur.fetchone()[0]
+
+
+def refresh_kpi_incremental(cur):
+    """Re-derives and upserts only the KPI rows whose fact changed since the last refresh."""
+    last_loaded_at = get_etl_metadata(cur, source_table='kpi_table_incremental')
+    cur.execute(KPI_DELTA_SQL, (last_loaded_at,))
+    logger.info(f"{cur.rowcount} KPI rows upserted into 'kpi_table_incremental' since {last_loaded_at}")
+    metrics.record_rows(table='kpi_table_incremental', written=cur.rowcount)
+    update_etl_metadata(cur, source_table='kpi_table_incremental')
+
+
 def materialized_view_refresh():
     """Refreshes the materialized views in the database."""
-    conn = get_connection()
-    try:
-        with conn.cursor() as cur:
-            logger.info("Refreshing materialized view: kpi_table")
-            cur.execute("REFRESH MATERIALIZED VIEW kpi_table;")
-
-            logger.info("Refreshing materialized view: kpi_table2")
-            cur.execute("REFRESH MATERIALIZED VIEW kpi_table2;")
-
-        conn.commit()
-        logger.info("Materialized views refreshed successfully.")
-    except Exception as e:
-        logger.exception("Failed to refresh materialized views: %s", e)
-    finally:
-        conn.close()
+    logger.info(f"KPI refresh mode: {KPI_REFRESH_MODE}")
+    with pooled_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                views = MATERIALIZED_VIEWS
+                if KPI_REFRESH_MODE == 'incremental':
+                    refresh_kpi_incremental(cur)
+                    if not kpi_table_refresh_due(cur):
+                        logger.info(f"Materialized views refreshed less than {KPI_TABLE_REFRESH_SECONDS:.0f}s ago; leaving them for a later run")
+                        views = []
+
+                for view in views:
+                    refresh_view(cur, view, concurrently=KPI_REFRESH_MODE != 'full')
+                if 'kpi_table' in views:
+                    update_etl_metadata(cur, source_table='kpi_table')
+
+                update_etl_metadata(cur, source_table=KPI_DATA_VERSION)
+
+            conn.commit()
+            logger.info("Materialized views refreshed successfully.")
+        except Exception as e:
+            logger.exception("Failed to refresh materialized views: %s", e)
+            raise
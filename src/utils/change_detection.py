@@ -0,0 +1,98 @@
+import io
+import os
+import pandas as pd
+from dotenv import load_dotenv
+from src.utils.logger_config import AppLogger
+from src.utils import metrics
+
+logger = AppLogger().get_logger()
+
+load_dotenv()
+
+# Set CHANGE_DETECTION=false to force a full re-sync of every ticket
+CHANGE_DETECTION_ENABLED = os.getenv("CHANGE_DETECTION", "true").lower() == "true"
+
+
+def compute_fingerprints(df):
+    """Returns a vectorized 64-bit content hash per row over all cleaned columns."""
+    # Nullable integer counts hash like the plain Python ints stored fingerprints were computed from
+    counts = {col: df[col].astype(object) for col in df.columns if isinstance(df[col].dtype, pd.api.extensions.ExtensionDtype) and df[col].dtype.kind in 'iu'}
+    hashes = pd.util.hash_pandas_object(df.assign(**counts) if counts else df, index=False)
+    return pd.Series(hashes.to_numpy().view('int64'), index=df.index, name='row_hash')
+
+
+def load_fingerprints(cur):
+    """Loads the stored ticket_id -> row_hash map from ticket_fingerprint."""
+    cur.execute("SELECT ticket_id, row_hash FROM ticket_fingerprint;")
+    rows = cur.fetchall()
+    logger.debug(f"Loaded {len(rows)} stored ticket fingerprints")
+    return pd.Series(
+        [row_hash for _, row_hash in rows],
+        index=[ticket_id for ticket_id, _ in rows],
+        dtype='int64'
+    )
+
+
+def select_changed_rows(df, known):
+    """Splits out rows that are new or whose fingerprint differs from the stored one."""
+    hashes = compute_fingerprints(df)
+    previous = df['ticket_id'].map(known)
+    changed = previous.isna() | (previous != hashes)
+
+    logger.info(f"Change detection: {int(changed.sum())} new/changed, {int((~changed).sum())} unchanged tickets")
+    return df[changed], hashes[changed]
+
+
+def store_fingerprints(cur, ticket_ids, hashes):
+    """Upserts fingerprints for the rows that were just forwarded to the database."""
+    if len(hashes) == 0:
+        return
+
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS stg_ticket_fingerprint (ticket_id TEXT, row_hash BIGINT) ON COMMIT DROP;
+        TRUNCATE stg_ticket_fingerprint;
+    """)
+    buffer = io.StringIO()
+    pd.DataFrame({'ticket_id': ticket_ids.to_numpy(), 'row_hash': hashes.to_numpy()}).to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cur.copy_expert("COPY stg_ticket_fingerprint (ticket_id, row_hash) FROM STDIN WITH (FORMAT csv)", buffer)
+    store_staged_fingerprints(cur, 'stg_ticket_fingerprint')
+    logger.debug(f"Stored {len(hashes)} ticket fingerprints")
+
+
+def store_staged_fingerprints(cur, staging_table):
+    """Upserts the ticket_id/row_hash pairs of a staging table into ticket_fingerprint."""
+    cur.execute(f"""
+        INSERT INTO ticket_fingerprint (ticket_id, row_hash, updated_at)
+        SELECT ticket_id, row_hash, NOW() FROM {staging_table}
+        ON CONFLICT (ticket_id)
+        DO UPDATE SET row_hash = EXCLUDED.row_hash, updated_at = EXCLUDED.updated_at;
+    """)
+    metrics.record_table_changes('ticket_fingerprint', cur.rowcount)
+
+
+def is_source_unchanged(cur, file_id, file_state):
+    """Checks whether the Drive file's md5Checksum/modifiedTime match the last successful load."""
+    cur.execute("""
+        SELECT md5_checksum, modified_time FROM source_file_state WHERE file_id = %s;
+    """, (file_id,))
+    result = cur.fetchone()
+    if result is None:
+        return False
+
+    md5_checksum, modified_time = result
+    if file_state.get('md5Checksum'):
+        return md5_checksum == file_state['md5Checksum']
+    return modified_time is not None and modified_time == file_state.get('modifiedTime')
+
+
+def record_source_state(cur, file_id, file_state):
+    """Records the Drive file's md5Checksum/modifiedTime once its rows are safely loaded."""
+    cur.execute("""
+        INSERT INTO source_file_state (file_id, md5_checksum, modified_time, loaded_at)
+        VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (file_id)
+        DO UPDATE SET md5_checksum = EXCLUDED.md5_checksum,
+                      modified_time = EXCLUDED.modified_time,
+                      loaded_at = EXCLUDED.loaded_at;
+    """, (file_id, file_state.get('md5Checksum'), file_state.get('modifiedTime')))
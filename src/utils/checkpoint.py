@@ -0,0 +1,147 @@
+import json
+import os
+import pickle
+import shutil
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from src.utils.logger_config import AppLogger
+from src.utils import metrics
+from src.utils.step_runner import PipelineStep
+
+logger = AppLogger().get_logger()
+
+load_dotenv()
+
+# Step outputs and completion markers land in <CHECKPOINT_DIR>/<run id>/; an empty value disables checkpoints
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", os.path.join("artifacts", "checkpoints"))
+
+# Only the most recent runs' markers are kept
+CHECKPOINT_KEEP_RUNS = int(os.getenv("CHECKPOINT_KEEP_RUNS", "10"))
+
+RUN_COMPLETE_MARKER = '_run_complete'
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as fh:
+        write(fh)
+    os.replace(tmp_path, path)
+
+
+class RunCheckpoint:
+    '''Outputs and completion markers of the steps of one pipeline run.'''
+    def __init__(self, run_id, checkpoint_dir=None):
+        self.run_id = run_id
+        self.path = os.path.join(checkpoint_dir or CHECKPOINT_DIR, run_id)
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, step_name, suffix):
+        return os.path.join(self.path, f"{step_name}.{suffix}")
+
+    def is_done(self, step_name):
+        return os.path.exists(self._file(step_name, 'done'))
+
+    def save(self, step_name, value):
+        """Persists a step's return value, then its completion marker; the marker is what a resume trusts."""
+        if value is not None:
+            # Pickle round-trips frames exactly: mixed object columns, None cells and attrs (source_files)
+            _write_atomic(self._file(step_name, 'pkl'), lambda fh: pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL))
+
+        marker = {
+            'step': step_name,
+            'completed_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'has_output': value is not None,
+        }
+        _write_atomic(self._file(step_name, 'done'), lambda fh: fh.write(json.dumps(marker).encode()))
+        logger.debug(f"Checkpoint saved for step '{step_name}' in run {self.run_id}")
+
+    def load(self, step_name):
+        """Returns the value a completed step returned (None for steps without output)."""
+        with open(self._file(step_name, 'done')) as fh:
+            marker = json.load(fh)
+        if not marker['has_output']:
+            return None
+        with open(self._file(step_name, 'pkl'), 'rb') as fh:
+            return pickle.load(fh)
+
+    def is_complete(self):
+        return os.path.exists(os.path.join(self.path, RUN_COMPLETE_MARKER))
+
+    def mark_complete(self):
+        """Marks the whole run as done and drops its step outputs; only the markers are kept."""
+        for entry in os.listdir(self.path):
+            if entry.endswith('.pkl'):
+                os.remove(os.path.join(self.path, entry))
+        _write_atomic(os.path.join(self.path, RUN_COMPLETE_MARKER), lambda fh: None)
+        logger.info(f"Run {self.run_id} completed; checkpointed outputs removed")
+
+
+def list_runs(checkpoint_dir=None):
+    """Returns the run ids that have checkpoints, oldest first."""
+    checkpoint_dir = checkpoint_dir or CHECKPOINT_DIR
+    if not checkpoint_dir or not os.path.isdir(checkpoint_dir):
+        return []
+    return sorted(entry for entry in os.listdir(checkpoint_dir) if os.path.isdir(os.path.join(checkpoint_dir, entry)))
+
+
+def latest_incomplete_run(checkpoint_dir=None):
+    """Returns the id of the most recent run that did not finish, or None."""
+    checkpoint_dir = checkpoint_dir or CHECKPOINT_DIR
+    for run_id in reversed(list_runs(checkpoint_dir)):
+        if not os.path.exists(os.path.join(checkpoint_dir, run_id, RUN_COMPLETE_MARKER)):
+            return run_id
+    return None
+
+
+def prune_checkpoints(keep=None, checkpoint_dir=None):
+    """Removes all but the newest keep runs."""
+    checkpoint_dir = checkpoint_dir or CHECKPOINT_DIR
+    keep = CHECKPOINT_KEEP_RUNS if keep is None else keep
+    runs = list_runs(checkpoint_dir)
+    for run_id in runs[:max(len(runs) - keep, 0)]:
+        shutil.rmtree(os.path.join(checkpoint_dir, run_id), ignore_errors=True)
+        logger.debug(f"Pruned checkpoints of run {run_id}")
+
+
+def open_checkpoint(resume=None, checkpoint_dir=None):
+    """Returns the checkpoint of a new run, or of the run being resumed.
+
+    resume is a run id, or True for the latest run that did not finish; None when checkpoints are disabled.
+    """
+    checkpoint_dir = checkpoint_dir or CHECKPOINT_DIR
+    if not checkpoint_dir:
+        if resume:
+            logger.warning("Checkpoints are disabled (CHECKPOINT_DIR is empty); running every step")
+        return None
+
+    if resume:
+        run_id = resume if isinstance(resume, str) else latest_incomplete_run(checkpoint_dir)
+        if run_id and os.path.isdir(os.path.join(checkpoint_dir, run_id)):
+            logger.info(f"Resuming run {run_id}")
+            return RunCheckpoint(run_id, checkpoint_dir)
+        logger.warning(f"No unfinished run to resume ({resume}); starting a new run")
+
+    prune_checkpoints(checkpoint_dir=checkpoint_dir)
+    return RunCheckpoint(metrics.current_run_id(), checkpoint_dir)
+
+
+def checkpointed_steps(steps, checkpoint):
+    """Wraps steps so finished ones replay their saved output and the others save theirs on success."""
+    if checkpoint is None:
+        return steps
+
+    def wrap(step):
+        def run(*args):
+            if checkpoint.is_done(step.name):
+                logger.info(f"Step '{step.name}' already completed in run {checkpoint.run_id}, reusing its checkpoint")
+                return checkpoint.load(step.name)
+            value = step.func(*args)
+            checkpoint.save(step.name, value)
+            return value
+
+        return PipelineStep(
+            step.name, run, depends_on=step.depends_on, inputs=step.inputs,
+            retries=step.retries, retry_delay=step.retry_delay
+        )
+
+    return [wrap(step) for step in steps]
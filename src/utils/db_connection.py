@@ -1,7 +1,12 @@
 from dotenv import load_dotenv
 import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+from contextlib import contextmanager
+import threading
 import os
 from src.utils.logger_config import AppLogger
+from src.utils.metrics import MetricsCursor
 
 # Load environment variables
 load_dotenv()
@@ -18,12 +23,72 @@ DB_CONFIG = {
     'port': os.getenv("DB_PORT")
 }
 
+# Pool sizing
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "8"))
+
+# Seconds a checkout waits for a free pooled connection before giving up
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "300"))
+
+# Session-level settings applied once per physical connection
+SESSION_SETTINGS = {
+    'statement_timeout': os.getenv("DB_STATEMENT_TIMEOUT"),
+    'synchronous_commit': os.getenv("DB_SYNCHRONOUS_COMMIT"),
+    'work_mem': os.getenv("DB_WORK_MEM")
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Tables found to be partitioned parents (SQL_query/PARTITIONED_SCHEMA), looked up once per process
+_partitioned_tables = {}
+
+
+class PipelineConnection(extensions.connection):
+    """psycopg2 connection that remembers the server-side prepared statements of its session and meters its cursors."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
+        self.cursor_factory = MetricsCursor
+
+
+class BlockingConnectionPool(ThreadedConnectionPool):
+    """ThreadedConnectionPool whose getconn() waits up to DB_POOL_TIMEOUT for a connection to be handed back
+    instead of raising PoolError as soon as all DB_POOL_MAX connections are checked out."""
+
+    def __init__(self, minconn, maxconn, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT):
+            raise PoolError(f"no pooled connection became free within {DB_POOL_TIMEOUT} seconds")
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+
+def session_options():
+    """Builds the libpq 'options' string carrying the configured session settings."""
+    return " ".join(
+        f"-c {name}={value}" for name, value in SESSION_SETTINGS.items() if value
+    )
+
 
 def get_connection():
     """Establish and return a PostgreSQL DB connection."""
     try:
         logger.info(f"Attempting database connection to host={DB_CONFIG['host']} port={DB_CONFIG['port']} dbname={DB_CONFIG['dbname']}")
-        conn = psycopg2.connect(**DB_CONFIG)
+        conn = psycopg2.connect(**DB_CONFIG, options=session_options(), connection_factory=PipelineConnection)
         logger.info("Database connection established successfully")
         return conn
     except psycopg2.OperationalError as e:
@@ -32,3 +97,69 @@ def get_connection():
     except Exception as e:
         logger.exception("Unexpected error during database connection")
         raise
+
+
+def get_pool():
+    """Returns the process-wide connection pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                logger.info(f"Creating database connection pool (min={DB_POOL_MIN}, max={DB_POOL_MAX}) to host={DB_CONFIG['host']} port={DB_CONFIG['port']} dbname={DB_CONFIG['dbname']}")
+                _pool = BlockingConnectionPool(
+                    DB_POOL_MIN, DB_POOL_MAX,
+                    **DB_CONFIG,
+                    options=session_options(),
+                    connection_factory=PipelineConnection
+                )
+            except psycopg2.OperationalError as e:
+                logger.exception("Operational error while creating the connection pool")
+                raise
+    return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """Checks a connection out of the shared pool and hands it back when the block exits."""
+    db_pool = get_pool()
+    conn = db_pool.getconn()
+    try:
+        yield conn
+    finally:
+        if conn.closed:
+            db_pool.putconn(conn, close=True)
+        else:
+            # Never hand an open transaction to the next borrower
+            if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            db_pool.putconn(conn)
+
+
+def close_pool():
+    """Closes every pooled connection; the pool is recreated on next use."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            logger.info("Database connection pool closed")
+
+
+def execute_prepared(cur, name, sql, params):
+    """Executes sql ($1-style placeholders) through a server-side prepared statement, preparing it once per session."""
+    prepared = cur.connection.prepared_statements
+    if name not in prepared:
+        cur.execute(f"PREPARE {name} AS {sql}")
+        prepared.add(name)
+    cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+
+
+def is_partitioned(cur, table):
+    """Returns True when table is a declaratively partitioned parent, where ON CONFLICT cannot target its business key."""
+    if table not in _partitioned_tables:
+        cur.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+            (table,)
+        )
+        _partitioned_tables[table] = cur.fetchone()[0]
+    return _partitioned_tables[table]
@@ -1,23 +1,28 @@
 import psycopg2
+from src.utils.db_connection import execute_prepared
 
-def update_etl_metadata(cur, source_table):
+# etl_metadata row stamped whenever the KPI views or rollups change; read-side caches key on it
+KPI_DATA_VERSION = 'kpi_data_version'
+
+def update_etl_metadata(cur, source_table, loaded_at=None):
     """
-    Updates or inserts the last_loaded_at timestamp for a given source_table.
+    Updates or inserts the last_loaded_at timestamp for a given source_table
+    (loaded_at, or the current time when not given).
     """
-    cur.execute("""
+    execute_prepared(cur, "update_etl_metadata", """
         INSERT INTO etl_metadata (table_name, last_loaded_at)
-        VALUES (%s, CURRENT_TIMESTAMP)
+        VALUES ($1, COALESCE($2::timestamp, CURRENT_TIMESTAMP))
         ON CONFLICT (table_name)
-        DO UPDATE SET last_loaded_at = EXCLUDED.last_loaded_at;
-    """, (source_table,))
+        DO UPDATE SET last_loaded_at = EXCLUDED.last_loaded_at
+    """, (source_table, loaded_at))
 
 def get_etl_metadata(cur, source_table):
     """
     Fetches the last_loaded_at timestamp for a given source_table.
     Raises an exception if no metadata is found.
     """
-    cur.execute("""
-        SELECT last_loaded_at FROM etl_metadata WHERE table_name = %s;
+    execute_prepared(cur, "get_etl_metadata", """
+        SELECT last_loaded_at FROM etl_metadata WHERE table_name = $1
     """, (source_table,))
     
     result = cur.fetchone()
@@ -1,45 +1,84 @@
+import atexit
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import multiprocessing.util
+import queue
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 import os
 from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Records below this level are dropped before anything is formatted (DEBUG, INFO, WARNING, ...)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+
+LOG_DIR = os.path.join("artifacts", "logs")
+
+LOG_FORMAT = '%(asctime)s | %(levelname)s | %(name)s | %(message)s'
+
+# Background listeners writing the queued records, per logger name
+_listeners = {}
+
+
+def build_handlers(log_dir=LOG_DIR, stream=None):
+    """Builds the daily rotating file handler and the console handler the records end up in."""
+    os.makedirs(log_dir, exist_ok=True)
+    log_filename = os.path.join(log_dir, f"{datetime.now().strftime('%Y-%m-%d')}.log")
+
+    # File handler
+    file_handler = TimedRotatingFileHandler(
+        filename=log_filename,
+        when="midnight",
+        interval=1,
+        backupCount=7
+    )
+    file_handler.suffix = "%Y-%m-%d"
+
+    # Console handler
+    console_handler = logging.StreamHandler(stream)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+    return [file_handler, console_handler]
+
+
+def attach_handlers(logger, handlers, use_queue=True):
+    """Routes the logger's records to handlers; with use_queue the calling thread only enqueues them
+    and a QueueListener thread does the formatting and the writes."""
+    if not use_queue:
+        for handler in handlers:
+            logger.addHandler(handler)
+        return
+
+    record_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(record_queue))
+    listener = QueueListener(record_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners[logger.name] = listener
+
+
+def stop_logging():
+    """Writes out every queued record and stops the listener threads."""
+    while _listeners:
+        _, listener = _listeners.popitem()
+        listener.stop()
+
+
+# Pending records are written out on exit, including in worker processes, which skip atexit
+atexit.register(stop_logging)
+multiprocessing.util.Finalize(None, stop_logging, exitpriority=10)
+
 
 class AppLogger:
     '''Singleton logger configuration class for the application.'''
     def __init__(self, logger_name="app_logger"):
         self.logger = logging.getLogger(logger_name)
-        self.logger.setLevel(logging.DEBUG)
-
-        log_dir = os.path.join("artifacts", "logs")
-        os.makedirs(log_dir, exist_ok=True)
-
-        log_filename = os.path.join(log_dir, f"{datetime.now().strftime('%Y-%m-%d')}.log")
+        self.logger.setLevel(LOG_LEVEL)
 
         # Avoid adding handlers multiple times
         if not self.logger.handlers:
-            # File handler
-            file_handler = TimedRotatingFileHandler(
-                filename=log_filename,
-                when="midnight",
-                interval=1,
-                backupCount=7
-            )
-            file_handler.suffix = "%Y-%m-%d"
-            file_handler.setLevel(logging.DEBUG)
-
-            # Console handler
-            console_handler = logging.StreamHandler()
-            console_handler.setLevel(logging.DEBUG)
-
-            # Formatter
-            formatter = logging.Formatter(
-                '%(asctime)s | %(levelname)s | %(name)s | %(message)s'
-            )
-            file_handler.setFormatter(formatter)
-            console_handler.setFormatter(formatter)
-
-            # Add handlers
-            self.logger.addHandler(file_handler)
-            self.logger.addHandler(console_handler)
+            attach_handlers(self.logger, build_handlers())
 
     def get_logger(self):
         return self.logger
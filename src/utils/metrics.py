@@ -0,0 +1,257 @@
+import contextvars
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from psycopg2 import extensions
+from src.utils.logger_config import AppLogger
+
+logger = AppLogger().get_logger()
+
+load_dotenv()
+
+# Per-run JSON records are written here
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join("artifacts", "metrics"))
+
+# Prometheus textfile (e.g. inside node_exporter's --collector.textfile.directory), rewritten after every run
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", os.path.join(METRICS_DIR, "etl_pipeline.prom"))
+
+# Counters recorded outside a pipeline step are kept under this name
+UNSCOPED = '_unscoped'
+
+# Row counters the writers report; 'written' is an upsert whose insert/update split is unknown
+ROW_KINDS = ('read', 'inserted', 'updated', 'skipped', 'deleted', 'written')
+
+# Row kinds that change a table, tallied per table when the writer names it
+CHANGED_ROW_KINDS = ('inserted', 'updated', 'deleted', 'written')
+
+_current_step = contextvars.ContextVar('metrics_step', default=UNSCOPED)
+_lock = threading.Lock()
+_run = None
+
+
+class StepMetrics:
+    '''Timings and counters accumulated by one pipeline step across its attempts.'''
+    def __init__(self, name):
+        self.name = name
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.counters = {}
+
+    def as_dict(self):
+        return {
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            **{name: round(value, 4) if isinstance(value, float) else value for name, value in sorted(self.counters.items())}
+        }
+
+
+class RunMetrics:
+    '''Everything recorded during one pipeline run.'''
+    def __init__(self):
+        # Microseconds keep runs started within the same second (e.g. watch mode retries) apart
+        self.run_id = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+        self.started_at = time.time()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.steps = {}
+        self.tables = {}
+
+    def step(self, name):
+        if name not in self.steps:
+            self.steps[name] = StepMetrics(name)
+        return self.steps[name]
+
+
+def _get_run():
+    global _run
+    if _run is None:
+        _run = RunMetrics()
+    return _run
+
+
+def start_run():
+    """Discards anything recorded so far and starts a new run record."""
+    global _run
+    with _lock:
+        _run = RunMetrics()
+    return _run.run_id
+
+
+def current_run_id():
+    """Identifier of the current run (UTC start time), shared by the metrics record and run artifacts."""
+    with _lock:
+        return _get_run().run_id
+
+
+@contextmanager
+def step_scope(name):
+    """Attributes counters recorded in this thread to step name, and adds its wall and CPU time.
+
+    CPU time is that of the step's own thread; work the step hands to other threads or processes is not included.
+    """
+    token = _current_step.set(name)
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        _current_step.reset(token)
+        with _lock:
+            step = _get_run().step(name)
+            step.wall_seconds += wall
+            step.cpu_seconds += cpu
+
+
+def increment(counter, value=1):
+    """Adds value to a counter of the step running in this thread."""
+    with _lock:
+        counters = _get_run().step(_current_step.get()).counters
+        counters[counter] = counters.get(counter, 0) + value
+
+
+def record_table_changes(table, rows):
+    """Adds rows inserted/updated/deleted in table during this run, whichever step wrote them."""
+    if rows:
+        with _lock:
+            tables = _get_run().tables
+            tables[table] = tables.get(table, 0) + int(rows)
+
+
+def changed_rows(table):
+    """Rows changed in table during this run, as recorded by the writers."""
+    with _lock:
+        return _get_run().tables.get(table, 0)
+
+
+def record_rows(table=None, **counts):
+    """Adds row counts by kind, e.g. record_rows(inserted=10, updated=2).
+    With table, the changed kinds are also added to that table's tally (see record_table_changes)."""
+    for kind, value in counts.items():
+        if kind not in ROW_KINDS:
+            raise ValueError(f"Unknown row counter '{kind}', expected one of {ROW_KINDS}")
+        if value:
+            increment(f"rows_{kind}", int(value))
+    if table is not None:
+        record_table_changes(table, sum(int(counts.get(kind) or 0) for kind in CHANGED_ROW_KINDS))
+
+
+class MetricsCursor(extensions.cursor):
+    """Cursor that counts SQL round trips and the time spent waiting on them."""
+
+    def _timed(self, method, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with _lock:
+                counters = _get_run().step(_current_step.get()).counters
+                counters['sql_round_trips'] = counters.get('sql_round_trips', 0) + 1
+                counters['sql_seconds'] = counters.get('sql_seconds', 0.0) + elapsed
+
+    def execute(self, query, vars=None):
+        return self._timed(extensions.cursor.execute, query, vars)
+
+    def executemany(self, query, vars_list):
+        return self._timed(extensions.cursor.executemany, query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._timed(extensions.cursor.copy_expert, sql, file, size)
+
+    def callproc(self, procname, parameters=None):
+        return self._timed(extensions.cursor.callproc, procname, parameters)
+
+
+def snapshot():
+    """Returns the current run as a plain dict."""
+    with _lock:
+        run = _get_run()
+        return {
+            'run_id': run.run_id,
+            'started_at': datetime.fromtimestamp(run.started_at, timezone.utc).isoformat(timespec='seconds'),
+            'wall_seconds': round(time.perf_counter() - run.wall_start, 4),
+            'cpu_seconds': round(time.process_time() - run.cpu_start, 4),
+            'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            'steps': {name: step.as_dict() for name, step in run.steps.items()},
+            'tables': dict(sorted(run.tables.items()))
+        }
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(record):
+    """Renders a run record in the Prometheus text exposition format."""
+    lines = []
+
+    def gauge(name, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+    gauge('etl_run_success', "1 if every pipeline step succeeded", [({}, int(record['success']))])
+    gauge('etl_run_timestamp_seconds', "Unix time the run started", [({}, int(record['started_unix']))])
+    gauge('etl_run_wall_seconds', "Wall-clock duration of the run", [({}, record['wall_seconds'])])
+    gauge('etl_run_cpu_seconds', "Process CPU time used by the run", [({}, record['cpu_seconds'])])
+    gauge('etl_run_max_rss_bytes', "Peak resident set size of the process", [({}, record['max_rss_bytes'])])
+
+    steps = record['steps']
+    gauge('etl_step_success', "1 if the step succeeded",
+          [({'step': name}, int(step.get('status') == 'succeeded')) for name, step in steps.items()])
+
+    counters = sorted({key for step in steps.values() for key, value in step.items() if isinstance(value, (int, float)) and key != 'attempts'})
+    for counter in counters:
+        # Per-run values, so gauges; the _total suffix is reserved for Prometheus counters
+        gauge(f"etl_step_{counter}", f"Per-step {counter.replace('_', ' ')}",
+              [({'step': name}, step[counter]) for name, step in steps.items() if counter in step])
+
+    tables = record.get('tables', {})
+    if tables:
+        gauge('etl_table_changed_rows', "Rows inserted, updated or deleted per table",
+              [({'table': table}, rows) for table, rows in tables.items()])
+
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as fh:
+        fh.write(text)
+    os.replace(tmp_path, path)
+
+
+def finish_run(results, metrics_dir=METRICS_DIR, textfile=METRICS_TEXTFILE):
+    """Merges step outcomes into the run record and writes the JSON record and Prometheus textfile."""
+    record = snapshot()
+    with _lock:
+        record['started_unix'] = _get_run().started_at
+
+    for name, result in results.items():
+        step = record['steps'].setdefault(name, {})
+        step['status'] = result.status
+        step['attempts'] = result.attempts
+        if result.error is not None:
+            step['error'] = repr(result.error)
+    record['success'] = all(result.status == 'succeeded' for result in results.values())
+
+    try:
+        json_path = os.path.join(metrics_dir, f"run_{record['run_id']}.json")
+        _write_atomic(json_path, json.dumps(record, indent=2))
+        _write_atomic(textfile, render_prometheus(record))
+        logger.info(f"Run metrics written to {json_path} and {textfile}")
+    except OSError as e:
+        # Metrics must never fail an otherwise good run
+        logger.exception(f"Could not write run metrics: {e}")
+
+    return record
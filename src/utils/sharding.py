@@ -0,0 +1,54 @@
+import os
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from dotenv import load_dotenv
+from src.utils.logger_config import AppLogger
+
+logger = AppLogger().get_logger()
+
+load_dotenv()
+
+# Processes cleaning and rendering ticket shards and connections loading them into staging;
+# 0 or 1 keeps the single-process, single-connection upload
+PARALLEL_WORKERS = int(os.getenv("PARALLEL_WORKERS", "0"))
+
+# Smaller frames stay on the single-process path: starting the worker processes costs seconds
+PARALLEL_MIN_ROWS = int(os.getenv("PARALLEL_MIN_ROWS", "100000"))
+
+
+def ticket_shards(ticket_ids, shards):
+    """Shard number of each ticket: a stable hash of the stripped ticket_id, so every row of a ticket
+    lands in the same shard in any process."""
+    keys = pd.Series(ticket_ids).astype(str).str.strip().to_numpy(dtype=object)
+    return pd.util.hash_array(keys) % shards
+
+
+def split_by_ticket(df, shards):
+    """Splits df into shards by ticket_id; each shard keeps the original index and row order."""
+    codes = ticket_shards(df['ticket_id'], shards)
+    return [df[codes == shard] for shard in range(shards)]
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def process_pool(workers):
+    """Process pool of the given size for the shard workers, started once and reused by later uploads
+    (e.g. in watch mode). Spawned, so no connection or lock is inherited."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            logger.info(f"Starting {workers} shard worker processes")
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return pool
+
+
+def discard_pool(workers):
+    """Shuts a pool down, e.g. after a worker died; the next process_pool() call starts a new one."""
+    with _pools_lock:
+        pool = _pools.pop(workers, None)
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
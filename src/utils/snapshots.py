@@ -0,0 +1,142 @@
+import contextvars
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+from src.utils.logger_config import AppLogger
+from src.utils import metrics
+from src.utils.change_detection import compute_fingerprints
+
+logger = AppLogger().get_logger()
+
+load_dotenv()
+
+# Snapshots land in <SNAPSHOT_DIR>/run_ts=<run id>/<name>/part-NNNNN.parquet; an empty value disables them
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join("artifacts", "snapshots"))
+SNAPSHOT_COMPRESSION = os.getenv("SNAPSHOT_COMPRESSION", "zstd")
+
+# Only the most recent runs are kept
+SNAPSHOT_KEEP_RUNS = int(os.getenv("SNAPSHOT_KEEP_RUNS", "30"))
+
+# Column holding the change-detection fingerprint of each row, when requested
+FINGERPRINT_COLUMN = '_row_hash'
+
+RUN_PREFIX = 'run_ts='
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # One writer keeps the parts of a stream in order and leaves the other cores to the pipeline
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='snapshot-writer')
+        return _executor
+
+
+def to_arrow_table(df):
+    """Converts a frame to Arrow, keeping native types and falling back to strings for mixed object columns."""
+    arrays = {}
+    for col in df.columns:
+        series = df[col]
+        try:
+            arrays[col] = pa.array(series, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays[col] = pa.array(series.map(lambda value: None if value is None else str(value)), type=pa.string())
+    return pa.table(arrays)
+
+
+def snapshot_path(name, run_id=None, part=0, snapshot_dir=None):
+    run_id = run_id or metrics.current_run_id()
+    return os.path.join(snapshot_dir or SNAPSHOT_DIR, f"{RUN_PREFIX}{run_id}", name, f"part-{part:05d}.parquet")
+
+
+def _write(df, path, fingerprints):
+    start = time.perf_counter()
+    if fingerprints:
+        df = df.assign(**{FINGERPRINT_COLUMN: compute_fingerprints(df)})
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(to_arrow_table(df), tmp_path, compression=SNAPSHOT_COMPRESSION)
+    os.replace(tmp_path, path)
+
+    size = os.path.getsize(path)
+    metrics.increment('snapshot_bytes', size)
+    metrics.increment('snapshot_seconds', time.perf_counter() - start)
+    logger.debug(f"Snapshot written: {path} ({len(df)} rows, {size} bytes)")
+
+
+def _done(future):
+    with _executor_lock:
+        _pending.discard(future)
+    if future.exception() is not None:
+        logger.error(f"Snapshot write failed: {future.exception()!r}")
+
+
+def write_snapshot(df, name, part=0, fingerprints=False):
+    """Queues df to be written as a Parquet part of this run's snapshot and returns immediately."""
+    if not SNAPSHOT_DIR or df is None or df.empty:
+        return None
+
+    # A lazy copy that later in-place changes by the caller cannot reach (copy-on-write, pandas >= 3)
+    frame = df.copy(deep=False)
+    path = snapshot_path(name, part=part)
+
+    # The writer reports its metrics against the step that queued it
+    future = _get_executor().submit(contextvars.copy_context().run, _write, frame, path, fingerprints)
+    with _executor_lock:
+        _pending.add(future)
+    future.add_done_callback(_done)
+    return future
+
+
+def flush_snapshots(timeout=None):
+    """Waits for queued snapshot writes, then drops runs beyond SNAPSHOT_KEEP_RUNS."""
+    with _executor_lock:
+        pending = set(_pending)
+    if pending:
+        wait(pending, timeout=timeout)
+    prune_snapshots()
+
+
+def list_runs(snapshot_dir=None):
+    """Returns the run ids that have snapshots, oldest first."""
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    if not snapshot_dir or not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(entry[len(RUN_PREFIX):] for entry in os.listdir(snapshot_dir) if entry.startswith(RUN_PREFIX))
+
+
+def prune_snapshots(keep=SNAPSHOT_KEEP_RUNS, snapshot_dir=None):
+    """Removes all but the newest keep runs."""
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    runs = list_runs(snapshot_dir)
+    for run_id in runs[:max(len(runs) - keep, 0)]:
+        shutil.rmtree(os.path.join(snapshot_dir, f"{RUN_PREFIX}{run_id}"), ignore_errors=True)
+        logger.debug(f"Pruned snapshot run {run_id}")
+
+
+def read_snapshot(name, run_id=None, columns=None, snapshot_dir=None):
+    """Reads a snapshot back with its original dtypes; defaults to the latest run that has it."""
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    runs = [run_id] if run_id else reversed(list_runs(snapshot_dir))
+    for run in runs:
+        path = os.path.join(snapshot_dir, f"{RUN_PREFIX}{run}", name)
+        if os.path.isdir(path):
+            return pq.read_table(path, columns=columns).to_pandas()
+    raise FileNotFoundError(f"No snapshot '{name}' found in {snapshot_dir}")
+
+
+def read_fingerprints(name='tracker', run_id=None, snapshot_dir=None):
+    """Returns a snapshot's ticket_id -> row_hash map, shaped like change_detection.load_fingerprints."""
+    df = read_snapshot(name, run_id, columns=['ticket_id', FINGERPRINT_COLUMN], snapshot_dir=snapshot_dir)
+    return pd.Series(df[FINGERPRINT_COLUMN].to_numpy(), index=df['ticket_id'].astype(str).to_numpy(), dtype='int64')
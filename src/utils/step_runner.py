@@ -0,0 +1,139 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from src.utils.logger_config import AppLogger
+from src.utils.metrics import step_scope
+
+logger = AppLogger().get_logger()
+
+
+class PipelineStep:
+    '''A named unit of pipeline work with declared dependencies and a retry policy.'''
+    def __init__(self, name, func, depends_on=(), inputs=(), retries=0, retry_delay=5.0):
+        self.name = name
+        self.func = func
+        # Steps that must succeed before this one starts
+        self.depends_on = tuple(depends_on) + tuple(dep for dep in inputs if dep not in depends_on)
+        # Dependencies whose return values are passed to func, in order
+        self.inputs = tuple(inputs)
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+
+class StepResult:
+    '''Outcome of a single step: succeeded, failed or skipped (an upstream step failed).'''
+    def __init__(self, name, status, value=None, error=None, seconds=0.0, attempts=0):
+        self.name = name
+        self.status = status
+        self.value = value
+        self.error = error
+        self.seconds = seconds
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f"StepResult({self.name!r}, {self.status}, {self.seconds:.2f}s, attempts={self.attempts})"
+
+
+def _run_with_retries(step, args):
+    """Runs one step, retrying on failure according to its policy."""
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            logger.info(f"Step '{step.name}' started (attempt {attempt}/{step.retries + 1})")
+            with step_scope(step.name):
+                value = step.func(*args)
+            seconds = time.perf_counter() - start
+            logger.info(f"Step '{step.name}' succeeded in {seconds:.2f}s")
+            return StepResult(step.name, 'succeeded', value=value, seconds=seconds, attempts=attempt)
+        except Exception as e:
+            if attempt > step.retries:
+                seconds = time.perf_counter() - start
+                logger.exception(f"Step '{step.name}' failed after {attempt} attempt(s)")
+                return StepResult(step.name, 'failed', error=e, seconds=seconds, attempts=attempt)
+            logger.warning(f"Step '{step.name}' failed on attempt {attempt}: {e}. Retrying in {step.retry_delay}s")
+            time.sleep(step.retry_delay)
+
+
+def validate_steps(steps):
+    """Checks that dependencies exist and the graph is acyclic."""
+    by_name = {step.name: step for step in steps}
+    if len(by_name) != len(steps):
+        raise ValueError("Duplicate step names in pipeline")
+
+    for step in steps:
+        missing = [dep for dep in step.depends_on if dep not in by_name]
+        if missing:
+            raise ValueError(f"Step '{step.name}' depends on unknown steps: {missing}")
+
+    visiting, done = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle detected at step '{name}'")
+        visiting.add(name)
+        for dep in by_name[name].depends_on:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for step in steps:
+        visit(step.name)
+
+
+def select_downstream(steps, roots):
+    """Returns the roots and every step depending on them, directly or not. Dependencies on steps
+    left out are dropped: they count as already satisfied (e.g. a micro-batch that only reloads one source)."""
+    selected = {step.name for step in steps if step.name in roots}
+    grown = True
+    while grown:
+        grown = False
+        for step in steps:
+            if step.name not in selected and any(dep in selected for dep in step.depends_on):
+                selected.add(step.name)
+                grown = True
+
+    return [
+        PipelineStep(
+            step.name, step.func, depends_on=[dep for dep in step.depends_on if dep in selected],
+            inputs=step.inputs, retries=step.retries, retry_delay=step.retry_delay
+        )
+        for step in steps if step.name in selected
+    ]
+
+
+def run_steps(steps, max_workers=4):
+    """Runs steps concurrently as their dependencies complete; a failure skips only its downstream branch."""
+    validate_steps(steps)
+    pending = {step.name: step for step in steps}
+    results = {}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='step') as executor:
+        while pending or running:
+            # Skip steps whose upstream failed or was skipped
+            for name, step in list(pending.items()):
+                blocked = [dep for dep in step.depends_on if dep in results and results[dep].status != 'succeeded']
+                if blocked:
+                    logger.warning(f"Step '{name}' skipped because upstream step(s) {blocked} did not succeed")
+                    results[name] = StepResult(name, 'skipped')
+                    del pending[name]
+
+            # Start every step whose dependencies have all succeeded
+            for name, step in list(pending.items()):
+                if all(dep in results for dep in step.depends_on):
+                    args = [results[dep].value for dep in step.inputs]
+                    running[executor.submit(_run_with_retries, step, args)] = name
+                    del pending[name]
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                results[name] = future.result()
+
+    return results
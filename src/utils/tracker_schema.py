@@ -0,0 +1,65 @@
+import logging
+import pandas as pd
+from src.utils.logger_config import AppLogger
+
+logger = AppLogger().get_logger()
+
+# Free text is kept as Arrow-backed strings; missing values are pd.NA
+TEXT_DTYPE = pd.StringDtype('pyarrow')
+
+# Counts are nullable 32-bit integers (INTEGER in the work tables)
+COUNT_DTYPE = 'Int32'
+
+# Text columns that repeat a small set of values: statuses, people, clients, sources, product types
+CATEGORY_COLUMNS = [
+    'source', 'client', 'vendor_type', 'category', 'nature_of_business', 'city', 'region',
+    'status_bd', 'status_crm', 'raw_qc_status', 'ticket_status', 'catalogue_associate',
+    'prod_type_s', 'status_s', 'assignee_s',
+    'prod_type_c', 'status_c', 'assignee_c',
+    'prod_type_qc', 'status_qc', 'assignee_qc',
+    'prod_type_u', 'status_u', 'assignee_u',
+]
+
+COUNT_COLUMNS = [
+    'no_of_categories_s', 'no_of_categories_c', 'no_of_categories_u',
+    'no_of_products_c', 'no_of_products_u', 'no_of_products_s'
+]
+
+
+def to_text(series):
+    """Converts a column to Arrow strings; numbers and dates read from the sheet keep their str() form
+    and blank cells (None, NaN, NaT) stay missing."""
+    if isinstance(series.dtype, pd.StringDtype) and series.dtype.storage == 'pyarrow':
+        return series
+    if series.dtype == object:
+        series = series.map(lambda value: value if isinstance(value, str) else str(value), na_action='ignore')
+    return series.astype(TEXT_DTYPE)
+
+
+def to_category(series):
+    """Converts a column to a categorical with string categories."""
+    if isinstance(series.dtype, pd.CategoricalDtype) and isinstance(series.cat.categories.dtype, pd.StringDtype):
+        return series
+    return to_text(series.astype(object) if isinstance(series.dtype, pd.CategoricalDtype) else series).astype('category')
+
+
+def apply_tracker_schema(df):
+    """Types a cleaned tracker frame: categoricals for repeated text, Int32 counts, datetime64 dates
+    (left as parsed) and Arrow strings for the remaining text. Values are only turned into DB
+    parameters by the writers (COPY / to_db_rows)."""
+    typed = {}
+    for col in df.columns:
+        series = df[col]
+        if col in CATEGORY_COLUMNS:
+            typed[col] = to_category(series)
+        elif col in COUNT_COLUMNS:
+            typed[col] = series if series.dtype == COUNT_DTYPE else pd.to_numeric(series).astype(COUNT_DTYPE)
+        elif pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            typed[col] = series
+        else:
+            typed[col] = to_text(series)
+
+    df = df.assign(**typed)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Applied tracker schema: {df.memory_usage(deep=True).sum() / max(len(df), 1):.0f} bytes per row")
+    return df
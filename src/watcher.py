@@ -0,0 +1,329 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from src import data_importer, folder_details_extraction
+from src.utils.logger_config import AppLogger
+from src.utils.step_runner import select_downstream
+
+logger = AppLogger().get_logger()
+
+load_dotenv()
+
+# Drive page token, known workbook revisions and the bucket listing watermark, kept across restarts
+WATCH_STATE_PATH = os.getenv("WATCH_STATE_PATH", os.path.join("artifacts", "watch_state.json"))
+
+# How often each change feed is polled
+WATCH_DRIVE_POLL_SECONDS = float(os.getenv("WATCH_DRIVE_POLL_SECONDS", "30"))
+WATCH_GCS_POLL_SECONDS = float(os.getenv("WATCH_GCS_POLL_SECONDS", "60"))
+
+# A micro-batch starts once no change arrived for this long ...
+WATCH_DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS", "10"))
+
+# ... or at the latest this long after the first change it carries
+WATCH_MAX_DELAY_SECONDS = float(os.getenv("WATCH_MAX_DELAY_SECONDS", "60"))
+
+# Full runs reconcile anything a feed missed (partitions, deleted files); 0 disables the periodic ones
+WATCH_FULL_RUN_SECONDS = float(os.getenv("WATCH_FULL_RUN_SECONDS", str(6 * 3600)))
+
+# Whether watching starts with a full run, catching up on what changed while nothing was watching
+WATCH_INITIAL_RUN = os.getenv("WATCH_INITIAL_RUN", "true").lower() == "true"
+
+# Change kind -> steps that reload it; the micro-batch is these steps and everything downstream of them
+TRIGGER_ROOTS = {
+    'sheet': ['import_sheet', 'upload_sheet'],
+    'folders': ['extract_folders', 'upload_folders'],
+}
+
+DRIVE_CHANGE_FIELDS = 'nextPageToken,newStartPageToken,changes(fileId,removed,file(headRevisionId,modifiedTime,parents,trashed))'
+
+
+class ChangeEvent:
+    '''One change reported by a source: its kind (a TRIGGER_ROOTS key) and what changed.'''
+    def __init__(self, kind, key, detail=None):
+        self.kind = kind
+        self.key = key
+        self.detail = detail
+
+    def __repr__(self):
+        return f"ChangeEvent({self.kind!r}, {self.key!r})"
+
+
+class DriveChangesSource:
+    '''Polls the Drive Changes API from a persisted page token and reports new revisions of the tracker workbooks.'''
+    kind = 'sheet'
+    name = 'drive'
+
+    def __init__(self, service, file_ids=None, folder_id=None, poll_seconds=None):
+        self.service = service
+        self.file_ids = set(data_importer.DRIVE_FILE_IDS if file_ids is None else file_ids) or {data_importer.FILE_ID}
+        self.folder_id = data_importer.DRIVE_FOLDER_ID if folder_id is None else folder_id
+        self.poll_seconds = WATCH_DRIVE_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.page_token = None
+        self.revisions = {}
+
+    def is_tracked(self, change):
+        if change.get('fileId') in self.file_ids:
+            return True
+        return bool(self.folder_id) and self.folder_id in (change.get('file') or {}).get('parents', [])
+
+    def poll(self):
+        if self.page_token is None:
+            # Nothing before this token is reported; the startup full run covers it
+            self.page_token = self.service.changes().getStartPageToken(supportsAllDrives=True).execute()['startPageToken']
+            logger.info(f"Drive changes feed starts at page token {self.page_token}")
+            return []
+
+        # Revisions and the token are only taken over once every page was read, so a failing page re-reads them all
+        events, revisions, new_start_token = [], {}, None
+        page_token = self.page_token
+        while page_token:
+            response = self.service.changes().list(
+                pageToken=page_token, fields=DRIVE_CHANGE_FIELDS, pageSize=1000, spaces='drive',
+                supportsAllDrives=True, includeItemsFromAllDrives=True
+            ).execute()
+            for change in response.get('changes', []):
+                file_ = change.get('file') or {}
+                if change.get('removed') or file_.get('trashed') or not self.is_tracked(change):
+                    continue
+                # Renames and sharing changes keep the revision and need no reload
+                revision = file_.get('headRevisionId') or file_.get('modifiedTime')
+                if revision and revisions.get(change['fileId'], self.revisions.get(change['fileId'])) != revision:
+                    revisions[change['fileId']] = revision
+                    events.append(ChangeEvent(self.kind, change['fileId'], revision))
+            page_token = response.get('nextPageToken')
+            new_start_token = response.get('newStartPageToken') or new_start_token
+
+        self.revisions.update(revisions)
+        if new_start_token:
+            self.page_token = new_start_token
+        return events
+
+    def get_state(self):
+        return {'page_token': self.page_token, 'revisions': self.revisions}
+
+    def set_state(self, state):
+        self.page_token = state.get('page_token')
+        self.revisions = dict(state.get('revisions', {}))
+
+
+class GcsListingSource:
+    '''Lists the bucket prefix and reports xlsx objects updated after the listing watermark.'''
+    kind = 'folders'
+    name = 'gcs'
+
+    def __init__(self, gcs_bucket, prefix=None, poll_seconds=None):
+        self.gcs_bucket = gcs_bucket
+        self.prefix = folder_details_extraction.PREFIX if prefix is None else prefix
+        self.poll_seconds = WATCH_GCS_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.watermark = None
+
+    def poll(self):
+        blobs = [
+            blob for blob in folder_details_extraction.scan_bucket(self.gcs_bucket, self.prefix)
+            if blob.name.endswith('.xlsx')
+        ]
+        if self.watermark is None:
+            # The first listing only sets the watermark; the startup full run covers what is already there
+            self.watermark = max((blob.updated for blob in blobs), default=datetime.now(timezone.utc))
+            logger.info(f"GCS listing watermark starts at {self.watermark.isoformat()} ({len(blobs)} objects)")
+            return []
+
+        new_blobs = [blob for blob in blobs if blob.updated > self.watermark]
+        if new_blobs:
+            self.watermark = max(blob.updated for blob in new_blobs)
+        return [ChangeEvent(self.kind, blob.name, blob.updated.isoformat()) for blob in new_blobs]
+
+    def get_state(self):
+        return {'watermark': self.watermark.isoformat() if self.watermark else None}
+
+    def set_state(self, state):
+        watermark = state.get('watermark')
+        self.watermark = datetime.fromisoformat(watermark) if watermark else None
+
+
+class QueueSource:
+    '''Changes pushed by a notification channel (Pub/Sub bucket notifications, Drive push webhooks):
+    the subscriber calls notify() from its own thread and the watcher drains them at each poll.'''
+    def __init__(self, kind, name=None, poll_seconds=1.0):
+        self.kind = kind
+        self.name = name or f"{kind}_notifications"
+        self.poll_seconds = poll_seconds
+        self._events = queue.Queue()
+
+    def notify(self, key, detail=None):
+        self._events.put(ChangeEvent(self.kind, key, detail))
+
+    def poll(self):
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def get_state(self):
+        return {}
+
+    def set_state(self, state):
+        pass
+
+
+def load_state(path=WATCH_STATE_PATH):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable watch state at {path}: {e}")
+        return {}
+
+
+def save_state(state, path=WATCH_STATE_PATH):
+    """Atomically writes the sources' feed positions."""
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as fh:
+        json.dump(state, fh)
+    os.replace(tmp_path, path)
+
+
+class Watcher:
+    '''Polls the change sources and runs the affected steps in debounced micro-batches.
+
+    Changes arriving while a batch runs are coalesced into the next one. Feed positions are saved only
+    once every change read so far has been loaded, so a restart re-reads anything not yet loaded.
+    '''
+    def __init__(self, sources, build_steps, run_batch, debounce_seconds=None, max_delay_seconds=None,
+                 full_run_seconds=None, initial_run=None, state_path=None):
+        self.sources = sources
+        self.build_steps = build_steps
+        self.run_batch = run_batch
+        self.debounce_seconds = WATCH_DEBOUNCE_SECONDS if debounce_seconds is None else debounce_seconds
+        self.max_delay_seconds = WATCH_MAX_DELAY_SECONDS if max_delay_seconds is None else max_delay_seconds
+        self.full_run_seconds = WATCH_FULL_RUN_SECONDS if full_run_seconds is None else full_run_seconds
+        self.initial_run = WATCH_INITIAL_RUN if initial_run is None else initial_run
+        self.state_path = WATCH_STATE_PATH if state_path is None else state_path
+
+        # kind -> [events]; first/last arrival time of the pending events
+        self.pending = {}
+        self.first_event_at = None
+        self.last_event_at = None
+        self.retry_at = 0.0
+        self.next_poll_at = {source.name: 0.0 for source in sources}
+        self.next_full_run_at = 0.0 if self.initial_run else self._full_run_after(time.monotonic())
+        self.stats = {'polls': 0, 'poll_errors': 0, 'events': 0, 'micro_batches': 0, 'full_runs': 0, 'failed_batches': 0}
+
+        state = load_state(self.state_path)
+        for source in sources:
+            source.set_state(state.get(source.name, {}))
+
+    def _full_run_after(self, now):
+        return now + self.full_run_seconds if self.full_run_seconds > 0 else float('inf')
+
+    def poll_sources(self, now, force=False):
+        for source in self.sources:
+            if not force and now < self.next_poll_at[source.name]:
+                continue
+            self.next_poll_at[source.name] = now + source.poll_seconds
+            self.stats['polls'] += 1
+            try:
+                events = source.poll()
+            except Exception:
+                # A feed outage delays its changes until the next poll; the other feeds keep going
+                self.stats['poll_errors'] += 1
+                logger.exception(f"Polling change source '{source.name}' failed")
+                continue
+            if events:
+                logger.info(f"{len(events)} change(s) from '{source.name}': {events[:5]}")
+                self.add_events(events, now)
+
+    def add_events(self, events, now):
+        for event in events:
+            self.pending.setdefault(event.kind, []).append(event)
+        self.stats['events'] += len(events)
+        self.first_event_at = self.first_event_at if self.first_event_at is not None else now
+        self.last_event_at = now
+
+    def batch_due_at(self):
+        if not self.pending:
+            return float('inf')
+        due_at = min(self.last_event_at + self.debounce_seconds, self.first_event_at + self.max_delay_seconds)
+        return max(due_at, self.retry_at)
+
+    def save_positions(self):
+        save_state({source.name: source.get_state() for source in self.sources}, self.state_path)
+
+    def run_steps(self, steps, label):
+        start = time.perf_counter()
+        try:
+            succeeded = self.run_batch(steps)
+        except Exception:
+            logger.exception(f"Watch {label} failed")
+            succeeded = False
+        logger.info(f"Watch {label} of {len(steps)} steps {'succeeded' if succeeded else 'failed'} in {time.perf_counter() - start:.2f}s")
+        return succeeded
+
+    def tick(self, now=None):
+        """Polls the sources that are due, then runs a full run or a micro-batch when one is due.
+        Returns the kind of batch run ('full', 'micro') or None."""
+        now = time.monotonic() if now is None else now
+        self.poll_sources(now)
+
+        if now >= self.next_full_run_at:
+            # A full run loads every pending change too
+            self.pending, self.first_event_at, self.last_event_at = {}, None, None
+            succeeded = self.run_steps(self.build_steps(), 'full run')
+            self.stats['full_runs'] += 1
+            self.stats['failed_batches'] += not succeeded
+            after = time.monotonic()
+            self.next_full_run_at = self._full_run_after(after) if succeeded else after + self.max_delay_seconds
+            if succeeded:
+                self.save_positions()
+            return 'full'
+
+        if now < self.batch_due_at():
+            return None
+
+        # A last look at every feed, so changes that landed on the other feeds since their last poll join this batch
+        self.poll_sources(now, force=True)
+        batch, self.pending, self.first_event_at, self.last_event_at = self.pending, {}, None, None
+        roots = [root for kind in batch for root in TRIGGER_ROOTS[kind]]
+        steps = select_downstream(self.build_steps(), roots)
+        succeeded = self.run_steps(steps, f"micro-batch ({', '.join(f'{kind}: {len(events)}' for kind, events in batch.items())})")
+        self.stats['micro_batches'] += 1
+        if succeeded:
+            self.save_positions()
+        else:
+            # Retried after the max delay, together with whatever arrives meanwhile
+            self.stats['failed_batches'] += 1
+            self.add_events([event for events in batch.values() for event in events], time.monotonic())
+            self.retry_at = self.last_event_at + self.max_delay_seconds
+        return 'micro'
+
+    def next_wakeup(self, now):
+        return min([self.batch_due_at(), self.next_full_run_at, *self.next_poll_at.values()]) - now
+
+    def run(self, stop_event=None, max_batches=None):
+        """Watches until stop_event is set (or max_batches batches ran)."""
+        stop_event = stop_event or threading.Event()
+        batches = 0
+        logger.info(
+            f"Watching {', '.join(source.name for source in self.sources)} "
+            f"(debounce {self.debounce_seconds}s, max delay {self.max_delay_seconds}s)"
+        )
+        while not stop_event.is_set():
+            if self.tick():
+                batches += 1
+                logger.info(f"Watch stats: {self.stats}")
+                if max_batches is not None and batches >= max_batches:
+                    break
+            stop_event.wait(max(0.0, min(self.next_wakeup(time.monotonic()), 60.0)))
+        logger.info(f"Watch stopped: {self.stats}")
+        return self.stats
@@ -1,13 +1,105 @@
 import psycopg2
 from datetime import datetime
-from src.utils.db_connection import get_connection
+from src.utils.db_connection import pooled_connection, is_partitioned
 from src.utils.logger_config import AppLogger
 from src.utils.etl_updater import get_etl_metadata, update_etl_metadata
+from src.utils import metrics
 
 logger = AppLogger().get_logger()
 
+# Columns written by the fact delta, in SELECT order
+FACT_COLUMNS = [
+    'ticket_id', 'vendor_name', 'client_id', 'associate_id', 'stage_order', 'stage_status',
+    'ticstatus_id', 'start_date', 'closed_date',
+    'no_of_products', 'no_of_categories', 'duration_hrs', 'last_updated_at'
+]
+
+# Columns refreshed when a (ticket_id, stage_order) fact already exists
+FACT_UPDATE_COLUMNS = [
+    'client_id', 'associate_id', 'stage_status', 'ticstatus_id', 'start_date', 'closed_date',
+    'no_of_products', 'no_of_categories', 'duration_hrs'
+]
+
+
+def build_delta_select(source_table):
+    """Builds the SELECT that unpivots the four stages of each changed row in a single scan."""
+    return f"""
+        SELECT
+            wc.ticket_id,
+            wc.vendor_name,
+            c.client_id,
+            ca.associate_id,
+            s.stage_order,
+            INITCAP(st.stage_status),
+            ts.ticket_status_id,
+            st.start_date,
+            dd.date_id,
+            st.no_of_products,
+            st.no_of_categories,
+            EXTRACT(EPOCH FROM (st.closed_date::timestamp - st.start_date::timestamp)) / 3600.0,
+            NOW()
+        FROM {source_table} wc
+        -- One row per stage S / C / QC / U
+        CROSS JOIN LATERAL (
+            VALUES
+                ('S',  wc.status_s,  wc.catalogue_associate, wc.start_dt_s,  wc.closed_dt_s,     wc.no_of_products_s, wc.no_of_categories_s),
+                ('C',  wc.status_c,  wc.assignee_c,          wc.start_dt_c,  wc.closed_dt_c,     wc.no_of_products_c, wc.no_of_categories_c),
+                ('QC', wc.status_qc, wc.assignee_qc,         wc.start_dt_qc, wc.closed_date_qc,  wc.no_of_products_u, wc.no_of_categories_u),
+                ('U',  wc.status_u,  wc.assignee_u,          wc.start_dt_u,  wc.uploaded_date_u, wc.no_of_products_u, wc.no_of_categories_u)
+        ) AS st (stage, stage_status, associate_name, start_date, closed_date, no_of_products, no_of_categories)
+        LEFT JOIN dim_clients c ON wc.client = c.client_name
+        LEFT JOIN dim_catalog_associates ca 
+            ON COALESCE(NULLIF(TRIM(st.associate_name), ''), 'Unassigned') = ca.associate_name
+        LEFT JOIN dim_stages s ON s.stage = st.stage
+        LEFT JOIN dim_ticket_status ts ON ts.ticket_status = wc.ticket_status
+        LEFT JOIN dim_dates dd ON dd.date_id = st.closed_date
+        -- A literal watermark lets a work table partitioned on insert_date prune to its recent partitions
+        WHERE wc.insert_date > %s
+    """
+
+
+def build_delta_sql(source_table):
+    """Builds the delta INSERT that unpivots the four stages of each changed row in a single scan."""
+    return f"""
+        INSERT INTO fact_catalog_activity ({", ".join(FACT_COLUMNS)})
+        {build_delta_select(source_table)}
+        ON CONFLICT (ticket_id, stage_order) DO UPDATE SET
+            {", ".join(f"{col} = EXCLUDED.{col}" for col in FACT_UPDATE_COLUMNS)},
+            last_updated_at = NOW();
+    """
+
+
+def build_partitioned_delta_sql(source_table):
+    """Builds the same delta for a fact table partitioned on closed_date, where (ticket_id, stage_order)
+    cannot be a unique constraint: existing facts are updated (moving partition if closed_date changed),
+    new ones inserted. Returns the number of rows written."""
+    return f"""
+        WITH delta ({", ".join(FACT_COLUMNS)}) AS (
+            {build_delta_select(source_table)}
+        ),
+        updated AS (
+            UPDATE fact_catalog_activity f
+            SET {", ".join(f"{col} = d.{col}" for col in FACT_UPDATE_COLUMNS)},
+                last_updated_at = NOW()
+            FROM delta d
+            WHERE f.ticket_id = d.ticket_id AND f.stage_order = d.stage_order
+            RETURNING 1
+        ),
+        inserted AS (
+            INSERT INTO fact_catalog_activity ({", ".join(FACT_COLUMNS)})
+            SELECT * FROM delta d
+            WHERE NOT EXISTS (
+                SELECT 1 FROM fact_catalog_activity f
+                WHERE f.ticket_id = d.ticket_id AND f.stage_order = d.stage_order
+            )
+            RETURNING 1
+        )
+        SELECT (SELECT COUNT(*) FROM updated) + (SELECT COUNT(*) FROM inserted);
+    """
+
+
 def run_delta_etl_fact_catalog_activity(conn, source_table):
-    """Runs the delta ETL process for the fact_catalog_activity table."""
+    """Runs the delta ETL process for the fact_catalog_activity table inside the caller's transaction."""
     try:
         with conn.cursor() as cur:
             logger.info(f"Fetching last_loaded_at from etl_metadata for '{source_table}'...")
@@ -16,142 +108,25 @@ def run_delta_etl_fact_catalog_activity(conn, source_table):
 
             logger.info(f"Running delta insert from {source_table}...")
 
-            delta_sql = f"""
-                INSERT INTO fact_catalog_activity (
-                    ticket_id, vendor_name, client_id, associate_id, stage_order, stage_status, 
-                    ticstatus_id, start_date, closed_date, 
-                    no_of_products, no_of_categories, duration_hrs, last_updated_at
-                )
-                SELECT * FROM (
-                    -- Stage S
-                    SELECT
-                        wc.ticket_id,
-                        wc.vendor_name,
-                        c.client_id,
-                        ca.associate_id,
-                        s.stage_order,
-                        INITCAP(wc.status_s),
-                        ts.ticket_status_id,
-                        wc.start_dt_s,
-                        dd.date_id,
-                        wc.no_of_products_s,
-                        wc.no_of_categories_s,
-                        EXTRACT(EPOCH FROM (wc.closed_dt_s::timestamp - wc.start_dt_s::timestamp)) / 3600.0,
-                        NOW()
-                    FROM {source_table} wc
-                    LEFT JOIN dim_clients c ON wc.client = c.client_name
-                    LEFT JOIN dim_catalog_associates ca 
-                        ON COALESCE(NULLIF(TRIM(wc.catalogue_associate), ''), 'Unassigned') = ca.associate_name
-                    LEFT JOIN dim_stages s ON s.stage = 'S'
-                    LEFT JOIN dim_ticket_status ts ON ts.ticket_status = wc.ticket_status
-                    LEFT JOIN dim_dates dd ON dd.date_id = wc.closed_dt_s
-                    WHERE wc.insert_date > %s
-
-                    UNION ALL
-
-                    -- Stage C
-                    SELECT
-                        wc.ticket_id,
-                        wc.vendor_name,
-                        c.client_id,
-                        ca.associate_id,
-                        s.stage_order,
-                        INITCAP(wc.status_c),
-                        ts.ticket_status_id,
-                        wc.start_dt_c,
-                        dd.date_id,
-                        wc.no_of_products_c,
-                        wc.no_of_categories_c,
-                        EXTRACT(EPOCH FROM (wc.closed_dt_c::timestamp - wc.start_dt_c::timestamp)) / 3600.0,
-                        NOW()
-                    FROM {source_table} wc
-                    LEFT JOIN dim_clients c ON wc.client = c.client_name
-                    LEFT JOIN dim_catalog_associates ca 
-                        ON COALESCE(NULLIF(TRIM(wc.assignee_c), ''), 'Unassigned') = ca.associate_name
-                    LEFT JOIN dim_stages s ON s.stage = 'C'
-                    LEFT JOIN dim_ticket_status ts ON ts.ticket_status = wc.ticket_status
-                    LEFT JOIN dim_dates dd ON dd.date_id = wc.closed_dt_c
-                    WHERE wc.insert_date > %s
-
-                    UNION ALL
-
-                    -- Stage QC
-                    SELECT
-                        wc.ticket_id,
-                        wc.vendor_name,
-                        c.client_id,
-                        ca.associate_id,
-                        s.stage_order,
-                        INITCAP(wc.status_qc),
-                        ts.ticket_status_id,
-                        wc.start_dt_qc,
-                        dd.date_id,
-                        wc.no_of_products_u,
-                        wc.no_of_categories_u,
-                        EXTRACT(EPOCH FROM (wc.closed_date_qc::timestamp - wc.start_dt_qc::timestamp)) / 3600.0,
-                        NOW()
-                    FROM {source_table} wc
-                    LEFT JOIN dim_clients c ON wc.client = c.client_name
-                    LEFT JOIN dim_catalog_associates ca 
-                        ON COALESCE(NULLIF(TRIM(wc.assignee_qc), ''), 'Unassigned') = ca.associate_name
-                    LEFT JOIN dim_stages s ON s.stage = 'QC'
-                    LEFT JOIN dim_ticket_status ts ON ts.ticket_status = wc.ticket_status
-                    LEFT JOIN dim_dates dd ON dd.date_id = wc.closed_date_qc
-                    WHERE wc.insert_date > %s
-
-                    UNION ALL
-
-                    -- Stage U
-                    SELECT
-                        wc.ticket_id,
-                        wc.vendor_name,
-                        c.client_id,
-                        ca.associate_id,
-                        s.stage_order,
-                        INITCAP(wc.status_u),
-                        ts.ticket_status_id,
-                        wc.start_dt_u,
-                        dd.date_id,
-                        wc.no_of_products_u,
-                        wc.no_of_categories_u,
-                        EXTRACT(EPOCH FROM (wc.uploaded_date_u::timestamp - wc.start_dt_u::timestamp)) / 3600.0,
-                        NOW()
-                    FROM {source_table} wc
-                    LEFT JOIN dim_clients c ON wc.client = c.client_name
-                    LEFT JOIN dim_catalog_associates ca 
-                        ON COALESCE(NULLIF(TRIM(wc.assignee_u), ''), 'Unassigned') = ca.associate_name
-                    LEFT JOIN dim_stages s ON s.stage = 'U'
-                    LEFT JOIN dim_ticket_status ts ON ts.ticket_status = wc.ticket_status
-                    LEFT JOIN dim_dates dd ON dd.date_id = wc.uploaded_date_u
-                    WHERE wc.insert_date > %s
-                ) AS subquery
-
-                ON CONFLICT (ticket_id, stage_order) DO UPDATE SET
-                    client_id = EXCLUDED.client_id,
-                    associate_id = EXCLUDED.associate_id,
-                    stage_status = EXCLUDED.stage_status,
-                    ticstatus_id = EXCLUDED.ticstatus_id,
-                    start_date = EXCLUDED.start_date,
-                    closed_date = EXCLUDED.closed_date,
-                    no_of_products = EXCLUDED.no_of_products,
-                    no_of_categories = EXCLUDED.no_of_categories,
-                    duration_hrs = EXCLUDED.duration_hrs,
-                    last_updated_at = NOW();
-            """
-
-            cur.execute(delta_sql, (last_loaded_at,) * 4)
-            
-            logger.info(f"{cur.rowcount} rows inserted/updated from {source_table}")
+            if is_partitioned(cur, 'fact_catalog_activity'):
+                # Without a unique (ticket_id, stage_order) index, concurrent merges must not interleave
+                cur.execute("LOCK TABLE fact_catalog_activity IN SHARE ROW EXCLUSIVE MODE")
+                cur.execute(build_partitioned_delta_sql(source_table), (last_loaded_at,))
+                written = cur.fetchone()[0]
+            else:
+                cur.execute(build_delta_sql(source_table), (last_loaded_at,))
+                written = cur.rowcount
+
+            logger.info(f"{written} rows inserted/updated from {source_table}")
+            metrics.record_rows(table='fact_catalog_activity', written=written)
 
             # Step 3: Update metadata
             update_etl_metadata(cur, source_table=source_table)
-
-            conn.commit()
-            logger.info(f"Metadata updated for '{source_table}'. ETL completed.\n")
+            logger.info(f"Metadata updated for '{source_table}'.")
 
     except Exception as e:
-        conn.rollback()
         logger.exception(f"ETL failed for '{source_table}': {e}")
+        raise
 
 def sync_data_with_bucket_data(conn):
     """Syncs the fact_catalog_activity table with the file_tracker data."""
@@ -159,25 +134,30 @@ def sync_data_with_bucket_data(conn):
         with conn.cursor() as cur:
             cur.execute("""
                 UPDATE fact_catalog_activity f
-                SET ticstatus_id = 5
+                SET ticstatus_id = 5,
+                    last_updated_at = NOW()
                 FROM file_tracker ft
                 WHERE f.vendor_name = ft.filename
                 AND ft.status = 'Success'
                 AND f.ticstatus_id != 5;
             """)
+            metrics.record_rows(table='fact_catalog_activity', updated=cur.rowcount)
         conn.commit()
         logger.info("Syncing is completed.............")
     except Exception as e:
+        conn.rollback()
         logger.exception("Error syncing data with bucket data: %s", e)
+        raise
 
 
 def update_fact_table():
     """Updates the fact_catalog_activity table with new data."""
-    conn = get_connection()
-    try:
-        for table in ('work_completed', 'work_in_progress'):
-            run_delta_etl_fact_catalog_activity(conn, table)
+    with pooled_connection() as conn:
+        # Both source tables land in one transaction so the fact delta is all-or-nothing
+        with conn:
+            for table in ('work_completed', 'work_in_progress'):
+                run_delta_etl_fact_catalog_activity(conn, table)
+        logger.info("Fact delta ETL completed for all source tables.")
+
         logger.info("Trying to Sync Data with Bucket Data")
         sync_data_with_bucket_data(conn)
-    finally:
-        conn.close()
@@ -0,0 +1,26 @@
+import os
+import tempfile
+
+# Must be settled before src is imported: the modules read their configuration at import time.
+# benchmarks.run_pipeline also points DB_NAME at the scratch database (BENCH_DB_NAME).
+os.environ.setdefault('SNAPSHOT_DIR', tempfile.mkdtemp(prefix='test_snapshots_'))
+os.environ.setdefault('CHECKPOINT_DIR', tempfile.mkdtemp(prefix='test_checkpoints_'))
+os.environ.setdefault('WATCH_STATE_PATH', '')
+
+import psycopg2
+import pytest
+
+from benchmarks.run_pipeline import create_database
+from src.utils.db_connection import close_pool
+
+
+@pytest.fixture
+def database():
+    """A freshly created scratch database loaded with the pipeline schema; skips when no server is reachable."""
+    close_pool()
+    try:
+        create_database()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"no database available: {e}")
+    yield
+    close_pool()
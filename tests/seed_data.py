@@ -0,0 +1,23 @@
+"""Synthetic KPI data shared by the KPI tests and the KPI benchmarks."""
+
+# Dimensions plus %(tickets)s tickets with four stage facts each, closed over roughly three years;
+# every tenth fact has no closed date yet
+SEED_SQL = """
+    INSERT INTO dim_clients (client_name) SELECT 'Client ' || i FROM generate_series(1, 200) i;
+    INSERT INTO dim_catalog_associates (associate_name) SELECT 'Associate ' || i FROM generate_series(1, 300) i;
+    INSERT INTO dim_teams (team_name, team_lead) SELECT 'Team ' || i, 'Lead ' || i FROM generate_series(1, 12) i;
+    INSERT INTO associate_team_map (associate_name, team_name)
+    SELECT 'Associate ' || i, 'Team ' || (i %% 12 + 1) FROM generate_series(1, 300) i;
+
+    INSERT INTO fact_catalog_activity (
+        ticket_id, client_id, associate_id, stage_order, stage_status, ticstatus_id,
+        start_date, closed_date, no_of_products, no_of_categories, duration_hrs, last_updated_at
+    )
+    SELECT
+        'T' || t, 1 + (t * 7) %% 200, 1 + (t * 13 + s) %% 300, s, 'Done', 1 + t %% 10,
+        closed - 3, CASE WHEN (t + s) %% 10 = 0 THEN NULL ELSE closed END,
+        (t * s) %% 500, (t + s) %% 40, ((t * 31 + s * 17) %% 7200) / 100.0, NOW()
+    FROM generate_series(1, %(tickets)s) t
+    CROSS JOIN generate_series(1, 4) s
+    CROSS JOIN LATERAL (SELECT DATE '2023-01-01' + (t::bigint * 1000 / %(tickets)s)::int + s AS closed) d;
+"""
@@ -0,0 +1,66 @@
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.bench_date_engine import as_strings, legacy_normalize
+from benchmarks.fake_drive import FakeDriveService
+from benchmarks.synthetic import make_tracker_frame
+from benchmarks.workbook_generator import write_tracker_workbook
+from src import data_importer
+from src.data_importer import STAGE_DATE_COLUMNS, normalize_stage_dates, parse_workbook
+
+
+def test_stage_dates_match_the_per_column_loop():
+    raw = make_tracker_frame(500, date_format='%d-%b-%y')
+    # Cells the sheet holds besides well-formed dates
+    raw.loc[0, 'closed_dt_s'] = 'TBD'
+    raw.loc[1, 'start_dt_c'] = ''
+    raw.loc[2, 'assigned_dt_qc'] = '31-Feb-24'
+    raw.loc[3, STAGE_DATE_COLUMNS] = None
+
+    expected = as_strings(legacy_normalize(raw.copy()))
+    actual = as_strings(normalize_stage_dates(raw.copy()))
+
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_missing_date_columns_are_left_out():
+    raw = make_tracker_frame(50, date_format='%d-%b-%y').drop(columns=['start_dt_s', 'uploaded_date_u'])
+
+    expected = as_strings(legacy_normalize(raw.copy()))
+    actual = as_strings(normalize_stage_dates(raw.copy()))
+
+    assert 'start_dt_s' not in actual.columns and 'uploaded_date_u' not in actual.columns
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def register_team_workbooks(tmp_path, drive, modified):
+    """Two team workbooks sharing tickets 30-59, with the given modification times (epoch seconds)."""
+    paths = {}
+    for (file_id, mtime), (seed, first_ticket) in zip(modified.items(), [(0, 0), (1, 30)]):
+        path = write_tracker_workbook(str(tmp_path / f"{file_id}.xlsx"), 60, seed=seed, first_ticket=first_ticket)
+        os.utime(path, (mtime, mtime))
+        drive.register(file_id, path, parents=['team-folder'])
+        paths[file_id] = path
+    return paths
+
+
+@pytest.mark.parametrize('newest', ['team-a', 'team-b'])
+def test_workbooks_merge_on_ticket_id_with_the_newest_edit_winning(tmp_path, monkeypatch, newest):
+    monkeypatch.setattr(data_importer, 'CHANGE_DETECTION_ENABLED', False)
+    monkeypatch.setattr(data_importer, 'WORKBOOK_CACHE_DIR', '')
+    drive = FakeDriveService()
+    modified = {'team-a': 1_700_000_000, 'team-b': 1_700_000_000}
+    modified[newest] += 3600
+    paths = register_team_workbooks(tmp_path, drive, modified)
+
+    df = data_importer.get_sheet_data_from_drive(service=drive, file_ids=[], folder_id='team-folder')
+
+    assert len(df) == 90
+    assert df['ticket_id'].is_unique
+    assert set(df.attrs['source_files']) == {'team-a', 'team-b'}
+    shared = [f"TCK-{i:08d}" for i in range(30, 60)]
+    expected = parse_workbook(paths[newest]).set_index('ticket_id').loc[shared, 'vendor_name']
+    actual = df.set_index('ticket_id').loc[shared, 'vendor_name']
+    assert actual.tolist() == expected.tolist()
@@ -0,0 +1,34 @@
+import threading
+
+import pytest
+from psycopg2.pool import PoolError
+
+from src.utils import db_connection
+from src.utils.db_connection import BlockingConnectionPool, DB_CONFIG
+
+
+@pytest.fixture
+def small_pool(database):
+    pool = BlockingConnectionPool(1, 2, **DB_CONFIG)
+    yield pool
+    pool.closeall()
+
+
+def test_getconn_waits_for_a_connection_to_be_handed_back(small_pool):
+    held = [small_pool.getconn(), small_pool.getconn()]
+    timer = threading.Timer(0.2, small_pool.putconn, args=(held.pop(),))
+    timer.start()
+    conn = small_pool.getconn()
+    timer.join()
+    small_pool.putconn(conn)
+    small_pool.putconn(held.pop())
+
+
+def test_getconn_gives_up_after_the_timeout(small_pool, monkeypatch):
+    monkeypatch.setattr(db_connection, 'DB_POOL_TIMEOUT', 0.1)
+    held = [small_pool.getconn(), small_pool.getconn()]
+    with pytest.raises(PoolError):
+        small_pool.getconn()
+    for conn in held:
+        small_pool.putconn(conn)
+    small_pool.putconn(small_pool.getconn())
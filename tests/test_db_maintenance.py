@@ -0,0 +1,45 @@
+import pytest
+
+from src import db_maintenance
+from src.utils import metrics
+from src.utils.db_connection import pooled_connection
+
+
+@pytest.fixture
+def quiet_server(database, monkeypatch):
+    """Pretends the server saw no changes, so only the run's own counters decide."""
+    monkeypatch.setattr(db_maintenance, 'table_activity', lambda cur, table: (0, 1000))
+    monkeypatch.setattr(db_maintenance, 'ANALYZE_MIN_CHANGED_ROWS', 100)
+    monkeypatch.setattr(db_maintenance, 'ANALYZE_CHANGED_FRACTION', 0.05)
+    metrics.start_run()
+
+
+def test_only_tables_whose_own_changes_cross_the_threshold_are_analyzed(quiet_server):
+    # One step writes both work tables, but only work_completed changed enough
+    with metrics.step_scope('upload_sheet'):
+        metrics.record_rows(table='work_completed', inserted=400, updated=100, skipped=5000)
+        metrics.record_rows(table='work_in_progress', deleted=20)
+
+    assert db_maintenance.analyze_tables(['work_completed', 'work_in_progress']) == ['work_completed']
+
+
+def test_writes_from_any_step_add_up_per_table(quiet_server):
+    with metrics.step_scope('upload_sheet'):
+        metrics.record_rows(table='work_in_progress', inserted=60)
+    with metrics.step_scope('update_fact_table'):
+        metrics.record_rows(table='work_in_progress', deleted=60)
+
+    assert metrics.snapshot()['tables'] == {'work_in_progress': 120}
+    assert db_maintenance.analyze_tables(db_maintenance.SOURCE_TABLES) == ['work_in_progress']
+
+
+def test_ensure_indexes_creates_the_delta_scan_indexes_a_database_lacks(database):
+    # A database created before the schema file declared them
+    with pooled_connection() as conn:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("DROP INDEX IF EXISTS idx_work_completed_insert_date, idx_work_in_progress_insert_date")
+
+    created = db_maintenance.ensure_indexes()
+    assert {'idx_work_completed_insert_date', 'idx_work_in_progress_insert_date'} <= set(created)
+    assert db_maintenance.ensure_indexes() == []
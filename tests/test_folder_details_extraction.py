@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks.fake_gcs import FakeBlob, make_fake_bucket
+from src import folder_db_exporter, folder_details_extraction
+from src.utils.db_connection import pooled_connection
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    monkeypatch.setattr(folder_details_extraction, 'PREFIX', 'tracker/')
+    return make_fake_bucket(40, prefix='tracker/')
+
+
+def test_sharded_scan_lists_what_one_listing_returns():
+    gcs_bucket = make_fake_bucket(300, prefix='tracker/')
+    now = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    gcs_bucket.add(FakeBlob('tracker/at_root$#$Arun.xlsx', now, now, generation=1))
+    gcs_bucket.add(FakeBlob('tracker/Success_files/notes.txt', now, now, generation=2))
+    gcs_bucket.add(FakeBlob('other/Success_files/elsewhere.xlsx', now, now, generation=3))
+
+    scanned = folder_details_extraction.scan_bucket(gcs_bucket, 'tracker', workers=4)
+
+    assert sorted(blob.name for blob in scanned) == sorted(blob.name for blob in gcs_bucket.list_blobs(prefix='tracker/'))
+
+
+def test_delta_skips_manifest_hits_and_objects_under_the_watermark():
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    blobs = [
+        FakeBlob(f"tracker/Success_files/vendor_{i}$#$Arun$#$Dinesh.xlsx", start + timedelta(hours=i), start, generation=i + 1)
+        for i in range(6)
+    ]
+    blobs.append(FakeBlob('tracker/Success_files/readme.txt', start, start, generation=99))
+    manifest = {}
+
+    rows, latest = folder_details_extraction.collect_delta(blobs, start + timedelta(hours=1), manifest)
+    assert [row['filename'] for row in rows] == ['vendor_2', 'vendor_3', 'vendor_4', 'vendor_5']
+    assert rows[0]['qc_done_by'] == 'Arun' and rows[0]['uploaded_by'] == 'Dinesh' and rows[0]['status'] == 'Success'
+    assert latest == start + timedelta(hours=5)
+    assert len(manifest) == 6
+
+    # A rewritten object gets a new generation and is extracted again
+    blobs[3] = FakeBlob(blobs[3].name, blobs[3].updated, start, generation=1000)
+    rows, _ = folder_details_extraction.collect_delta(blobs, None, manifest)
+    assert [row['filename'] for row in rows] == ['vendor_3']
+
+
+def file_tracker_rows():
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM file_tracker")
+            return cur.fetchone()[0]
+
+
+def test_failed_upload_leaves_the_delta_for_the_next_run(database, bucket, tmp_path, monkeypatch):
+    manifest_path = str(tmp_path / 'manifest.json')
+    df = folder_details_extraction.extract_delta_xlsx_metadata(bucket, manifest_path)
+    assert len(df) == 40
+
+    def failing_commit(cur, df):
+        raise RuntimeError("upload failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(folder_db_exporter, 'commit_delta', failing_commit)
+        with pytest.raises(RuntimeError):
+            folder_db_exporter.upload(df)
+    assert file_tracker_rows() == 0
+    assert folder_details_extraction.load_manifest(manifest_path) == {}
+
+    df = folder_details_extraction.extract_delta_xlsx_metadata(bucket, manifest_path)
+    assert len(df) == 40
+    folder_db_exporter.upload(df)
+    assert file_tracker_rows() == 40
+    assert len(folder_details_extraction.load_manifest(manifest_path)) == 40
+
+    assert folder_details_extraction.extract_delta_xlsx_metadata(bucket, manifest_path).empty
@@ -0,0 +1,95 @@
+import time
+
+import pandas as pd
+import pytest
+
+from src import kpi_query_api, kpi_rollups
+from src.kpi_query_api import KpiCache, build_query, normalize_filters, query_kpis
+from src.refresh_materialized_view import materialized_view_refresh
+from src.utils.db_connection import pooled_connection
+from src.utils.etl_updater import KPI_DATA_VERSION, update_etl_metadata
+from tests.seed_data import SEED_SQL
+
+
+def test_cache_hits_misses_and_evicts_least_recently_used():
+    cache = KpiCache(max_entries=2, ttl_seconds=60, cache_dir='')
+    cache.put(('v1', 'client', ()), 'a')
+    cache.put(('v1', 'team', ()), 'b')
+    assert cache.get(('v1', 'client', ())) == 'a'
+    cache.put(('v1', 'associate', ()), 'c')
+
+    assert cache.get(('v1', 'team', ())) is None
+    assert cache.get(('v1', 'client', ())) == 'a'
+    stats = cache.snapshot()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (2, 1, 1, 2)
+
+
+def test_cache_entries_expire_after_the_ttl():
+    cache = KpiCache(ttl_seconds=0.05, cache_dir='')
+    cache.put(('v1', 'client', ()), 'a')
+    time.sleep(0.1)
+    assert cache.get(('v1', 'client', ())) is None
+    assert cache.snapshot()['expired'] == 1
+
+
+def test_disk_cache_serves_a_new_process_until_the_version_moves(tmp_path):
+    KpiCache(cache_dir=str(tmp_path)).put(('v1', 'client', ()), pd.DataFrame({'ticket_count': [3]}))
+
+    restarted = KpiCache(cache_dir=str(tmp_path))
+    assert restarted.get(('v1', 'client', ()))['ticket_count'].tolist() == [3]
+    assert restarted.snapshot()['disk_hits'] == 1
+
+    restarted.drop_versions_except('v2')
+    assert KpiCache(cache_dir=str(tmp_path)).get(('v1', 'client', ())) is None
+
+
+def test_equivalent_filter_spellings_normalize_alike():
+    assert normalize_filters(clients=[' Client 7', 'Client 3', 'Client 7', ''], start='2024-03-01') == \
+        normalize_filters(clients=['Client 3', 'Client 7'], start=pd.Timestamp('2024-03-01').date())
+    assert normalize_filters(clients='Client 3', teams=[]) == (('clients', ('Client 3',)),)
+
+
+@pytest.fixture
+def kpi_cache(database, monkeypatch):
+    cache = KpiCache(cache_dir='')
+    monkeypatch.setattr(kpi_query_api, '_cache', cache)
+    monkeypatch.setattr(kpi_query_api, 'KPI_VERSION_CHECK_SECONDS', 0)
+    kpi_query_api.invalidate_cache()
+    return cache
+
+
+def test_data_version_bump_invalidates_cached_answers(kpi_cache):
+    query_kpis('client', clients=['Client 3'])
+    query_kpis('client', clients=['Client 3 '])
+    assert (kpi_cache.stats['hits'], kpi_cache.stats['misses']) == (1, 1)
+
+    with pooled_connection() as conn:
+        with conn:
+            with conn.cursor() as cur:
+                update_etl_metadata(cur, source_table=KPI_DATA_VERSION)
+
+    query_kpis('client', clients=['Client 3'])
+    assert (kpi_cache.stats['hits'], kpi_cache.stats['misses']) == (1, 2)
+    # Only the answer for the new version is left
+    assert kpi_cache.snapshot()['entries'] == 1
+
+
+def test_cached_answers_equal_fresh_queries(kpi_cache):
+    with pooled_connection() as conn:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(SEED_SQL, {'tickets': 500})
+    materialized_view_refresh()
+    kpi_rollups.refresh_rollups()
+
+    for dashboard, filters in [('client', {'clients': ['Client 3']}), ('team', {'clients': ['Client 3'], 'start': '2024-01-01'})]:
+        first = query_kpis(dashboard, **filters)
+        cached = query_kpis(dashboard, **filters)
+        sql, params = build_query(dashboard, normalize_filters(**filters))
+        with pooled_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                fresh = pd.DataFrame(cur.fetchall(), columns=first.columns)
+        assert not fresh.empty
+        pd.testing.assert_frame_equal(cached, fresh)
+    assert kpi_cache.stats['hits'] == 2
@@ -0,0 +1,22 @@
+import re
+
+from src.utils import metrics
+
+
+def test_runs_started_within_the_same_second_get_distinct_ids():
+    assert metrics.start_run() != metrics.start_run()
+
+
+def test_prometheus_textfile_exports_per_run_gauges_without_the_counter_suffix():
+    metrics.start_run()
+    with metrics.step_scope('upload_sheet'):
+        metrics.record_rows(table='work_completed', read=10, inserted=4, updated=2)
+        metrics.increment('sql_round_trips')
+    record = {**metrics.snapshot(), 'started_unix': 0, 'success': True}
+    record['steps']['upload_sheet']['status'] = 'succeeded'
+
+    text = metrics.render_prometheus(record)
+    names = set(re.findall(r'^# TYPE (\S+) gauge$', text, flags=re.M))
+    assert {'etl_step_rows_inserted', 'etl_step_sql_round_trips', 'etl_table_changed_rows'} <= names
+    assert not any(name.endswith('_total') for name in names)
+    assert 'etl_table_changed_rows{table="work_completed"} 6' in text
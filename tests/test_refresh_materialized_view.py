@@ -0,0 +1,35 @@
+import pytest
+
+from src import refresh_materialized_view
+
+
+@pytest.fixture
+def refreshed_views(database, monkeypatch):
+    """Records the views each refresh_view call refreshed."""
+    views = []
+    refresh_view = refresh_materialized_view.refresh_view
+
+    def recording_refresh(cur, view, concurrently):
+        views.append(view)
+        refresh_view(cur, view, concurrently)
+
+    monkeypatch.setattr(refresh_materialized_view, 'refresh_view', recording_refresh)
+    monkeypatch.setattr(refresh_materialized_view, 'KPI_REFRESH_MODE', 'incremental')
+    return views
+
+
+def test_incremental_mode_refreshes_the_views_on_their_slower_schedule(refreshed_views, monkeypatch):
+    monkeypatch.setattr(refresh_materialized_view, 'KPI_TABLE_REFRESH_SECONDS', 3600)
+    refresh_materialized_view.materialized_view_refresh()
+    assert refreshed_views == ['kpi_table', 'kpi_table2']
+
+    refreshed_views.clear()
+    refresh_materialized_view.materialized_view_refresh()
+    assert refreshed_views == []
+
+
+def test_incremental_mode_refreshes_kpi_table_every_run_when_the_interval_is_zero(refreshed_views, monkeypatch):
+    monkeypatch.setattr(refresh_materialized_view, 'KPI_TABLE_REFRESH_SECONDS', 0)
+    refresh_materialized_view.materialized_view_refresh()
+    refresh_materialized_view.materialized_view_refresh()
+    assert refreshed_views == ['kpi_table', 'kpi_table2'] * 2
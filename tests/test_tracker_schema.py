@@ -0,0 +1,31 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.data_importer import parse_workbook
+from src.utils.tracker_schema import TEXT_DTYPE, to_text
+
+
+def test_to_text_keeps_missing_values_missing():
+    series = pd.Series([datetime(2024, 1, 3), 'yes', np.nan, None, pd.NaT, 3], dtype=object)
+    assert to_text(series).tolist() == ['2024-01-03 00:00:00', 'yes', pd.NA, pd.NA, pd.NA, '3']
+
+
+def test_blank_cell_in_mixed_column_stays_missing(tmp_path):
+    path = tmp_path / 'tracker.xlsx'
+    sheet = pd.DataFrame({
+        'Sr No': [1, 2, 3],
+        'Ticket ID': ['TCK-1', 'TCK-2', 'TCK-3'],
+        'Documents': [datetime(2024, 1, 3), 'yes', None],
+        'Ticket Status': ['Completed', None, 'In-progress'],
+    })
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        pd.DataFrame({'Summary': []}).to_excel(writer, sheet_name='Summary', index=False)
+        sheet.to_excel(writer, sheet_name='Tracker', index=False)
+
+    df = parse_workbook(path)
+
+    assert df['documents'].dtype == TEXT_DTYPE
+    assert df['documents'].tolist() == ['2024-01-03 00:00:00', 'yes', pd.NA]
+    assert df['ticket_status'].tolist() == ['Completed', 'In-progress', 'In-progress']
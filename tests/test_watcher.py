@@ -0,0 +1,163 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from benchmarks.fake_drive import FakeChanges, FakeDriveService
+from benchmarks.fake_gcs import FakeBlob, FakeBucket
+from src import main as pipeline
+from src import watcher
+
+
+class PagedChanges(FakeChanges):
+    '''One change per page; list() raises on the page numbered fail_on_page (1-based) of the next poll.'''
+    def __init__(self, service, fail_on_page=None):
+        super().__init__(service)
+        self.fail_on_page = fail_on_page
+        self.pages = 0
+
+    def list(self, pageToken, pageSize=100, **kwargs):
+        self.pages += 1
+        if self.pages == self.fail_on_page:
+            raise ConnectionError("changes.list failed")
+        return super().list(pageToken, pageSize=1, **kwargs)
+
+
+def write_revision(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+@pytest.fixture
+def drive(tmp_path):
+    service = FakeDriveService()
+    service.register('sheet-a', write_revision(tmp_path, 'a0.xlsx', b'a0'))
+    service.register('sheet-b', write_revision(tmp_path, 'b0.xlsx', b'b0'))
+    return service
+
+
+def test_failed_page_loses_no_revision(tmp_path, drive):
+    changes = PagedChanges(drive)
+    drive.changes = lambda: changes
+    source = watcher.DriveChangesSource(drive, file_ids=['sheet-a', 'sheet-b'], folder_id='', poll_seconds=1)
+    assert source.poll() == []
+    start_token = source.page_token
+
+    drive.register('sheet-a', write_revision(tmp_path, 'a1.xlsx', b'a1'))
+    drive.register('sheet-b', write_revision(tmp_path, 'b1.xlsx', b'b1'))
+    changes.pages, changes.fail_on_page = 0, 2
+    with pytest.raises(ConnectionError):
+        source.poll()
+    assert source.page_token == start_token
+    assert source.revisions == {}
+
+    changes.fail_on_page = None
+    events = source.poll()
+    assert [event.key for event in events] == ['sheet-a', 'sheet-b']
+    assert source.page_token == str(len(drive.change_log))
+    assert source.poll() == []
+
+
+class BatchRecorder:
+    '''run_batch stand-in: records the step names of every batch and answers with the next queued outcome.'''
+    def __init__(self, outcomes=()):
+        self.batches = []
+        self.outcomes = list(outcomes)
+
+    def __call__(self, steps):
+        self.batches.append({step.name for step in steps})
+        return self.outcomes.pop(0) if self.outcomes else True
+
+
+@pytest.fixture
+def feeds(tmp_path, drive):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    bucket = FakeBucket([FakeBlob('tracker/Success_files/old$#$Arun.xlsx', start, start, generation=1)])
+    sources = [
+        watcher.DriveChangesSource(drive, file_ids=['sheet-a', 'sheet-b'], folder_id='', poll_seconds=1),
+        watcher.GcsListingSource(bucket, prefix='tracker/', poll_seconds=30),
+    ]
+    return sources, bucket
+
+
+def make_watcher(feeds, drive, recorder, state_path=''):
+    sources, bucket = feeds
+    return watcher.Watcher(
+        sources, build_steps=lambda: pipeline.build_steps(drive, bucket), run_batch=recorder,
+        debounce_seconds=5, max_delay_seconds=12, full_run_seconds=0, initial_run=False, state_path=state_path
+    )
+
+
+def new_object(bucket, name):
+    updated = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    bucket.add(FakeBlob(f"tracker/Success_files/{name}$#$Arun.xlsx", updated, updated, generation=2))
+
+
+def test_changes_are_debounced_into_one_micro_batch(tmp_path, drive, feeds):
+    recorder = BatchRecorder()
+    pipeline_watcher = make_watcher(feeds, drive, recorder)
+    assert pipeline_watcher.tick(now=0) is None
+
+    drive.register('sheet-a', write_revision(tmp_path, 'a1.xlsx', b'a1'))
+    assert pipeline_watcher.tick(now=1) is None
+    drive.register('sheet-b', write_revision(tmp_path, 'b1.xlsx', b'b1'))
+    assert pipeline_watcher.tick(now=4) is None
+    # Renames and sharing changes keep the revision and are ignored
+    drive.log_change('sheet-a')
+    assert pipeline_watcher.tick(now=8.5) is None
+    assert pipeline_watcher.tick(now=9) == 'micro'
+
+    assert len(recorder.batches) == 1
+    assert {'import_sheet', 'upload_sheet', 'update_dimensions', 'analyze_facts'} <= recorder.batches[0]
+    assert not {'extract_folders', 'upload_folders', 'ensure_indexes'} & recorder.batches[0]
+    assert pipeline_watcher.stats['events'] == 2
+    assert pipeline_watcher.tick(now=30) is None
+
+
+def test_a_steady_trickle_runs_by_the_max_delay(tmp_path, drive, feeds):
+    recorder = BatchRecorder()
+    pipeline_watcher = make_watcher(feeds, drive, recorder)
+    pipeline_watcher.tick(now=0)
+
+    for second in range(1, 13, 3):
+        drive.register('sheet-a', write_revision(tmp_path, f"a{second}.xlsx", f"a{second}".encode()))
+        assert pipeline_watcher.tick(now=second) is None
+    assert pipeline_watcher.tick(now=12.5) is None
+    assert pipeline_watcher.tick(now=13) == 'micro'
+    assert len(recorder.batches) == 1
+
+
+def test_changes_on_both_feeds_join_one_batch(tmp_path, drive, feeds):
+    recorder = BatchRecorder()
+    pipeline_watcher = make_watcher(feeds, drive, recorder)
+    _, bucket = feeds
+    pipeline_watcher.tick(now=0)
+
+    drive.register('sheet-a', write_revision(tmp_path, 'a1.xlsx', b'a1'))
+    pipeline_watcher.tick(now=1)
+    # The bucket is not due for a poll until t=30; the last look before the batch finds the object
+    new_object(bucket, 'new')
+    assert pipeline_watcher.tick(now=6) == 'micro'
+
+    assert len(recorder.batches) == 1
+    assert {'import_sheet', 'extract_folders', 'upload_folders'} <= recorder.batches[0]
+
+
+def test_failed_batch_is_retried_and_positions_wait_for_it(tmp_path, drive, feeds):
+    state_path = str(tmp_path / 'watch_state.json')
+    recorder = BatchRecorder(outcomes=[False, True])
+    pipeline_watcher = make_watcher(feeds, drive, recorder, state_path=state_path)
+    pipeline_watcher.tick(now=0)
+
+    drive.register('sheet-a', write_revision(tmp_path, 'a1.xlsx', b'a1'))
+    pipeline_watcher.tick(now=1)
+    assert pipeline_watcher.tick(now=6) == 'micro'
+    assert pipeline_watcher.stats['failed_batches'] == 1
+    assert watcher.load_state(state_path) == {}
+
+    # Retried no sooner than the max delay after the failure, with the same change
+    assert pipeline_watcher.tick(now=time.monotonic()) is None
+    assert pipeline_watcher.tick(now=time.monotonic() + 13) == 'micro'
+    assert recorder.batches[0] == recorder.batches[1]
+    assert watcher.load_state(state_path)['drive']['revisions']['sheet-a'] == drive.files_by_id['sheet-a']['headRevisionId']